@@ -0,0 +1,124 @@
+# benchmarks/bench_decoders.py
+#
+# Messages/sec per venue for the legacy json.loads + dict path versus each
+# installed feeds.decoders backend.
+#
+#   python -m benchmarks.bench_decoders [--frames 50000]
+
+import argparse
+import json
+import time
+
+from feeds.decoders import available_decoders, get_decoder
+
+BINANCE_FRAME = json.dumps({
+    "e": "aggTrade", "E": 1718000000123, "s": "SOLUSDT", "a": 912345678,
+    "p": "171.2300", "q": "12.45", "f": 1500000001, "l": 1500000003,
+    "T": 1718000000120, "m": False, "M": True
+})
+
+BYBIT_FRAME = json.dumps({
+    "topic": "publicTrade.SOLUSDT", "type": "snapshot", "ts": 1718000000123,
+    "data": [
+        {"T": 1718000000120 + i, "s": "SOLUSDT", "S": "Buy" if i % 2 else "Sell",
+         "v": "3.2", "p": "171.25", "L": "PlusTick", "i": str(2290000000061666327 + i), "BT": False}
+        for i in range(3)
+    ]
+})
+
+OKX_FRAME = json.dumps({
+    "arg": {"channel": "trades", "instId": "SOL-USDT-SWAP"},
+    "data": [
+        {"instId": "SOL-USDT-SWAP", "tradeId": str(130639474 + i), "px": "171.24",
+         "sz": "5", "side": "buy" if i % 2 else "sell", "ts": "1718000000120", "count": "1"}
+        for i in range(2)
+    ]
+})
+
+COINBASE_FRAME = json.dumps({
+    "type": "match", "trade_id": 45678912, "sequence": 98765432101,
+    "maker_order_id": "ac928c66-ca53-498f-9c13-a110027a60e8",
+    "taker_order_id": "132fb6ae-456b-4654-b4e0-d681ac05cea1",
+    "time": "2024-06-10T06:13:20.120000Z", "product_id": "SOL-USD",
+    "size": "4.20", "price": "171.21", "side": "sell"
+})
+
+
+# === Pre-decoder handler bodies, kept here as the baseline ===
+
+def legacy_binance(raw):
+    msg = json.loads(raw)
+    price = float(msg["p"])
+    qty = float(msg["q"])
+    return price, -qty if msg["m"] else qty
+
+
+def legacy_bybit(raw):
+    msg = json.loads(raw)
+    cvd = 0
+    if "data" in msg and "topic" in msg:
+        for trade in msg["data"]:
+            side = trade.get("S")
+            qty = float(trade.get("v", 0))
+            price = float(trade.get("p", 0))
+            cvd += qty if side == "Buy" else -qty
+    return cvd
+
+
+def legacy_okx(raw):
+    msg = json.loads(raw)
+    cvd = 0
+    if "data" in msg:
+        for trade in msg["data"]:
+            side = trade.get("side")
+            sz = float(trade.get("sz", 0))
+            px = float(trade.get("px", 0))
+            cvd += sz if side == "buy" else -sz
+    return cvd
+
+
+def legacy_coinbase(raw):
+    msg = json.loads(raw)
+    if msg["type"] == "match":
+        size = float(msg["size"])
+        price = float(msg["price"])
+        return size if msg["side"] == "buy" else -size
+
+
+VENUES = [
+    ("binance", BINANCE_FRAME, legacy_binance, "binance_agg_trade"),
+    ("bybit", BYBIT_FRAME, legacy_bybit, "bybit_public_trade"),
+    ("okx", OKX_FRAME, legacy_okx, "okx_trades"),
+    ("coinbase", COINBASE_FRAME, legacy_coinbase, "coinbase_match"),
+]
+
+
+def measure(fn, frame, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(frame)
+    return n / (time.perf_counter() - start)
+
+
+def run(n=50000):
+    decoders = [get_decoder(name) for name in available_decoders()]
+    results = {}
+
+    for venue, frame, legacy, method in VENUES:
+        results[venue] = {"legacy": measure(legacy, frame, n)}
+        for decoder in decoders:
+            results[venue][decoder.name] = measure(getattr(decoder, method), frame, n)
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=50000)
+    args = parser.parse_args()
+
+    results = run(args.frames)
+    for venue, rates in results.items():
+        base = rates["legacy"]
+        line = " | ".join(f"{name}: {rate:,.0f}/s ({rate / base:.2f}x)" for name, rate in rates.items())
+        print(f"{venue:<9} {line}")
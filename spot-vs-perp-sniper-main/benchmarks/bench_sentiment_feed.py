@@ -0,0 +1,99 @@
+# benchmarks/bench_sentiment_feed.py
+#
+# Runs SentimentTracker's background refresher against a local stand-in for
+# the LunarCrush assets endpoint: healthy refreshes, an outage (stale values
+# keep being served while the refresher backs off), then recovery. Also
+# times get_summary(), which must stay I/O free.
+#
+#   python -m benchmarks.bench_sentiment_feed [--seconds 3]
+
+import argparse
+import asyncio
+import time
+
+from aiohttp import web
+
+from feeds.sentiment_feed import SentimentTracker
+
+
+class StandInLunarCrush:
+    def __init__(self):
+        self.requests = 0
+        self.down = False
+        self.score = 60
+
+    async def assets(self, request):
+        self.requests += 1
+        if self.down:
+            return web.Response(status=503, text="unavailable")
+        self.score += 1
+        return web.json_response({"data": [{
+            "symbol": request.query.get("symbol"),
+            "galaxy_score": self.score,
+            "social_volume": 1000 + self.score,
+            "price_score": 3.5
+        }]})
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_get("/v2", self.assets)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", port)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/v2"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def run(seconds):
+    server = StandInLunarCrush()
+    url = await server.start()
+    tracker = SentimentTracker(url=url, api_key="test", refresh_interval=0.05, ttl=0.5,
+                               backoff_base=0.05, backoff_max=0.4)
+    tracker.start()
+    try:
+        await asyncio.sleep(seconds)
+        healthy = tracker.get_summary()
+        healthy_requests = server.requests
+
+        server.down = True
+        outage_started = time.perf_counter()
+        await asyncio.sleep(seconds)
+        during = tracker.get_summary()
+        outage_requests = server.requests - healthy_requests
+
+        server.down = False
+        while tracker.get_summary()["stale"] and time.perf_counter() - outage_started < seconds * 4:
+            await asyncio.sleep(0.01)
+        recovered = tracker.get_summary()
+
+        n = 100_000
+        started = time.perf_counter()
+        for _ in range(n):
+            tracker.get_summary()
+        summary_us = (time.perf_counter() - started) / n * 1e6
+
+        print({
+            "healthy_refreshes": healthy_requests,
+            "healthy": healthy,
+            "outage_requests": outage_requests,
+            "during_outage": during,
+            "recovered": recovered,
+            "get_summary_us": round(summary_us, 2)
+        })
+    finally:
+        await tracker.stop()
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    asyncio.run(run(args.seconds))
+
+
+if __name__ == "__main__":
+    main()
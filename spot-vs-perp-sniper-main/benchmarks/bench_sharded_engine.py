@@ -0,0 +1,135 @@
+# benchmarks/bench_sharded_engine.py
+#
+# Runs ShardedEngine workers against a local fake exchange and reports how
+# many trades per second land in the shared state table for each shard
+# count. The fake exchange serves Binance combined aggTrade streams for
+# whatever symbols a connection asks for (other venues connect and stay
+# idle) and runs one server process per shard on a SO_REUSEPORT socket so it
+# is not the bottleneck.
+#
+#   python -m benchmarks.bench_sharded_engine [--symbols 200] [--shards 1,2,4] [--seconds 10]
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import time
+from urllib.parse import urlparse, parse_qs
+
+import websockets
+
+from sharded_engine import ShardedEngine
+from utils.shared_state_table import COLUMNS
+
+
+async def _fake_binance(ws, batch=100):
+    # Streams come from ?streams= or, as the mux subscribes, SUBSCRIBE requests
+    query = parse_qs(urlparse(ws.path).query)
+    streams = query.get("streams", [""])[0].split("/")
+    while True:
+        try:
+            request = json.loads(await asyncio.wait_for(ws.recv(), timeout=0.5))
+        except (asyncio.TimeoutError, websockets.ConnectionClosed):
+            break
+        if request.get("method") == "SUBSCRIBE":
+            streams += request["params"]
+    symbols = [s.split("@")[0].upper() for s in streams if s.endswith("@aggTrade")]
+    if not symbols:
+        await ws.wait_closed()
+        return
+
+    ids = {s: 0 for s in symbols}
+    i = 0
+    while True:
+        frames = []
+        for _ in range(batch):
+            symbol = symbols[i % len(symbols)]
+            i += 1
+            ids[symbol] += 1
+            data = {"e": "aggTrade", "s": symbol, "a": ids[symbol], "p": "100.0", "q": "1.5",
+                    "T": int(time.time() * 1000), "m": i % 3 == 0}
+            frames.append(json.dumps({"stream": f"{symbol.lower()}@aggTrade", "data": data}))
+        try:
+            for frame in frames:
+                await ws.send(frame)
+        except websockets.ConnectionClosed:
+            return
+        await asyncio.sleep(0)
+
+
+def _serve(port):
+    async def main():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind(("127.0.0.1", port))
+        async with websockets.serve(_fake_binance, sock=sock, max_queue=None):
+            await asyncio.Future()
+
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def run_case(symbols, shards, seconds):
+    port = _free_port()
+    ctx = multiprocessing.get_context("spawn")
+    servers = [ctx.Process(target=_serve, args=(port,), daemon=True) for _ in range(shards)]
+    for server in servers:
+        server.start()
+    time.sleep(1.0)
+
+    uri = f"ws://127.0.0.1:{port}"
+    uris = {venue: uri for venue in ("coinbase", "binance_spot", "binance_perp", "bybit", "okx")}
+    engine = ShardedEngine(symbols, shards=shards, dry_run=True, uris=uris)
+    engine.start_workers()
+    try:
+        time.sleep(2.0)  # workers import, connect and warm up
+        start_trades = engine.table.snapshot()[:, COLUMNS["trades"]].sum()
+        started = time.perf_counter()
+        time.sleep(seconds)
+        snapshot = engine.table.snapshot()
+        elapsed = time.perf_counter() - started
+
+        pass_started = time.perf_counter()
+        evaluated = len(engine.evaluate_pass())
+        pass_seconds = time.perf_counter() - pass_started
+
+        return {
+            "shards": shards,
+            "symbols": len(symbols),
+            "trades_per_sec": round((snapshot[:, COLUMNS["trades"]].sum() - start_trades) / elapsed),
+            "rows_published": int((snapshot[:, COLUMNS["seq"]] > 0).sum()),
+            "coordinator_pass_ms": round(pass_seconds * 1000, 2),
+            "evaluated": evaluated
+        }
+    finally:
+        engine.stop_workers()
+        engine.table.close()
+        for server in servers:
+            server.terminate()
+            server.join()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--symbols", type=int, default=200)
+    parser.add_argument("--shards", default=",".join(str(n) for n in (1, 2, 4) if n <= (os.cpu_count() or 1)) or "1")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    symbols = [f"SYM{i}" for i in range(args.symbols)]
+    for shards in (int(n) for n in args.shards.split(",")):
+        print(run_case(symbols, shards, args.seconds))
+
+
+if __name__ == "__main__":
+    main()
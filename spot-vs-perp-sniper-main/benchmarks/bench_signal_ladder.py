@@ -0,0 +1,76 @@
+# benchmarks/bench_signal_ladder.py
+#
+# Rule evaluation cost for the compiled signal ladder: per live tick
+# (first-match and all-matches, positional and from a snapshot dict) and per
+# million rows of a feature matrix for backfills.
+#
+#   python -m benchmarks.bench_signal_ladder [--ticks 200000] [--rows 1000000]
+
+import argparse
+import time
+
+import numpy as np
+
+from utils.signal_ladder import FEATURES, LADDER
+
+
+def random_features(rows, seed=7):
+    # Signs drive every condition, so draw values around zero with some exact
+    # zeros and funding straddling the squeeze threshold
+    rng = np.random.default_rng(seed)
+    columns = {f: rng.normal(0, 1000, rows) * (rng.random(rows) > 0.05) for f in FEATURES}
+    columns["funding"] = rng.normal(0, 0.01, rows)
+    columns["spike"] = rng.random(rows) < 0.1
+    return columns
+
+
+def bench_ticks(columns, ticks):
+    rows = [tuple(v.item() for v in values) for values in zip(*(columns[f][:ticks] for f in FEATURES))]
+    snapshots = [dict(zip(FEATURES, row)) for row in rows]
+    results = {}
+
+    cases = {
+        "match": lambda: [LADDER.match(*row) for row in rows],
+        "first_index": lambda: [LADDER.first_index(*row) for row in rows],
+        "all_indices": lambda: [LADDER.all_indices(*row) for row in rows],
+        "first(snapshot)": lambda: [LADDER.first(s) for s in snapshots],
+        "all(snapshot)": lambda: [LADDER.all(s) for s in snapshots]
+    }
+    for name, fn in cases.items():
+        started = time.perf_counter()
+        fn()
+        results[name] = round((time.perf_counter() - started) / len(rows) * 1e9)
+    return results
+
+
+def bench_matrix(columns, rows):
+    matrix = np.column_stack([columns[f].astype(np.float64) for f in FEATURES])
+    results = {}
+    cases = {
+        "first_matrix(dict)": lambda: LADDER.first_matrix(columns),
+        "first_matrix(ndarray)": lambda: LADDER.first_matrix(matrix),
+        "all_matrix(dict)": lambda: LADDER.all_matrix(columns)
+    }
+    for name, fn in cases.items():
+        fn()  # warm up
+        started = time.perf_counter()
+        fn()
+        results[name] = round((time.perf_counter() - started) * 1e6 / rows * 1000, 2)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ticks", type=int, default=200_000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    columns = random_features(max(args.ticks, args.rows))
+    print({"ns_per_tick": bench_ticks(columns, args.ticks)})
+
+    columns = {f: v[:args.rows] for f, v in columns.items()}
+    print({"ms_per_million_rows": bench_matrix(columns, args.rows)})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# benchmarks/bench_supabase_writer.py
+#
+# Drives SupabaseWriter against a local stand-in for the PostgREST insert
+# endpoint: steady-state throughput, then an outage (spill) and recovery.
+#
+#   python -m benchmarks.bench_supabase_writer [--rows 20000]
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+from aiohttp import web
+
+from utils.supabase_writer import SupabaseWriter
+
+
+class StandInSupabase:
+    def __init__(self):
+        self.rows = 0
+        self.requests = 0
+        self.down = False
+        self.latency = 0.0
+
+    async def insert(self, request):
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.down:
+            return web.Response(status=503, text="unavailable")
+        self.rows += len(json.loads(await request.text()))
+        return web.Response(status=201)
+
+    async def start(self, port=0):
+        app = web.Application()
+        app.router.add_post("/rest/v1/{table}", self.insert)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", port)
+        await site.start()
+        return f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+    async def stop(self):
+        await self.runner.cleanup()
+
+
+async def wait_for(predicate, timeout=30):
+    deadline = time.perf_counter() + timeout
+    while not predicate() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.01)
+
+
+async def run(rows):
+    server = StandInSupabase()
+    url = await server.start()
+    spill = os.path.join(tempfile.mkdtemp(), "spill.jsonl")
+    writer = SupabaseWriter(url=url, key="test", max_queue=rows + 1000, flush_interval=0.05,
+                            backoff_base=0.01, backoff_max=0.05, spill_path=spill)
+    task = asyncio.create_task(writer.run())
+    row = {"timestamp": "2024-01-01T00:00:00", "exchange": "multi", "price": 171.2, "signal": "test"}
+
+    # === Steady state ===
+    started = time.perf_counter()
+    for _ in range(rows):
+        writer.enqueue("cvd_snapshots", row)
+    enqueue_us = (time.perf_counter() - started) / rows * 1e6
+    await wait_for(lambda: server.rows >= rows)
+    elapsed = time.perf_counter() - started
+    print(f"steady   {rows} rows in {elapsed:.2f}s → {rows / elapsed:,.0f} rows/s | "
+          f"enqueue {enqueue_us:.1f} µs/row | {server.requests} requests")
+
+    # === Outage: batches exhaust retries and spill to disk ===
+    server.down = True
+    for _ in range(1000):
+        writer.enqueue("sniper_alerts", row)
+    await wait_for(lambda: writer.stats["spilled"] >= 1000)
+    print(f"outage   spilled {writer.stats['spilled']} rows after {writer.stats['retries']} retries")
+
+    # === Recovery: next successful batch drains the spill file ===
+    server.down = False
+    before = server.rows
+    writer.enqueue("cvd_snapshots", row)
+    await wait_for(lambda: server.rows - before >= 1001)
+    print(f"recovery delivered {server.rows - before} rows, recovered {writer.stats['recovered']} from spill")
+
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows))
@@ -0,0 +1,324 @@
+# benchmarks/run_suite.py
+#
+# Benchmark suite for the engine's hot paths, fed with the deterministic
+# frames and series from benchmarks.synthetic:
+#
+#   handlers     per-venue frame handlers (decode + tape), Binance via the mux
+#   memory       MultiTFMemory.update / get_all_deltas
+#   spike        DeltaSpikeTracker.add_trades / check_spike
+#   scorer       score_spot_perp_confluence_multi
+#   ladder       signal rule table, first match per tick
+#   alerts       AlertClusterBuffer.should_send
+#   snapshots    SnapshotLog.append
+#   end_to_end   frames through a dry-run SpotVsPerpEngine to signals
+#
+# Results are written as JSON; pass an earlier file to --compare to see the
+# change per case.
+#
+#   python -m benchmarks.run_suite [--scale 1.0] [--only handlers,spike] [--out bench.json] [--compare old.json]
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import (
+    binance_agg_trade_frames, bybit_trade_frames, okx_trade_frames, coinbase_match_frames,
+    flow_series, delta_dicts
+)
+from feeds.binance_feed import BinanceCVDTracker
+from feeds.binance_mux import BinanceStreamMux, BINANCE_SPOT_HOST, BINANCE_PERP_HOST
+from feeds.bybit_feed import BybitCVDTracker
+from feeds.coinbase_feed import CoinbaseSpotCVD
+from feeds.decoders import DEFAULT_DECODER
+from feeds.delta_spike_feed import DeltaSpikeTracker
+from feeds.okx_feed import OKXCVDTracker
+from utils.alert_cluster_buffer import AlertClusterBuffer
+from utils.frame_replay import ReplayClock
+from utils.multi_tf_memory import MultiTFMemory
+from utils.signal_ladder import LADDER
+from utils.snapshot_log import SnapshotLog
+from utils.spot_perp_scorer import score_spot_perp_confluence_multi
+
+SCHEMA_VERSION = 1
+
+
+def result(n, seconds, unit="op"):
+    return {
+        "n": n,
+        "seconds": round(seconds, 6),
+        "per_sec": round(n / seconds, 1) if seconds > 0 else None,
+        "ns_per_op": round(seconds / n * 1e9, 1) if n else None,
+        "unit": unit
+    }
+
+
+def timed(fn, n, unit="op"):
+    started = time.perf_counter()
+    fn()
+    return result(n, time.perf_counter() - started, unit)
+
+
+async def timed_async(handler, frames, unit="frame"):
+    started = time.perf_counter()
+    for frame in frames:
+        await handler(frame)
+    return result(len(frames), time.perf_counter() - started, unit)
+
+
+async def bench_handlers(scale):
+    n = int(50_000 * scale)
+    spot_mux = BinanceStreamMux("bench_spot_mux", BINANCE_SPOT_HOST)
+    perp_mux = BinanceStreamMux("bench_perp_mux", BINANCE_PERP_HOST)
+    binance = BinanceCVDTracker(spot_mux=spot_mux, perp_mux=perp_mux)
+
+    return {
+        "binance_spot_mux": await timed_async(spot_mux.dispatch, binance_agg_trade_frames(n, combined=True)),
+        "binance_perp_mux": await timed_async(perp_mux.dispatch, binance_agg_trade_frames(n, seed=11, combined=True)),
+        "bybit": await timed_async(BybitCVDTracker().handle_message, bybit_trade_frames(n)),
+        "okx": await timed_async(OKXCVDTracker().handle_message, okx_trade_frames(n)),
+        "coinbase": await timed_async(CoinbaseSpotCVD().handle_message, coinbase_match_frames(n)),
+        "_check": {"binance_perp_cvd": round(binance.perp_tape.cvd, 3)}
+    }
+
+
+def bench_memory(scale):
+    n = int(100_000 * scale)
+    clock = ReplayClock(1_700_000_000.0)
+    memory = MultiTFMemory(clock=clock)
+    rows = flow_series(n)
+
+    def update():
+        for row in rows:
+            clock.now += 1.0
+            memory.update(*row)
+
+    def deltas():
+        for _ in range(n):
+            memory.get_all_deltas()
+
+    return {"update": timed(update, n), "get_all_deltas": timed(deltas, n)}
+
+
+def bench_spike(scale):
+    n = int(100_000 * scale)
+    decoded = [DEFAULT_DECODER.binance_agg_trade(f)[1] for f in binance_agg_trade_frames(n, seed=21)]
+    clock = ReplayClock(decoded[0][0][0])
+    tracker = DeltaSpikeTracker(clock=clock)
+
+    times = [trades[0][0] for trades in decoded]
+
+    def add():
+        # add_trades() stamps trades with the clock, so advance it per frame
+        for ts, trades in zip(times, decoded):
+            clock.now = ts
+            tracker.add_trades(trades)
+
+    def check():
+        for ts in times:
+            clock.now = ts
+            tracker.check_spike()
+
+    return {"add_trades": timed(add, n, "trade"), "check_spike": timed(check, n)}
+
+
+def bench_scorer(scale):
+    n = int(100_000 * scale)
+    deltas = delta_dicts(n)
+
+    def score():
+        for d in deltas:
+            score_spot_perp_confluence_multi(d)
+
+    return {"score_spot_perp_confluence_multi": timed(score, n)}
+
+
+def bench_ladder(scale):
+    n = int(200_000 * scale)
+    rows = flow_series(n, series=8, seed=31)
+    rows = [(*r[:6], r[6] / 1e5, r[7] > 40) for r in rows]
+    match = LADDER.match
+
+    def run():
+        for r in rows:
+            match(*r)
+
+    return {"match": timed(run, n)}
+
+
+def bench_alerts(scale):
+    n = int(100_000 * scale)
+    clock = ReplayClock(1_700_000_000.0)
+    buffer = AlertClusterBuffer(buffer_window=60, clock=clock)
+    texts = LADDER.texts
+    inputs = [(texts[(i // 7) % len(texts)], 5 + i % 3, "spot_advantage") for i in range(n)]
+
+    def run():
+        for text, confidence, label in inputs:
+            clock.now += 0.5
+            buffer.should_send(text, confidence, label)
+
+    return {"should_send": timed(run, n)}
+
+
+def bench_snapshots(scale):
+    n = int(20_000 * scale)
+    out = {}
+    record = {
+        "exchange": "multi", "signal": LADDER.texts[1], "confidence": 6.5, "bias": "spot_advantage",
+        "price": 171.23, "funding_rate": 0.0081, "spike": False, "spike_delta": 152.3,
+        "btc_spot": 12.5, "btc_perp": -3.2, "timestamp": "2024-06-10T06:13:20.120000"
+    }
+    for fsync in ("never", "interval"):
+        with tempfile.TemporaryDirectory() as directory:
+            log = SnapshotLog(directory, fsync=fsync)
+
+            def run():
+                ts = 1_700_000_000.0
+                for _ in range(n):
+                    ts += 1.0
+                    log.append(record, ts=ts)
+
+            out[f"append_fsync_{fsync}"] = timed(run, n)
+            log.close()
+    return out
+
+
+async def bench_end_to_end(scale, eval_every=50):
+    from spot_vs_perp_engine import SpotVsPerpEngine
+
+    n = int(20_000 * scale)
+    clock = ReplayClock()
+    engine = SpotVsPerpEngine(clock=clock, dry_run=True)
+    handlers = engine.frame_handlers()
+
+    spot_mux = engine.binance.spot_mux.name
+    perp_mux = engine.binance.perp_mux.name
+    streams = [
+        (spot_mux, binance_agg_trade_frames(n, combined=True, seed=41)),
+        (perp_mux, binance_agg_trade_frames(n, combined=True, seed=42)),
+        ("bybit", bybit_trade_frames(n, seed=43)),
+        ("okx", okx_trade_frames(n, seed=44)),
+        ("coinbase", coinbase_match_frames(n, seed=45)),
+    ]
+    # Interleave venues the way a live session would see them
+    frames = [(name, frames[i]) for i in range(n) for name, frames in streams]
+    signals = {}
+
+    started = time.perf_counter()
+    for i, (name, raw) in enumerate(frames, 1):
+        await handlers[name](raw)
+        if i % eval_every == 0:
+            clock.now += 1.0
+            snapshot = await engine.evaluate()
+            signals[snapshot["signal"]] = signals.get(snapshot["signal"], 0) + 1
+    seconds = time.perf_counter() - started
+
+    return {
+        "frames": result(len(frames), seconds, "frame"),
+        "evaluations": result(len(frames) // eval_every, seconds, "evaluation"),
+        "_check": {"distinct_signals": len(signals)}
+    }
+
+
+SUITES = {
+    "handlers": bench_handlers,
+    "memory": bench_memory,
+    "spike": bench_spike,
+    "scorer": bench_scorer,
+    "ladder": bench_ladder,
+    "alerts": bench_alerts,
+    "snapshots": bench_snapshots,
+    "end_to_end": bench_end_to_end,
+}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+async def run(names, scale):
+    results = {}
+    for name in names:
+        out = SUITES[name](scale)
+        if asyncio.iscoroutine(out):
+            out = await out
+        results[name] = out
+        print(f"[BENCH] {name} done", file=sys.stderr)
+
+    return {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "created": datetime.utcnow().isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "decoder": DEFAULT_DECODER.name,
+            "scale": scale
+        },
+        "results": results
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Prints per-case throughput change vs `baseline`; returns the cases that
+    got slower by more than `threshold` (a fraction).
+    """
+    regressions = []
+    for suite, cases in current["results"].items():
+        for case, now in cases.items():
+            before = baseline.get("results", {}).get(suite, {}).get(case)
+            if case.startswith("_") or not before or not before.get("per_sec") or not now.get("per_sec"):
+                continue
+            change = now["per_sec"] / before["per_sec"] - 1
+            flag = "  <-- slower" if change < -threshold else ""
+            print(f"{suite + '.' + case:<48} {before['per_sec']:>14,.0f} -> {now['per_sec']:>14,.0f} /s  {change:+7.1%}{flag}")
+            if flag:
+                regressions.append(f"{suite}.{case}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every case's iteration count")
+    parser.add_argument("--only", default=",".join(SUITES), help=f"comma-separated subset of: {', '.join(SUITES)}")
+    parser.add_argument("--out", help="write the JSON results here (default: stdout)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown fraction reported as a regression")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.only.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SUITES]
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    report = asyncio.run(run(names, args.scale))
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} case(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# benchmarks/synthetic.py
+#
+# Deterministic synthetic market data for the benchmarks: trade frames in
+# each venue's wire format and flow series for the engine's pure functions.
+# The same seed always yields the same frames, so runs on different
+# versions of the code are fed identical input.
+
+import json
+import random
+from datetime import datetime, timezone
+
+START_MS = 1718000000000
+
+
+class TradeWalk:
+    """
+    Seeded random walk of trades: prices drift around `price`, sizes are
+    log-normal, and timestamps advance by `rate` trades per second.
+    """
+
+    def __init__(self, seed=1, price=170.0, rate=50.0, start_ms=START_MS):
+        self.rng = random.Random(seed)
+        self.price = price
+        self.rate = rate
+        self.ts_ms = float(start_ms)
+        self.trade_id = 1_000_000
+
+    def next(self):
+        rng = self.rng
+        self.price = max(0.01, self.price * (1 + rng.gauss(0, 0.0002)))
+        self.ts_ms += rng.expovariate(self.rate) * 1000
+        self.trade_id += 1
+        qty = round(rng.lognormvariate(0, 1.0), 3) or 0.001
+        return int(self.ts_ms), round(self.price, 4), qty, rng.random() < 0.5, self.trade_id
+
+
+def binance_agg_trade_frames(n, symbol="SOLUSDT", seed=1, combined=False, **walk):
+    # combined=True wraps each event in the /stream envelope the mux receives
+    w = TradeWalk(seed, **walk)
+    stream = f"{symbol.lower()}@aggTrade"
+    frames = []
+    for _ in range(n):
+        ts, price, qty, buy, trade_id = w.next()
+        data = {
+            "e": "aggTrade", "E": ts + 3, "s": symbol, "a": trade_id, "p": f"{price:.4f}", "q": f"{qty:.3f}",
+            "f": trade_id * 3, "l": trade_id * 3 + 1, "T": ts, "m": not buy, "M": True
+        }
+        frames.append(json.dumps({"stream": stream, "data": data} if combined else data))
+    return frames
+
+
+def bybit_trade_frames(n, symbol="SOLUSDT", seed=2, trades_per_frame=3, **walk):
+    w = TradeWalk(seed, **walk)
+    frames = []
+    for _ in range(n):
+        data = []
+        for _ in range(trades_per_frame):
+            ts, price, qty, buy, trade_id = w.next()
+            data.append({
+                "T": ts, "s": symbol, "S": "Buy" if buy else "Sell", "v": f"{qty:.3f}", "p": f"{price:.4f}",
+                "L": "PlusTick", "i": f"{trade_id:08x}-0000-4000-8000-{trade_id:012x}", "BT": False
+            })
+        frames.append(json.dumps({"topic": f"publicTrade.{symbol}", "type": "snapshot", "ts": data[-1]["T"], "data": data}))
+    return frames
+
+
+def okx_trade_frames(n, inst_id="SOL-USDT-SWAP", seed=3, trades_per_frame=2, **walk):
+    w = TradeWalk(seed, **walk)
+    frames = []
+    for _ in range(n):
+        data = []
+        for _ in range(trades_per_frame):
+            ts, price, qty, buy, trade_id = w.next()
+            data.append({
+                "instId": inst_id, "tradeId": str(trade_id), "px": f"{price:.4f}", "sz": f"{max(1, round(qty)):d}",
+                "side": "buy" if buy else "sell", "ts": str(ts), "count": "1"
+            })
+        frames.append(json.dumps({"arg": {"channel": "trades", "instId": inst_id}, "data": data}))
+    return frames
+
+
+def coinbase_match_frames(n, product_id="SOL-USD", seed=4, **walk):
+    w = TradeWalk(seed, **walk)
+    frames = []
+    for i in range(n):
+        ts, price, qty, buy, trade_id = w.next()
+        stamp = datetime.fromtimestamp(ts / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+        frames.append(json.dumps({
+            "type": "match", "trade_id": trade_id, "sequence": 98765432101 + i,
+            "maker_order_id": "ac928c66-ca53-498f-9c13-a110027a60e8",
+            "taker_order_id": "132fb6ae-456b-4654-b4e0-d681ac05cea1",
+            "time": stamp, "product_id": product_id, "size": f"{qty:.3f}", "price": f"{price:.4f}",
+            "side": "buy" if buy else "sell"
+        }))
+    return frames
+
+
+def flow_series(n, seed=5, series=3, scale=1000.0):
+    """
+    n rows of cumulative CVD-like values (random walks), one column per series.
+    """
+    rng = random.Random(seed)
+    values = [0.0] * series
+    rows = []
+    for _ in range(n):
+        values = [v + rng.gauss(0, scale / 50) for v in values]
+        rows.append(tuple(values))
+    return rows
+
+
+def delta_dicts(n, seed=6, timeframes=("5m", "15m", "1h")):
+    """
+    n {timeframe: {"cb_cvd", "bin_spot", "bin_perp"}} percent-change dicts in
+    the shape MultiTFMemory.get_all_deltas() returns.
+    """
+    rng = random.Random(seed)
+    return [
+        {tf: {name: round(rng.gauss(0, 3), 2) for name in ("cb_cvd", "bin_spot", "bin_perp")} for tf in timeframes}
+        for _ in range(n)
+    ]
@@ -0,0 +1,640 @@
+# exchange_simulator.py
+#
+# Local stand-in for the exchange websockets the feeds read, for load and
+# soak tests that must not touch the real venues. One aiohttp server speaks
+# each venue's subscribe protocol and frame format under the path prefixes in
+# feeds/endpoints.py:
+#
+#   /binance_spot, /binance_perp   /stream (?streams= or SUBSCRIBE) and /ws/<stream>:
+#                                  aggTrade, markPrice@1s, !markPrice@arr@1s
+#   /bybit/v5/public/linear        publicTrade, tickers
+#   /okx/ws/v5/public              trades
+#   /coinbase                      matches
+#
+# It also serves the REST trade endpoints the feeds backfill from after a
+# reconnect, so a whole engine runs offline against it. Trade rate, bursts,
+# forced disconnects and malformed frames are configurable; GET /stats
+# returns what was sent.
+#
+#   python exchange_simulator.py --port 9400 --rate 2000 --burst-every 60 --burst-multiplier 10 \
+#       --disconnect-every 300 --malformed 0.0001
+#   EXCHANGE_SIMULATOR=127.0.0.1:9400 python spot_vs_perp_engine.py
+
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+
+from aiohttp import web, WSMsgType
+
+from feeds.endpoints import SIMULATOR_PATHS
+
+VENUES = tuple(SIMULATOR_PATHS)
+
+TICK_SECONDS = 0.01
+FUNDING_INTERVAL_MS = 8 * 3600 * 1000
+START_PRICES = {"BTC": 65000.0, "ETH": 3500.0, "SOL": 170.0}
+
+# Instruments are interpolated into frames unescaped, so only plain names are served
+_INSTRUMENT = re.compile(r"^[A-Za-z0-9_\-]{1,40}$")
+
+
+def base_asset(instrument):
+    base = instrument.upper().split("-")[0]
+    for quote in ("USDT", "USDC", "USD"):
+        if base.endswith(quote) and len(base) > len(quote):
+            return base[:-len(quote)]
+    return base
+
+
+def iso_ms(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%f") + "Z"
+
+
+class Market:
+    """
+    Seeded random walk of trades for one instrument on one venue. Recent
+    trades are kept to answer REST backfill requests.
+    """
+
+    def __init__(self, venue, instrument, seed, history=5000):
+        self.venue = venue
+        self.instrument = instrument
+        self.rng = random.Random(f"{seed}:{venue}:{instrument}")
+        self.price = START_PRICES.get(base_asset(instrument), 100.0)
+        self.trade_id = self.rng.randrange(10 ** 8, 10 ** 9)
+        self.sequence = self.trade_id * 7
+        self.funding = self.rng.gauss(0.0001, 0.00005)
+        self.recent = deque(maxlen=history)
+
+    def next_trade(self, now_ms):
+        rng = self.rng
+        self.price = max(0.0001, self.price * (1 + rng.gauss(0, 0.0002)))
+        self.trade_id += 1
+        self.sequence += 1
+        trade = (now_ms, self.price, round(rng.lognormvariate(0, 1.0), 3) or 0.001, rng.random() < 0.5, self.trade_id)
+        self.recent.append(trade)
+        return trade
+
+    def catch_up(self, now_ms, rate):
+        # The market keeps trading while nobody is subscribed; fill the quiet
+        # period so a reconnecting client has trades to backfill
+        if not self.recent:
+            return
+        last = self.recent[-1][0]
+        n = min(self.recent.maxlen, int((now_ms - last) / 1000 * rate))
+        for k in range(1, n + 1):
+            self.next_trade(last + (now_ms - last) * k // (n + 1))
+
+    def next_funding(self):
+        self.funding += self.rng.gauss(0, 0.000002)
+        return self.funding
+
+
+# --- frame formats ------------------------------------------------------------
+
+def binance_agg_trade(market, trade, stream=None):
+    ts, price, qty, buy, trade_id = trade
+    data = (
+        f'{{"e":"aggTrade","E":{ts + 2},"s":"{market.instrument}","a":{trade_id},"p":"{price:.4f}","q":"{qty:.3f}",'
+        f'"f":{trade_id * 3},"l":{trade_id * 3},"T":{ts},"m":{"false" if buy else "true"},"M":true}}'
+    )
+    # Combined streams put "stream" first; the mux relies on that
+    return f'{{"stream":"{stream}","data":{data}}}' if stream else data
+
+
+def binance_mark_price(market, now_ms):
+    mark = market.price
+    next_funding = (now_ms // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS
+    return {
+        "e": "markPriceUpdate", "E": now_ms, "s": market.instrument, "p": f"{mark:.4f}", "P": f"{mark:.4f}",
+        "i": f"{mark * 0.9998:.4f}", "r": f"{market.next_funding():.8f}", "T": next_funding
+    }
+
+
+def bybit_public_trade(market, trade):
+    ts, price, qty, buy, trade_id = trade
+    return (
+        f'{{"topic":"publicTrade.{market.instrument}","type":"snapshot","ts":{ts},"data":[{{"T":{ts},'
+        f'"s":"{market.instrument}","S":"{"Buy" if buy else "Sell"}","v":"{qty:.3f}","p":"{price:.4f}","L":"ZeroPlusTick",'
+        f'"i":"{trade_id:08x}-0000-4000-8000-{trade_id:012x}","BT":false}}]}}'
+    )
+
+
+def bybit_ticker(market, now_ms):
+    mark = market.price
+    next_funding = (now_ms // FUNDING_INTERVAL_MS + 1) * FUNDING_INTERVAL_MS
+    return json.dumps({
+        "topic": f"tickers.{market.instrument}", "type": "snapshot", "ts": now_ms, "cs": now_ms,
+        "data": {
+            "symbol": market.instrument, "markPrice": f"{mark:.4f}", "indexPrice": f"{mark * 0.9998:.4f}",
+            "fundingRate": f"{market.next_funding():.8f}", "nextFundingTime": str(next_funding)
+        }
+    }, separators=(",", ":"))
+
+
+def okx_trade(market, trade):
+    ts, price, qty, buy, trade_id = trade
+    inst = market.instrument
+    return (
+        f'{{"arg":{{"channel":"trades","instId":"{inst}"}},"data":[{{"instId":"{inst}","tradeId":"{trade_id}",'
+        f'"px":"{price:.4f}","sz":"{max(1, round(qty))}","side":"{"buy" if buy else "sell"}","ts":"{ts}","count":"1"}}]}}'
+    )
+
+
+def coinbase_match(market, trade):
+    ts, price, qty, buy, trade_id = trade
+    return (
+        f'{{"type":"match","trade_id":{trade_id},"sequence":{market.sequence},'
+        f'"maker_order_id":"ac928c66-ca53-498f-9c13-a110027a60e8","taker_order_id":"132fb6ae-456b-4654-b4e0-d681ac05cea1",'
+        f'"time":"{iso_ms(ts)}","product_id":"{market.instrument}","size":"{qty:.3f}","price":"{price:.4f}",'
+        f'"side":"{"buy" if buy else "sell"}"}}'
+    )
+
+
+# --- load shape -----------------------------------------------------------------
+
+class LoadProfile:
+    """
+    Trades per second per subscribed instrument, optionally overridden per
+    venue, with periodic bursts. Disconnect and malformed-frame settings are
+    applied by the sessions.
+    """
+
+    def __init__(self, rate=100.0, venue_rates=None, burst_every=0.0, burst_seconds=2.0, burst_multiplier=10.0,
+                 disconnect_every=0.0, malformed=0.0, max_backlog_seconds=1.0):
+        self.rate = rate
+        self.venue_rates = venue_rates or {}
+        self.burst_every = burst_every
+        self.burst_seconds = burst_seconds
+        self.burst_multiplier = burst_multiplier
+        self.disconnect_every = disconnect_every
+        self.malformed = malformed
+        self.max_backlog_seconds = max_backlog_seconds
+        self.started = time.monotonic()
+
+    def rate_for(self, venue, now):
+        rate = self.venue_rates.get(venue, self.rate)
+        if self.burst_every > 0 and (now - self.started) % self.burst_every < self.burst_seconds:
+            rate *= self.burst_multiplier
+        return rate
+
+
+class Session:
+    """
+    One client connection: its subscriptions and fault schedule.
+    """
+
+    def __init__(self, sim, venue, ws, request, conn_id):
+        self.sim = sim
+        self.venue = venue
+        self.ws = ws
+        self.request = request
+        self.conn_id = conn_id
+        self.trades = {}   # subscription -> (market, render(market, trade))
+        self.funding = {}  # subscription -> render(now_ms)
+        self.sources = []
+        self.combined = True  # Binance: /stream wraps frames, /ws/<stream> does not
+        self.close_code = None
+        self.rng = random.Random(f"{sim.seed}:session:{conn_id}")
+
+        profile = sim.profile
+        now = time.monotonic()
+        self.close_at = now + self.rng.expovariate(1 / profile.disconnect_every) if profile.disconnect_every > 0 else None
+        self.next_funding = now
+
+    def add_trades(self, key, market, render):
+        market.catch_up(int(time.time() * 1000), self.sim.profile.rate_for(self.venue, time.monotonic()))
+        self.trades[key] = (market, render)
+        self.sources = list(self.trades.values())
+
+    def remove(self, key):
+        self.trades.pop(key, None)
+        self.funding.pop(key, None)
+        self.sources = list(self.trades.values())
+
+    async def send_json(self, payload):
+        await self.ws.send_str(json.dumps(payload, separators=(",", ":")))
+
+
+class ExchangeSimulator:
+    def __init__(self, profile, seed=1, symbols=("SOL", "BTC"), history=5000, name="SIM"):
+        self.profile = profile
+        self.name = name
+        self.seed = seed
+        self.history = history
+        self.markets = {}
+        self.sessions = set()
+        self._conn_ids = itertools.count(1)
+        self.started = time.monotonic()
+        self.stats = {
+            v: {"sessions": 0, "open": 0, "frames": 0, "malformed": 0, "disconnects": 0, "requests": 0, "backlog_dropped": 0}
+            for v in VENUES
+        }
+        # Markets that the all-market mark price stream reports before anyone trades them
+        for symbol in symbols:
+            self.market("binance_perp", f"{symbol.upper()}USDT")
+
+    def market(self, venue, instrument):
+        key = (venue, instrument)
+        market = self.markets.get(key)
+        if market is None:
+            market = self.markets[key] = Market(venue, instrument, self.seed, self.history)
+        return market
+
+    # --- sessions ---------------------------------------------------------------
+
+    async def _serve(self, request, venue, on_text, setup=None):
+        ws = web.WebSocketResponse(compress=False, max_msg_size=0)
+        await ws.prepare(request)
+        session = Session(self, venue, ws, request, next(self._conn_ids))
+        stats = self.stats[venue]
+        stats["sessions"] += 1
+        stats["open"] += 1
+        self.sessions.add(session)
+        if setup is not None:
+            await setup(session)
+
+        pump = asyncio.ensure_future(self._pump(session))
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.TEXT:
+                    stats["requests"] += 1
+                    try:
+                        await on_text(session, msg.data)
+                    except (ValueError, KeyError, TypeError, AttributeError) as e:
+                        await session.send_json({"error": f"bad request: {e!r}"})
+            # A close started by the pump interrupts the read above; finish it
+            # here, or aiohttp closes with 1000 once the handler returns
+            if session.close_code is not None and not ws.closed:
+                await ws.close(code=session.close_code, message=b"simulated disconnect")
+        finally:
+            pump.cancel()
+            stats["open"] -= 1
+            self.sessions.discard(session)
+        return ws
+
+    async def _pump(self, session):
+        profile = self.profile
+        stats = self.stats[session.venue]
+        ws = session.ws
+        rng = session.rng
+        budget = 0.0
+        last = time.monotonic()
+        i = 0
+
+        while not ws.closed:
+            await asyncio.sleep(TICK_SECONDS)
+            now = time.monotonic()
+            now_ms = int(time.time() * 1000)
+
+            if session.close_at is not None and now >= session.close_at:
+                stats["disconnects"] += 1
+                await self._drop(session)
+                return
+
+            if session.funding and now >= session.next_funding:
+                session.next_funding = now + 1.0
+                for render in list(session.funding.values()):
+                    await ws.send_str(render(now_ms))
+                    stats["frames"] += 1
+
+            sources = session.sources
+            if not sources:
+                budget = 0.0
+                last = now
+                continue
+
+            rate = profile.rate_for(session.venue, now) * len(sources)
+            budget += rate * (now - last)
+            last = now
+            # A client that cannot keep up does not build an unbounded backlog
+            cap = rate * profile.max_backlog_seconds
+            if budget > cap:
+                stats["backlog_dropped"] += int(budget - cap)
+                budget = cap
+
+            n = int(budget)
+            budget -= n
+            malformed = profile.malformed
+            for _ in range(n):
+                market, render = sources[i % len(sources)]
+                i += 1
+                frame = render(market, market.next_trade(now_ms))
+                if malformed and rng.random() < malformed:
+                    frame = self._corrupt(frame, rng)
+                    stats["malformed"] += 1
+                await ws.send_str(frame)
+            stats["frames"] += n
+
+    @staticmethod
+    def _corrupt(frame, rng):
+        kind = rng.randrange(4)
+        if kind == 0:
+            return frame[:rng.randrange(1, len(frame))]  # truncated JSON
+        if kind == 1:
+            return "\x00\x17not json"
+        if kind == 2:
+            return rng.choice(("null", "[]", "{}", '""', "42"))  # valid JSON, wrong shape
+        return frame.replace('":"', '":', 1)  # unquoted string value
+
+    async def _drop(self, session):
+        # Half the drops are a clean close, the rest a dropped TCP connection
+        transport = session.request.transport
+        if session.rng.random() < 0.5 or transport is None:
+            session.close_code = session.rng.choice((1001, 1011))
+            await session.ws.close(code=session.close_code, message=b"simulated disconnect")
+        else:
+            transport.abort()
+
+    # --- Binance ----------------------------------------------------------------
+
+    def _binance_subscribe(self, session, stream, combined):
+        name = stream.lower()
+        venue = session.venue
+        tag = stream if combined else None
+        if name.startswith("!markprice@arr"):
+            perps = [m for (v, _), m in self.markets.items() if v == "binance_perp"]
+
+            def render(now_ms):
+                data = json.dumps([binance_mark_price(m, now_ms) for m in perps], separators=(",", ":"))
+                return f'{{"stream":"{tag}","data":{data}}}' if tag else data
+            session.funding[stream] = render
+            return
+
+        symbol, _, kind = name.partition("@")
+        if not _INSTRUMENT.match(symbol):
+            return
+        market = self.market(venue, symbol.upper())
+        if kind == "aggtrade":
+            session.add_trades(stream, market, lambda m, t: binance_agg_trade(m, t, tag))
+        elif kind.startswith("markprice") and venue == "binance_perp":
+            def render(now_ms):
+                data = json.dumps(binance_mark_price(market, now_ms), separators=(",", ":"))
+                return f'{{"stream":"{tag}","data":{data}}}' if tag else data
+            session.funding[stream] = render
+        # Other streams (forceOrder, depth, ...) are accepted and stay silent
+
+    def _binance_routes(self, venue):
+        prefix = SIMULATOR_PATHS[venue]
+
+        async def on_text(session, text):
+            msg = json.loads(text)
+            method, params, req_id = msg.get("method"), msg.get("params") or [], msg.get("id")
+            combined = session.combined
+            if method == "SUBSCRIBE":
+                for stream in params:
+                    self._binance_subscribe(session, stream, combined)
+                await session.send_json({"result": None, "id": req_id})
+            elif method == "UNSUBSCRIBE":
+                for stream in params:
+                    session.remove(stream)
+                await session.send_json({"result": None, "id": req_id})
+            elif method == "LIST_SUBSCRIPTIONS":
+                await session.send_json({"result": sorted({*session.trades, *session.funding}), "id": req_id})
+            else:
+                await session.send_json({"error": {"code": 2, "msg": f"Invalid request: unknown method {method}"}, "id": req_id})
+
+        async def combined(request):
+            async def setup(session):
+                session.combined = True
+                for stream in filter(None, request.query.get("streams", "").split("/")):
+                    self._binance_subscribe(session, stream, True)
+            return await self._serve(request, venue, on_text, setup)
+
+        async def raw(request):
+            async def setup(session):
+                session.combined = False
+                self._binance_subscribe(session, request.match_info["stream"], False)
+            return await self._serve(request, venue, on_text, setup)
+
+        rest_path = "/api/v3/aggTrades" if venue == "binance_spot" else "/fapi/v1/aggTrades"
+
+        async def agg_trades(request):
+            self.stats[venue]["requests"] += 1
+            market = self.markets.get((venue, request.query.get("symbol", "").upper()))
+            from_id = int(request.query.get("fromId", 0))
+            limit = min(1000, int(request.query.get("limit", 500)))
+            page = []
+            for ts, price, qty, buy, trade_id in (market.recent if market else ()):
+                if trade_id >= from_id:
+                    page.append({"a": trade_id, "p": f"{price:.4f}", "q": f"{qty:.3f}", "f": trade_id * 3,
+                                 "l": trade_id * 3, "T": ts, "m": not buy, "M": True})
+                    if len(page) >= limit:
+                        break
+            return web.json_response(page)
+
+        return [
+            web.get(prefix + "/stream", combined),
+            web.get(prefix + "/ws/{stream}", raw),
+            web.get(prefix + rest_path, agg_trades)
+        ]
+
+    # --- Bybit ------------------------------------------------------------------
+
+    async def _bybit_text(self, session, text):
+        msg = json.loads(text)
+        op, args = msg.get("op"), msg.get("args") or []
+        reply = {"success": True, "ret_msg": "", "conn_id": str(session.conn_id), "req_id": msg.get("req_id", ""), "op": op}
+        if op == "ping":
+            reply["ret_msg"] = "pong"
+        elif op == "subscribe":
+            for topic in args:
+                kind, _, symbol = topic.partition(".")
+                if not _INSTRUMENT.match(symbol):
+                    continue
+                market = self.market("bybit", symbol.upper())
+                if kind == "publicTrade":
+                    session.add_trades(topic, market, bybit_public_trade)
+                elif kind == "tickers":
+                    session.funding[topic] = lambda now_ms, market=market: bybit_ticker(market, now_ms)
+        elif op == "unsubscribe":
+            for topic in args:
+                session.remove(topic)
+        else:
+            reply.update(success=False, ret_msg=f"unsupported op: {op}")
+        await session.send_json(reply)
+
+    # --- OKX --------------------------------------------------------------------
+
+    async def _okx_text(self, session, text):
+        if text == "ping":
+            await session.ws.send_str("pong")
+            return
+        msg = json.loads(text)
+        op = msg.get("op")
+        if op not in ("subscribe", "unsubscribe"):
+            await session.send_json({"event": "error", "code": "60012", "msg": f"Invalid request: {text[:100]}"})
+            return
+        for arg in msg.get("args") or []:
+            inst = arg.get("instId", "")
+            key = f"{arg.get('channel')}:{inst}"
+            if op == "unsubscribe":
+                session.remove(key)
+            elif arg.get("channel") == "trades" and _INSTRUMENT.match(inst):
+                session.add_trades(key, self.market("okx", inst.upper()), okx_trade)
+            await session.send_json({"event": op, "arg": arg, "connId": str(session.conn_id)})
+
+    # --- Coinbase ---------------------------------------------------------------
+
+    async def _coinbase_text(self, session, text):
+        msg = json.loads(text)
+        kind = msg.get("type")
+        if kind not in ("subscribe", "unsubscribe"):
+            await session.send_json({"type": "error", "message": "Failed to subscribe", "reason": f"unknown type {kind}"})
+            return
+
+        default_products = msg.get("product_ids") or []
+        for channel in msg.get("channels") or []:
+            name, products = (channel, default_products) if isinstance(channel, str) else (channel.get("name"), channel.get("product_ids") or default_products)
+            for product in products:
+                key = f"{name}:{product}"
+                if kind == "unsubscribe":
+                    session.remove(key)
+                elif name == "matches" and _INSTRUMENT.match(product):
+                    session.add_trades(key, self.market("coinbase", product.upper()), coinbase_match)
+
+        products = sorted({key.partition(":")[2] for key in session.trades})
+        await session.send_json({"type": "subscriptions", "channels": [{"name": "matches", "product_ids": products}]})
+
+    async def _coinbase_trades(self, request):
+        # Newest first; `after` pages towards older trade ids
+        self.stats["coinbase"]["requests"] += 1
+        market = self.markets.get(("coinbase", request.match_info["product_id"].upper()))
+        limit = min(1000, int(request.query.get("limit", 100)))
+        after = request.query.get("after")
+        page = []
+        for ts, price, qty, buy, trade_id in reversed(market.recent if market else ()):
+            if after is not None and trade_id >= int(after):
+                continue
+            page.append({"time": iso_ms(ts), "trade_id": trade_id, "price": f"{price:.4f}", "size": f"{qty:.3f}",
+                         "side": "buy" if buy else "sell"})
+            if len(page) >= limit:
+                break
+        return web.json_response(page)
+
+    # --- app --------------------------------------------------------------------
+
+    async def handle_stats(self, request):
+        return web.json_response(self.get_stats())
+
+    def get_stats(self):
+        return {
+            "uptime_seconds": round(time.monotonic() - self.started, 1),
+            "markets": len(self.markets),
+            "venues": self.stats
+        }
+
+    def app(self):
+        app = web.Application()
+        routes = [web.get("/stats", self.handle_stats)]
+        routes += self._binance_routes("binance_spot")
+        routes += self._binance_routes("binance_perp")
+        routes += [
+            web.get(SIMULATOR_PATHS["bybit"], lambda r: self._serve(r, "bybit", self._bybit_text)),
+            web.get(SIMULATOR_PATHS["okx"], lambda r: self._serve(r, "okx", self._okx_text)),
+            web.get(SIMULATOR_PATHS["coinbase"], lambda r: self._serve(r, "coinbase", self._coinbase_text)),
+            web.get(SIMULATOR_PATHS["coinbase"] + "/products/{product_id}/trades", self._coinbase_trades)
+        ]
+        app.add_routes(routes)
+        return app
+
+    async def report(self, interval):
+        last = {v: 0 for v in VENUES}
+        while True:
+            await asyncio.sleep(interval)
+            parts = []
+            total = 0
+            for venue, stats in self.stats.items():
+                rate = (stats["frames"] - last[venue]) / interval
+                last[venue] = stats["frames"]
+                total += rate
+                if stats["sessions"]:
+                    parts.append(f"{venue} {rate:,.0f}/s ({stats['open']} open)")
+            print(f"[{self.name}] {total:,.0f} frames/s | " + " | ".join(parts))
+
+    async def run(self, host="127.0.0.1", port=9400, report_interval=10.0, reuse_port=False):
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port, reuse_port=reuse_port or None)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+        print(f"[{self.name}] Serving on {host}:{self.port}; point the engine at it with EXCHANGE_SIMULATOR={host}:{self.port}")
+        try:
+            if report_interval > 0:
+                await self.report(report_interval)
+            else:
+                await asyncio.Event().wait()
+        finally:
+            await runner.cleanup()
+
+
+def parse_venue_rates(text):
+    rates = {}
+    for item in filter(None, (part.strip() for part in (text or "").split(","))):
+        venue, _, rate = item.partition("=")
+        if venue not in VENUES:
+            raise argparse.ArgumentTypeError(f"unknown venue {venue!r}; expected one of {', '.join(VENUES)}")
+        rates[venue] = float(rate)
+    return rates
+
+
+def _serve_worker(profile, args, index):
+    # Each worker owns its own markets; the kernel spreads connections across them
+    simulator = ExchangeSimulator(profile, seed=args.seed + index, symbols=args.symbols, name=f"SIM{index}")
+    asyncio.run(simulator.run(args.host, args.port, args.report, reuse_port=True))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve simulated exchange websockets for load and soak tests.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9400)
+    parser.add_argument("--rate", type=float, default=100.0, help="trades/s per subscribed instrument")
+    parser.add_argument("--venue-rates", type=parse_venue_rates, default={}, help="per-venue overrides, e.g. binance_perp=20000,okx=500")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="seconds between bursts (0: no bursts)")
+    parser.add_argument("--burst-seconds", type=float, default=2.0)
+    parser.add_argument("--burst-multiplier", type=float, default=10.0)
+    parser.add_argument("--disconnect-every", type=float, default=0.0, help="mean seconds between forced disconnects per connection (0: never)")
+    parser.add_argument("--malformed", type=float, default=0.0, help="fraction of trade frames sent corrupted")
+    parser.add_argument("--symbols", default="SOL,BTC", help="base assets reported on !markPrice@arr")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1, help="server processes sharing the port (SO_REUSEPORT); "
+                        "one process tops out around 50k frames/s per core")
+    parser.add_argument("--report", type=float, default=10.0, help="seconds between throughput lines (0: quiet)")
+    args = parser.parse_args()
+
+    profile = LoadProfile(
+        rate=args.rate,
+        venue_rates=args.venue_rates,
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+        burst_multiplier=args.burst_multiplier,
+        disconnect_every=args.disconnect_every,
+        malformed=args.malformed
+    )
+    args.symbols = [s.strip() for s in args.symbols.split(",") if s.strip()]
+
+    if args.workers <= 1:
+        simulator = ExchangeSimulator(profile, seed=args.seed, symbols=args.symbols)
+        asyncio.run(simulator.run(args.host, args.port, args.report))
+        return
+
+    workers = [multiprocessing.Process(target=_serve_worker, args=(profile, args, i), daemon=True) for i in range(args.workers)]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,80 @@
 import asyncio
-import websockets
-import json
+
+from feeds.binance_mux import get_mux
+from feeds.decoders import DEFAULT_DECODER
+from feeds.rest_backfill import BINANCE_SPOT_REST, BINANCE_PERP_REST, fetch_binance_agg_trades
+from utils.trade_tape import TradeTape
 
 class BinanceCVDTracker:
-    def __init__(self, spot_symbol="solusdt", perp_symbol="solusdt"):
+    def __init__(self, spot_symbol="solusdt", perp_symbol="solusdt", decoder=None, spot_mux=None, perp_mux=None):
         self.spot_symbol = spot_symbol.lower()
         self.perp_symbol = perp_symbol.lower()
-        self.spot_cvd = 0.0
-        self.perp_cvd = 0.0
+        self.spot_tape = TradeTape("binance_spot", self.spot_symbol.upper())
+        self.perp_tape = TradeTape("binance_perp", self.perp_symbol.upper())
         self.price = None
+        self.decoder = decoder or DEFAULT_DECODER
+        self.recorder = None
+        self.on_update = None  # called after each frame that carried trades
+        self.on_perp_trades = None  # called with each frame's decoded perp trades
+
+        # Both hosts are shared with the other Binance feeds over one
+        # combined-stream socket each
+        self.spot_mux = spot_mux or get_mux("spot")
+        self.perp_mux = perp_mux or get_mux("perp")
+        self.spot_mux.register(f"{self.spot_symbol}@aggTrade", self._handle_spot_trade, tape=self.spot_tape, backfill=self._backfill_spot)
+        self.perp_mux.register(f"{self.perp_symbol}@aggTrade", self._handle_perp_trade, tape=self.perp_tape, backfill=self._backfill_perp)
 
     async def connect(self):
         await asyncio.gather(
-            self._connect_spot(),
-            self._connect_perp()
+            self.spot_mux.run(self.recorder),
+            self.perp_mux.run(self.recorder)
         )
 
-    async def _connect_spot(self):
-        uri = f"wss://stream.binance.com:9443/ws/{self.spot_symbol}@aggTrade"
-        async with websockets.connect(uri) as ws:
-            async for msg in ws:
-                await self._handle_spot_trade(json.loads(msg))
-
-    async def _connect_perp(self):
-        uri = f"wss://fstream.binance.com/ws/{self.perp_symbol}@aggTrade"
-        async with websockets.connect(uri) as ws:
-            async for msg in ws:
-                await self._handle_perp_trade(json.loads(msg))
-
-    async def _handle_spot_trade(self, msg):
-        price = float(msg["p"])
-        qty = float(msg["q"])
-        is_buyer_maker = msg["m"]
-        self.price = price
-        if is_buyer_maker:
-            self.spot_cvd -= qty
-        else:
-            self.spot_cvd += qty
-
-    async def _handle_perp_trade(self, msg):
-        price = float(msg["p"])
-        qty = float(msg["q"])
-        is_buyer_maker = msg["m"]
-        self.price = price
-        if is_buyer_maker:
-            self.perp_cvd -= qty
-        else:
-            self.perp_cvd += qty
+    async def _handle_spot_trade(self, raw):
+        _, trades = self.decoder.binance_agg_trade(raw)
+        if trades:
+            self.spot_tape.extend_sequenced(trades)
+            self.price = self.spot_tape.last_price
+            if self.on_update:
+                self.on_update()
+
+    async def _handle_perp_trade(self, raw):
+        _, trades = self.decoder.binance_agg_trade(raw)
+        if trades:
+            self.perp_tape.extend_sequenced(trades)
+            self.price = self.perp_tape.last_price
+            if self.on_perp_trades:
+                self.on_perp_trades(trades)
+            if self.on_update:
+                self.on_update()
+
+    async def _backfill_spot(self, last_id):
+        trades = await fetch_binance_agg_trades(BINANCE_SPOT_REST, self.spot_symbol, last_id + 1)
+        self.spot_tape.extend_sequenced(trades, live=False)
+        return len(trades)
+
+    async def _backfill_perp(self, last_id):
+        trades = await fetch_binance_agg_trades(BINANCE_PERP_REST, self.perp_symbol, last_id + 1)
+        self.perp_tape.extend_sequenced(trades, live=False)
+        return len(trades)
+
+    def frame_handlers(self):
+        return {
+            "binance_spot": self._handle_spot_trade,
+            "binance_perp": self._handle_perp_trade,
+            **self.spot_mux.frame_handlers(),
+            **self.perp_mux.frame_handlers()
+        }
+
+    def get_stream_stats(self):
+        return {
+            self.spot_mux.name: self.spot_mux.get_stats(),
+            self.perp_mux.name: self.perp_mux.get_stats()
+        }
 
     def get_cvd(self):
         return {
-            "spot": round(self.spot_cvd, 2),
-            "perp": round(self.perp_cvd, 2),
+            "spot": round(self.spot_tape.cvd, 2),
+            "perp": round(self.perp_tape.cvd, 2),
             "price": self.price
         }
@@ -0,0 +1,126 @@
+import asyncio
+import json
+
+from feeds.endpoints import BINANCE_SPOT_WS, BINANCE_PERP_WS
+from utils.ws_supervisor import StreamSupervisor
+
+BINANCE_SPOT_HOST = BINANCE_SPOT_WS
+BINANCE_PERP_HOST = BINANCE_PERP_WS
+
+MAX_PARAMS_PER_REQUEST = 200
+
+_STREAM_PREFIX = '{"stream":"'
+
+
+class BinanceStreamMux:
+    """
+    One combined-stream socket (`/stream`) per Binance host, shared by every
+    feed that reads from that host.
+
+    Feeds register a handler per stream name (e.g. "solusdt@aggTrade"); the
+    mux keeps the SUBSCRIBE set, replays it on every reconnect, and routes
+    each `{"stream": ..., "data": ...}` frame to its handler with the raw
+    frame untouched, so handlers decode it exactly as they would a frame
+    from a single-stream socket. Streams with a sequenced tape and a backfill
+    callable are backfilled after a reconnect.
+    """
+
+    def __init__(self, name, host):
+        self.name = name
+        self.host = host
+        self.handlers = {}
+        self.backfills = {}  # stream -> (tape, backfill(last_trade_id))
+        self._next_id = 1
+        self._task = None
+        self.unrouted = 0
+        self.supervisor = StreamSupervisor(
+            name,
+            f"{host}/stream",
+            self.dispatch,
+            subscribe=self._subscribe_payloads,
+            backfill=self._backfill
+        )
+
+    def register(self, stream, handler, tape=None, backfill=None):
+        # Takes effect on the next connect; use subscribe() on a live socket
+        self.handlers[stream] = handler
+        if tape is not None and backfill is not None:
+            self.backfills[stream] = (tape, backfill)
+
+    async def subscribe(self, stream, handler, tape=None, backfill=None):
+        self.register(stream, handler, tape, backfill)
+        await self.supervisor.send(self._request("SUBSCRIBE", [stream]))
+
+    async def unsubscribe(self, stream):
+        self.handlers.pop(stream, None)
+        self.backfills.pop(stream, None)
+        await self.supervisor.send(self._request("UNSUBSCRIBE", [stream]))
+
+    def _request(self, method, params):
+        request = {"method": method, "params": params, "id": self._next_id}
+        self._next_id += 1
+        return request
+
+    def _subscribe_payloads(self):
+        streams = sorted(self.handlers)
+        return [
+            self._request("SUBSCRIBE", streams[i:i + MAX_PARAMS_PER_REQUEST])
+            for i in range(0, len(streams), MAX_PARAMS_PER_REQUEST)
+        ]
+
+    async def _backfill(self):
+        total = 0
+        for stream, (tape, backfill) in list(self.backfills.items()):
+            if tape.last_trade_id >= 0:
+                try:
+                    total += await backfill(tape.last_trade_id)
+                except Exception as e:
+                    print(f"[WS] {self.name} backfill for {stream} failed: {e!r}")
+        return total
+
+    async def dispatch(self, raw):
+        # Binance puts "stream" first, so the name is sliced out without a
+        # full decode; anything else (SUBSCRIBE acks, errors) falls back to json.
+        if raw.startswith(_STREAM_PREFIX):
+            stream = raw[len(_STREAM_PREFIX):raw.index('"', len(_STREAM_PREFIX))]
+        else:
+            msg = json.loads(raw)
+            stream = msg.get("stream") if isinstance(msg, dict) else None
+            if stream is None:
+                if isinstance(msg, dict) and msg.get("error"):
+                    print(f"[WS] {self.name} request failed: {msg['error']}")
+                return
+
+        handler = self.handlers.get(stream)
+        if handler is None:
+            self.unrouted += 1
+            return
+        await handler(raw)
+
+    async def run(self, recorder=None):
+        # Several feeds call run(); the socket is started once and shared
+        if self._task is None:
+            self._task = asyncio.ensure_future(self.supervisor.run(recorder))
+        await asyncio.shield(self._task)
+
+    def frame_handlers(self):
+        return {self.name: self.dispatch}
+
+    def get_stats(self):
+        stats = self.supervisor.get_stats()
+        stats["streams"] = len(self.handlers)
+        stats["unrouted"] = self.unrouted
+        stats["trades_lost"] = sum(tape.missing for tape, _ in self.backfills.values())
+        return stats
+
+
+_muxes = {}
+
+def get_mux(market):
+    """
+    Shared mux for "spot" (stream.binance.com) or "perp" (fstream.binance.com).
+    """
+    if market not in _muxes:
+        host = BINANCE_SPOT_HOST if market == "spot" else BINANCE_PERP_HOST
+        _muxes[market] = BinanceStreamMux(f"binance_{market}_mux", host)
+    return _muxes[market]
@@ -1,54 +1,78 @@
 import asyncio
-import websockets
-import json
+
+from feeds.binance_mux import get_mux
+from feeds.decoders import DEFAULT_DECODER
+from feeds.rest_backfill import BINANCE_SPOT_REST, BINANCE_PERP_REST, fetch_binance_agg_trades
+from utils.trade_tape import TradeTape
 
 class BTCReferenceFeed:
-    def __init__(self):
-        self.spot_cvd = 0
-        self.perp_cvd = 0
+    def __init__(self, decoder=None, spot_mux=None, perp_mux=None):
+        self.spot_tape = TradeTape("binance_spot", "BTCUSDT")
+        self.perp_tape = TradeTape("binance_perp", "BTCUSDT")
         self.price = None
+        self.decoder = decoder or DEFAULT_DECODER
+        self.recorder = None
+        self.on_update = None  # called after each frame that carried trades
+        self.on_perp_trades = None  # called with each frame's perp trades
+
+        # Both hosts are shared with the other Binance feeds over one
+        # combined-stream socket each
+        self.spot_mux = spot_mux or get_mux("spot")
+        self.perp_mux = perp_mux or get_mux("perp")
+        self.spot_mux.register("btcusdt@aggTrade", self._handle_spot, tape=self.spot_tape, backfill=self._backfill_spot)
+        self.perp_mux.register("btcusdt@aggTrade", self._handle_perp, tape=self.perp_tape, backfill=self._backfill_perp)
 
     async def connect(self):
         await asyncio.gather(
-            self._connect_spot(),
-            self._connect_perp()
+            self.spot_mux.run(self.recorder),
+            self.perp_mux.run(self.recorder)
         )
 
-    async def _connect_spot(self):
-        uri = "wss://stream.binance.com:9443/ws/btcusdt@aggTrade"
-        async with websockets.connect(uri) as ws:
-            async for msg in ws:
-                await self._handle_spot(json.loads(msg))
-
-    async def _connect_perp(self):
-        uri = "wss://fstream.binance.com/ws/btcusdt@aggTrade"
-        async with websockets.connect(uri) as ws:
-            async for msg in ws:
-                await self._handle_perp(json.loads(msg))
-
-    async def _handle_spot(self, msg):
-        qty = float(msg["q"])
-        price = float(msg["p"])
-        is_buyer_maker = msg["m"]
-        self.price = price
-        if is_buyer_maker:
-            self.spot_cvd -= qty
-        else:
-            self.spot_cvd += qty
-
-    async def _handle_perp(self, msg):
-        qty = float(msg["q"])
-        price = float(msg["p"])
-        is_buyer_maker = msg["m"]
-        self.price = price
-        if is_buyer_maker:
-            self.perp_cvd -= qty
-        else:
-            self.perp_cvd += qty
+    async def _handle_spot(self, raw):
+        _, trades = self.decoder.binance_agg_trade(raw)
+        if trades:
+            self.spot_tape.extend_sequenced(trades)
+            self.price = self.spot_tape.last_price
+            if self.on_update:
+                self.on_update()
+
+    async def _handle_perp(self, raw):
+        _, trades = self.decoder.binance_agg_trade(raw)
+        if trades:
+            self.perp_tape.extend_sequenced(trades)
+            self.price = self.perp_tape.last_price
+            if self.on_perp_trades:
+                self.on_perp_trades(trades)
+            if self.on_update:
+                self.on_update()
+
+    async def _backfill_spot(self, last_id):
+        trades = await fetch_binance_agg_trades(BINANCE_SPOT_REST, "BTCUSDT", last_id + 1)
+        self.spot_tape.extend_sequenced(trades, live=False)
+        return len(trades)
+
+    async def _backfill_perp(self, last_id):
+        trades = await fetch_binance_agg_trades(BINANCE_PERP_REST, "BTCUSDT", last_id + 1)
+        self.perp_tape.extend_sequenced(trades, live=False)
+        return len(trades)
+
+    def frame_handlers(self):
+        return {
+            "btc_spot": self._handle_spot,
+            "btc_perp": self._handle_perp,
+            **self.spot_mux.frame_handlers(),
+            **self.perp_mux.frame_handlers()
+        }
+
+    def get_stream_stats(self):
+        return {
+            self.spot_mux.name: self.spot_mux.get_stats(),
+            self.perp_mux.name: self.perp_mux.get_stats()
+        }
 
     def get_deltas(self):
         return {
-            "btc_spot": round(self.spot_cvd, 2),
-            "btc_perp": round(self.perp_cvd, 2),
+            "btc_spot": round(self.spot_tape.cvd, 2),
+            "btc_perp": round(self.perp_tape.cvd, 2),
             "price": self.price
         }
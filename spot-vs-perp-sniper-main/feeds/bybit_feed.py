@@ -1,39 +1,46 @@
 import asyncio
-import websockets
-import json
+
+from feeds.decoders import DEFAULT_DECODER
+from feeds.endpoints import BYBIT_LINEAR_WS
+from utils.trade_tape import TradeTape
+from utils.ws_supervisor import StreamSupervisor
 
 class BybitCVDTracker:
-    def __init__(self, symbol="SOLUSDT"):
+    def __init__(self, symbol="SOLUSDT", decoder=None):
         self.symbol = symbol.upper()
-        self.cvd = 0
+        self.tape = TradeTape("bybit_perp", self.symbol)
         self.price = None
+        self.decoder = decoder or DEFAULT_DECODER
+        self.recorder = None
+        self.on_update = None  # called after each frame that carried trades
+
+        # Bybit trade ids are UUIDs, so there is no gap accounting or backfill;
+        # the supervisor only keeps the stream alive.
+        subscribe_msg = {
+            "op": "subscribe",
+            "args": [f"publicTrade.{self.symbol}"]
+        }
+        self.stream = StreamSupervisor("bybit", BYBIT_LINEAR_WS, self.handle_message, subscribe=[subscribe_msg])
 
     async def connect(self):
-        uri = "wss://stream.bybit.com/v5/public/linear"
-        async with websockets.connect(uri) as ws:
-            subscribe_msg = {
-                "op": "subscribe",
-                "args": [f"publicTrade.{self.symbol}"]
-            }
-            await ws.send(json.dumps(subscribe_msg))
-            async for message in ws:
-                await self.handle_message(json.loads(message))
-
-    async def handle_message(self, msg):
-        if "data" in msg and "topic" in msg:
-            for trade in msg["data"]:
-                side = trade.get("S")  # "Buy" or "Sell"
-                qty = float(trade.get("v", 0))
-                price = float(trade.get("p", 0))
-                self.price = price
-
-                if side == "Buy":
-                    self.cvd += qty
-                elif side == "Sell":
-                    self.cvd -= qty
+        await self.stream.run(self.recorder)
+
+    async def handle_message(self, raw):
+        _, trades = self.decoder.bybit_public_trade(raw)
+        if trades:
+            self.tape.extend(trades)
+            self.price = self.tape.last_price
+            if self.on_update:
+                self.on_update()
+
+    def frame_handlers(self):
+        return {"bybit": self.handle_message}
+
+    def get_stream_stats(self):
+        return {"bybit": self.stream.get_stats()}
 
     def get_cvd(self):
-        return round(self.cvd, 2)
+        return round(self.tape.cvd, 2)
 
     def get_price(self):
         return self.price
@@ -1,37 +1,56 @@
 import asyncio
-import websockets
-import json
+
+from feeds.decoders import DEFAULT_DECODER
+from feeds.endpoints import COINBASE_WS
+from feeds.rest_backfill import fetch_coinbase_trades
+from utils.trade_tape import TradeTape
+from utils.ws_supervisor import StreamSupervisor
 
 class CoinbaseSpotCVD:
-    def __init__(self, product_id="SOL-USD"):
+    def __init__(self, product_id="SOL-USD", decoder=None):
         self.product_id = product_id
-        self.cvd = 0
+        self.tape = TradeTape("coinbase_spot", product_id)
         self.last_price = None
+        self.decoder = decoder or DEFAULT_DECODER
+        self.recorder = None
+        self.on_update = None  # called after each frame that carried trades
 
-    async def connect(self):
-        uri = "wss://ws-feed.exchange.coinbase.com"
-        async with websockets.connect(uri) as ws:
-            await ws.send(json.dumps({
+        self.stream = StreamSupervisor(
+            "coinbase",
+            COINBASE_WS,
+            self.handle_message,
+            subscribe=[{
                 "type": "subscribe",
                 "channels": [{"name": "matches", "product_ids": [self.product_id]}]
-            }))
-            async for message in ws:
-                await self.handle_message(json.loads(message))
-
-    async def handle_message(self, msg):
-        if msg["type"] == "match":
-            side = msg["side"]
-            size = float(msg["size"])
-            price = float(msg["price"])
-            self.last_price = price
-
-            if side == "buy":
-                self.cvd += size
-            elif side == "sell":
-                self.cvd -= size
+            }],
+            tape=self.tape,
+            backfill=self._backfill
+        )
+
+    async def connect(self):
+        await self.stream.run(self.recorder)
+
+    async def handle_message(self, raw):
+        _, trades = self.decoder.coinbase_match(raw)
+        if trades:
+            self.tape.extend_sequenced(trades)
+            self.last_price = self.tape.last_price
+            if self.on_update:
+                self.on_update()
+
+    def frame_handlers(self):
+        return {"coinbase": self.handle_message}
+
+    async def _backfill(self, last_id):
+        trades = await fetch_coinbase_trades(self.product_id, last_id)
+        self.tape.extend_sequenced(trades, live=False)
+        return len(trades)
+
+    def get_stream_stats(self):
+        return {"coinbase": self.stream.get_stats()}
 
     def get_cvd(self):
-        return round(self.cvd, 2)
+        return round(self.tape.cvd, 2)
 
     def get_last_price(self):
         return self.last_price
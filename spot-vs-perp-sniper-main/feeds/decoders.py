@@ -0,0 +1,241 @@
+# feeds/decoders.py
+
+import json
+import os
+from datetime import datetime
+
+from utils.trade_tape import BUY, SELL, parse_trade_id
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Every decode method returns (instrument, trades) where trades is a list of
+# (ts, price, qty, side, trade_id) tuples ready for TradeTape.extend().
+# Frames without trades (acks, heartbeats, other channels) return NO_TRADES.
+NO_TRADES = (None, ())
+
+
+def iso_to_ts(value):
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+class JsonDecoder:
+    """
+    Dict-based decoder. Works with the stdlib json module or any drop-in
+    `loads` such as orjson.loads.
+    """
+
+    def __init__(self, loads=json.loads, name="json"):
+        self.loads = loads
+        self.name = name
+
+    def binance_agg_trade(self, raw):
+        msg = self.loads(raw)
+        # Combined streams (/stream?streams=...) wrap the payload in {"stream", "data"}
+        msg = msg.get("data", msg)
+        if msg.get("e") != "aggTrade":
+            return NO_TRADES
+        side = SELL if msg["m"] else BUY
+        return msg["s"], [(msg["T"] / 1000, float(msg["p"]), float(msg["q"]), side, msg["a"])]
+
+    def bybit_public_trade(self, raw):
+        msg = self.loads(raw)
+        data = msg.get("data")
+        if not data or "topic" not in msg:
+            return NO_TRADES
+
+        trades = []
+        for trade in data:
+            side = trade.get("S")
+            if side == "Buy":
+                side = BUY
+            elif side == "Sell":
+                side = SELL
+            else:
+                continue
+            trades.append((trade["T"] / 1000, float(trade["p"]), float(trade["v"]), side, parse_trade_id(trade.get("i"))))
+        return msg["topic"].rpartition(".")[2], trades
+
+    def okx_trades(self, raw):
+        msg = self.loads(raw)
+        data = msg.get("data")
+        if not data:
+            return NO_TRADES
+
+        trades = []
+        for trade in data:
+            side = trade.get("side")
+            if side == "buy":
+                side = BUY
+            elif side == "sell":
+                side = SELL
+            else:
+                continue
+            trades.append((int(trade["ts"]) / 1000, float(trade["px"]), float(trade["sz"]), side, parse_trade_id(trade.get("tradeId"))))
+        return msg["arg"]["instId"], trades
+
+    def coinbase_match(self, raw):
+        msg = self.loads(raw)
+        if msg.get("type") != "match":
+            return NO_TRADES
+        side = msg["side"]
+        if side == "buy":
+            side = BUY
+        elif side == "sell":
+            side = SELL
+        else:
+            return NO_TRADES
+        return msg["product_id"], [(iso_to_ts(msg["time"]), float(msg["price"]), float(msg["size"]), side, msg["trade_id"])]
+
+
+if msgspec is not None:
+
+    # Only the fields we read are declared; msgspec skips the rest without
+    # building them, which is where most of the speedup comes from.
+
+    class BinanceAggTrade(msgspec.Struct, frozen=True):
+        e: str = ""
+        s: str = ""
+        p: str = "0"
+        q: str = "0"
+        m: bool = False
+        T: int = 0
+        a: int = -1
+
+    class BinanceAggTradeFrame(BinanceAggTrade, frozen=True):
+        # Set when the frame comes from a combined stream (/stream?streams=...)
+        data: BinanceAggTrade | None = None
+
+    class BybitTrade(msgspec.Struct):
+        T: int = 0
+        S: str = ""
+        v: str = "0"
+        p: str = "0"
+        i: str = ""
+
+    class BybitTradeFrame(msgspec.Struct):
+        topic: str = ""
+        data: list[BybitTrade] = []
+
+    class OKXArg(msgspec.Struct, frozen=True):
+        instId: str = ""
+
+    class OKXTrade(msgspec.Struct):
+        ts: str = "0"
+        px: str = "0"
+        sz: str = "0"
+        side: str = ""
+        tradeId: str = ""
+
+    class OKXTradeFrame(msgspec.Struct):
+        arg: OKXArg = OKXArg()
+        data: list[OKXTrade] = []
+
+    class CoinbaseMatch(msgspec.Struct):
+        type: str = ""
+        product_id: str = ""
+        trade_id: int = -1
+        side: str = ""
+        size: str = "0"
+        price: str = "0"
+        time: str = ""
+
+    class MsgspecDecoder:
+        """
+        Typed decoder built on msgspec structs.
+        """
+
+        name = "msgspec"
+
+        def __init__(self):
+            self._binance = msgspec.json.Decoder(BinanceAggTradeFrame)
+            self._bybit = msgspec.json.Decoder(BybitTradeFrame)
+            self._okx = msgspec.json.Decoder(OKXTradeFrame)
+            self._coinbase = msgspec.json.Decoder(CoinbaseMatch)
+
+        def binance_agg_trade(self, raw):
+            msg = self._binance.decode(raw)
+            if msg.data is not None:
+                msg = msg.data
+            if msg.e != "aggTrade":
+                return NO_TRADES
+            return msg.s, [(msg.T / 1000, float(msg.p), float(msg.q), SELL if msg.m else BUY, msg.a)]
+
+        def bybit_public_trade(self, raw):
+            msg = self._bybit.decode(raw)
+            if not msg.data or not msg.topic:
+                return NO_TRADES
+
+            trades = []
+            for trade in msg.data:
+                if trade.S == "Buy":
+                    side = BUY
+                elif trade.S == "Sell":
+                    side = SELL
+                else:
+                    continue
+                trades.append((trade.T / 1000, float(trade.p), float(trade.v), side, parse_trade_id(trade.i)))
+            return msg.topic.rpartition(".")[2], trades
+
+        def okx_trades(self, raw):
+            msg = self._okx.decode(raw)
+            if not msg.data:
+                return NO_TRADES
+
+            trades = []
+            for trade in msg.data:
+                if trade.side == "buy":
+                    side = BUY
+                elif trade.side == "sell":
+                    side = SELL
+                else:
+                    continue
+                trades.append((int(trade.ts) / 1000, float(trade.px), float(trade.sz), side, parse_trade_id(trade.tradeId)))
+            return msg.arg.instId, trades
+
+        def coinbase_match(self, raw):
+            msg = self._coinbase.decode(raw)
+            if msg.type != "match":
+                return NO_TRADES
+            if msg.side == "buy":
+                side = BUY
+            elif msg.side == "sell":
+                side = SELL
+            else:
+                return NO_TRADES
+            return msg.product_id, [(iso_to_ts(msg.time), float(msg.price), float(msg.size), side, msg.trade_id)]
+
+
+def available_decoders():
+    names = ["json"]
+    if orjson is not None:
+        names.append("orjson")
+    if msgspec is not None:
+        names.append("msgspec")
+    return names
+
+
+def get_decoder(name=None):
+    """
+    Returns a decoder backend by name ("msgspec", "orjson", "json").
+    Defaults to FEED_DECODER from the environment, else the fastest installed.
+    """
+    name = name or os.getenv("FEED_DECODER") or available_decoders()[-1]
+
+    if name == "msgspec" and msgspec is not None:
+        return MsgspecDecoder()
+    if name == "orjson" and orjson is not None:
+        return JsonDecoder(orjson.loads, name="orjson")
+    if name != "json":
+        print(f"⚠️ Decoder '{name}' not available, falling back to stdlib json.")
+    return JsonDecoder()
+
+
+DEFAULT_DECODER = get_decoder()
@@ -1,27 +1,99 @@
-import collections
+import math
 import time
 
+from utils.multi_tf_memory import parse_timeframe
+from utils.rolling_window import BucketedWindow
+
+DEFAULT_WINDOWS = ("5s", "30s", "2m")
+BUCKETS_PER_WINDOW = 20
+
+
 class DeltaSpikeTracker:
-    def __init__(self, max_window_seconds=30):
-        self.recent_deltas = collections.deque(maxlen=100)
+    """
+    Rolling net taker delta over several concurrent windows with an adaptive
+    spike threshold.
+
+    Each window is a time-bucketed rolling sum, so feeding every trade from
+    the tape and querying are both O(1). A window spikes when its net delta
+    sits more than `z_threshold` standard deviations from its own rolling
+    baseline; until `warmup_samples` baseline samples exist the old fixed
+    `spike_threshold` is used instead.
+
+    Feed it per trade with add() / add_trades(), or per evaluation with
+    add_tick(cumulative_cvd), which converts the cumulative value to the
+    delta since the previous tick. Trades are bucketed by `clock()` at
+    arrival, the same time base check_spike() expires windows with, so
+    exchange clock skew cannot misplace them.
+    """
+
+    def __init__(self, max_window_seconds=30, clock=time.time, windows=DEFAULT_WINDOWS,
+                 buckets=BUCKETS_PER_WINDOW, z_threshold=3.0, half_life=1800.0, warmup_samples=60,
+                 spike_threshold=1000):
+        self.clock = clock
+        self.windows = [BucketedWindow(w, parse_timeframe(w), buckets, half_life) for w in windows]
+        # "spike"/"net_delta"/"count" in check_spike() come from this window
+        self.primary = min(self.windows, key=lambda w: abs(w.seconds - max_window_seconds))
+        self.time_window = self.primary.seconds
+        self.z_threshold = z_threshold
+        self.warmup_samples = warmup_samples
+        self.spike_threshold = spike_threshold  # fallback until the baseline is warm
         self.last_spike_time = 0
-        self.spike_threshold = 1000  # Adjust based on volatility
-        self.time_window = max_window_seconds
+        self.last_cvd = None
 
-    def add_tick(self, delta_value):
-        timestamp = time.time()
-        self.recent_deltas.append((timestamp, delta_value))
+    def add(self, ts, delta):
+        for w in self.windows:
+            w.add(ts, delta)
+
+    def add_trades(self, trades):
+        # trades: (ts, price, qty, side, trade_id) tuples as produced by feeds.decoders;
+        # stamped with the local arrival time rather than the exchange ts
+        windows = self.windows
+        now = self.clock()
+        for _, _, qty, side, _ in trades:
+            delta = qty if side > 0 else -qty
+            for w in windows:
+                w.add(now, delta)
+
+    def add_tick(self, cvd_value):
+        # Cumulative CVD in, per-interval delta recorded
+        if self.last_cvd is not None:
+            self.add(self.clock(), cvd_value - self.last_cvd)
+        self.last_cvd = cvd_value
+
+    def _window_state(self, w):
+        if w.samples >= self.warmup_samples:
+            z = w.zscore()
+            spike = abs(z) > self.z_threshold
+            threshold = w.mean + math.copysign(self.z_threshold * w.std(), w.total - w.mean)
+        else:
+            z = None
+            spike = abs(w.total) > self.spike_threshold
+            threshold = self.spike_threshold
+        return {
+            "net_delta": w.total,
+            "count": w.count,
+            "z": z,
+            "threshold": threshold,
+            "spike": spike
+        }
 
     def check_spike(self):
-        now = time.time()
-        recent = [v for t, v in self.recent_deltas if now - t < self.time_window]
-        net = sum(recent)
-        is_spike = abs(net) > self.spike_threshold
-        if is_spike:
+        now = self.clock()
+        windows = {}
+        spike = False
+        for w in self.windows:
+            w.expire(now)
+            state = self._window_state(w)
+            windows[w.label] = state
+            spike = spike or state["spike"]
+
+        if spike:
             self.last_spike_time = now
+        primary = windows[self.primary.label]
         return {
-            "spike": is_spike,
-            "net_delta": net,
-            "count": len(recent),
-            "since_last": now - self.last_spike_time
+            "spike": spike,
+            "net_delta": primary["net_delta"],
+            "count": primary["count"],
+            "since_last": now - self.last_spike_time,
+            "windows": windows
         }
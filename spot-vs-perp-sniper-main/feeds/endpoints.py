@@ -0,0 +1,47 @@
+# feeds/endpoints.py
+#
+# Exchange endpoints used by the feeds. Each one can be overridden from the
+# environment (BINANCE_SPOT_WS_URL, BYBIT_WS_URL, ...), and
+# EXCHANGE_SIMULATOR=host:port points every venue at a running
+# exchange_simulator.py instead, which serves each venue under its own path
+# prefix:
+#
+#   python exchange_simulator.py --port 9400 &
+#   EXCHANGE_SIMULATOR=127.0.0.1:9400 python spot_vs_perp_engine.py
+#
+# Binance values are hosts: the feeds append /stream, /ws/<stream> or the
+# REST path themselves.
+
+import os
+
+EXCHANGE_SIMULATOR = os.getenv("EXCHANGE_SIMULATOR", "").strip().rstrip("/")
+
+# Path prefix of each venue on exchange_simulator.py
+SIMULATOR_PATHS = {
+    "binance_spot": "/binance_spot",
+    "binance_perp": "/binance_perp",
+    "bybit": "/bybit/v5/public/linear",
+    "okx": "/okx/ws/v5/public",
+    "coinbase": "/coinbase"
+}
+
+
+def _endpoint(env, default, scheme, venue):
+    override = os.getenv(env, "").strip()
+    if override:
+        return override.rstrip("/")
+    if EXCHANGE_SIMULATOR:
+        return f"{scheme}://{EXCHANGE_SIMULATOR}{SIMULATOR_PATHS[venue]}"
+    return default
+
+
+BINANCE_SPOT_WS = _endpoint("BINANCE_SPOT_WS_URL", "wss://stream.binance.com:9443", "ws", "binance_spot")
+BINANCE_PERP_WS = _endpoint("BINANCE_PERP_WS_URL", "wss://fstream.binance.com", "ws", "binance_perp")
+BYBIT_LINEAR_WS = _endpoint("BYBIT_WS_URL", "wss://stream.bybit.com/v5/public/linear", "ws", "bybit")
+OKX_PUBLIC_WS = _endpoint("OKX_WS_URL", "wss://ws.okx.com:8443/ws/v5/public", "ws", "okx")
+COINBASE_WS = _endpoint("COINBASE_WS_URL", "wss://ws-feed.exchange.coinbase.com", "ws", "coinbase")
+
+# REST used to backfill trades missed while a socket was down
+BINANCE_SPOT_REST_HOST = _endpoint("BINANCE_SPOT_REST_URL", "https://api.binance.com", "http", "binance_spot")
+BINANCE_PERP_REST_HOST = _endpoint("BINANCE_PERP_REST_URL", "https://fapi.binance.com", "http", "binance_perp")
+COINBASE_REST_HOST = _endpoint("COINBASE_REST_URL", "https://api.exchange.coinbase.com", "http", "coinbase")
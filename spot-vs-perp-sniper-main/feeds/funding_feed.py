@@ -1,38 +1,214 @@
-import requests
 import asyncio
+import json
+
+from feeds.binance_mux import get_mux
+from feeds.endpoints import BYBIT_LINEAR_WS
+from utils.ws_supervisor import StreamSupervisor
 
 class FundingRateTracker:
-    def __init__(self):
+    """
+    Streams funding from Binance `markPrice@1s` and Bybit v5 `tickers`.
+
+    Each venue keeps the live (predicted) funding rate for the next
+    settlement, the last settled rate, mark/index price and next funding
+    time in memory, so reads never touch the network. Rates are in %.
+    """
+
+    def __init__(self, symbol="SOLUSDT", perp_mux=None, streaming=True):
+        # streaming=False builds a tracker that is fed through apply_binance()
+        # / apply_bybit() by its owner (MultiFundingTracker) and opens nothing
+        self.symbol = symbol.upper()
         self.bybit_funding = 0.0
         self.binance_funding = 0.0
+        self.venues = {
+            "binance": self._empty_state(),
+            "bybit": self._empty_state()
+        }
+        self.recorder = None
+        self.on_update = None
 
-    async def update(self):
+        if not streaming:
+            return
+
+        # Rides the shared fstream combined-stream socket
+        self.perp_mux = perp_mux or get_mux("perp")
+        self.perp_mux.register(f"{self.symbol.lower()}@markPrice@1s", self.handle_binance)
+        self.bybit_stream = StreamSupervisor(
+            "funding_bybit",
+            BYBIT_LINEAR_WS,
+            self.handle_bybit,
+            subscribe=[{
+                "op": "subscribe",
+                "args": [f"tickers.{self.symbol}"]
+            }]
+        )
+
+    @staticmethod
+    def _empty_state():
+        return {
+            "funding": 0.0,
+            "settled": None,
+            "mark_price": None,
+            "index_price": None,
+            "next_funding_time": None,
+            "updated": 0
+        }
+
+    async def connect(self):
         await asyncio.gather(
-            self.fetch_bybit(),
-            self.fetch_binance()
+            self.perp_mux.run(self.recorder),
+            self.bybit_stream.run(self.recorder)
+        )
+
+    async def handle_binance(self, raw):
+        msg = json.loads(raw)
+        self.apply_binance(msg.get("data", msg))
+
+    async def handle_bybit(self, raw):
+        self.apply_bybit(json.loads(raw))
+
+    def apply_binance(self, msg):
+        if msg.get("e") != "markPriceUpdate":
+            return
+        self._apply("binance", msg.get("r"), msg.get("p"), msg.get("i"), msg.get("T"), msg.get("E"))
+
+    def apply_bybit(self, msg):
+        data = msg.get("data")
+        if not data or not msg.get("topic", "").startswith("tickers."):
+            return
+        # Bybit sends a snapshot first, then deltas holding only changed fields
+        self._apply(
+            "bybit",
+            data.get("fundingRate"),
+            data.get("markPrice"),
+            data.get("indexPrice"),
+            data.get("nextFundingTime"),
+            msg.get("ts")
         )
 
-    async def fetch_bybit(self):
-        try:
-            url = "https://api.bybit.com/v2/public/funding/prev-funding-rate?symbol=SOLUSDT"
-            res = requests.get(url, timeout=5)
-            data = res.json()
-            if "result" in data:
-                self.bybit_funding = float(data["result"]["funding_rate"]) * 100  # convert to %
-        except Exception as e:
-            print(f"[Bybit Funding Error] {e}")
-
-    async def fetch_binance(self):
-        try:
-            url = "https://fapi.binance.com/fapi/v1/fundingRate?symbol=SOLUSDT&limit=1"
-            res = requests.get(url, timeout=5)
-            data = res.json()
-            if isinstance(data, list) and len(data) > 0:
-                self.binance_funding = float(data[0]["fundingRate"]) * 100
-        except Exception as e:
-            print(f"[Binance Funding Error] {e}")
+    def _apply(self, venue, rate, mark, index, next_funding_time, event_ms):
+        state = self.venues[venue]
+
+        if next_funding_time:
+            next_funding_time = int(next_funding_time) / 1000
+            # The predicted rate becomes the settled one when the funding clock rolls over
+            if state["next_funding_time"] and next_funding_time > state["next_funding_time"]:
+                state["settled"] = state["funding"]
+            state["next_funding_time"] = next_funding_time
+
+        if rate not in (None, ""):
+            state["funding"] = float(rate) * 100  # convert to %
+        if mark not in (None, ""):
+            state["mark_price"] = float(mark)
+        if index not in (None, ""):
+            state["index_price"] = float(index)
+        if event_ms:
+            state["updated"] = int(event_ms) / 1000
+
+        self.binance_funding = self.venues["binance"]["funding"]
+        self.bybit_funding = self.venues["bybit"]["funding"]
+
+        if self.on_update:
+            self.on_update()
+
+    async def update(self):
+        # Kept for callers written against the old REST poller; the streams
+        # keep everything current so there is nothing to fetch.
+        return
+
+    def frame_handlers(self):
+        return {
+            "funding_binance": self.handle_binance,
+            "funding_bybit": self.handle_bybit,
+            **self.perp_mux.frame_handlers()
+        }
+
+    def get_stream_stats(self):
+        return {
+            self.perp_mux.name: self.perp_mux.get_stats(),
+            "funding_bybit": self.bybit_stream.get_stats()
+        }
 
     def get_average(self):
         rates = [self.bybit_funding, self.binance_funding]
         valid = [r for r in rates if r != 0]
         return round(sum(valid) / len(valid), 4) if valid else 0.0
+
+    def get_snapshot(self):
+        return {
+            "average": self.get_average(),
+            "binance": dict(self.venues["binance"]),
+            "bybit": dict(self.venues["bybit"])
+        }
+
+
+class MultiFundingTracker:
+    """
+    Funding for many symbols over two shared sockets: Binance's all-market
+    `!markPrice@arr@1s` stream on the process's fstream mux and one Bybit
+    connection subscribed to every symbol's `tickers` topic. Per-symbol
+    state lives in a FundingRateTracker that is fed frames here instead of
+    opening its own connections.
+    """
+
+    def __init__(self, symbols, bybit_args_per_request=10, perp_mux=None):
+        self.trackers = {s.upper(): FundingRateTracker(s, streaming=False) for s in symbols}
+        self.recorder = None
+        self.on_update = None
+
+        topics = [f"tickers.{s}" for s in self.trackers]
+        # Rides the shared fstream combined-stream socket with the trade feeds
+        self.perp_mux = perp_mux or get_mux("perp")
+        self.perp_mux.register("!markPrice@arr@1s", self.handle_binance)
+        self.bybit_stream = StreamSupervisor(
+            "funding_bybit_multi",
+            BYBIT_LINEAR_WS,
+            self.handle_bybit,
+            subscribe=[
+                {"op": "subscribe", "args": topics[i:i + bybit_args_per_request]}
+                for i in range(0, len(topics), bybit_args_per_request)
+            ]
+        )
+
+    async def connect(self):
+        await asyncio.gather(
+            self.perp_mux.run(self.recorder),
+            self.bybit_stream.run(self.recorder)
+        )
+
+    async def handle_binance(self, raw):
+        # Combined-stream frames wrap the array in "data"; recordings from
+        # the old single-stream socket carry it bare
+        msg = json.loads(raw)
+        if isinstance(msg, dict):
+            msg = msg.get("data")
+        if not isinstance(msg, list):
+            return
+        trackers = self.trackers
+        for item in msg:
+            tracker = trackers.get(item.get("s"))
+            if tracker is not None:
+                tracker.apply_binance(item)
+
+    async def handle_bybit(self, raw):
+        msg = json.loads(raw)
+        tracker = self.trackers.get(msg.get("topic", "").rpartition(".")[2])
+        if tracker is not None:
+            tracker.apply_bybit(msg)
+
+    def frame_handlers(self):
+        return {
+            "funding_binance_all": self.handle_binance,
+            "funding_bybit_multi": self.handle_bybit,
+            **self.perp_mux.frame_handlers()
+        }
+
+    def get_stream_stats(self):
+        return {
+            self.perp_mux.name: self.perp_mux.get_stats(),
+            "funding_bybit_multi": self.bybit_stream.get_stats()
+        }
+
+    def get_average(self, symbol):
+        tracker = self.trackers.get(symbol.upper())
+        return tracker.get_average() if tracker else 0.0
@@ -1,59 +1,124 @@
+import asyncio
+import json
 import time
-import requests
 
-class LiquidationFeed:
-    def __init__(self, symbol="SOLUSDT"):
-        self.symbol = symbol
-        self.last_check = 0
-        self.refresh_interval = 15  # seconds
-        self.last_liqs = {'longs': 0, 'shorts': 0}
-        self.spike_threshold = 1.5  # 150% increase = spike
-
-    def fetch_bybit_liquidations(self):
-        try:
-            url = f"https://api.bybit.com/v5/market/liquidation?category=linear&symbol={self.symbol}&limit=50"
-            response = requests.get(url, timeout=5)
-            data = response.json()
-
-            liq_list = data.get("result", {}).get("list", [])
-            print(f"[LIQ DEBUG] Raw liq list (last 50): {liq_list}")
-
-            longs = 0
-            shorts = 0
-
-            for liq in liq_list:
-                side = liq.get("side")
-                qty = float(liq.get("qty", 0))
-                if side == "Buy":
-                    shorts += qty  # shorts liquidated
-                elif side == "Sell":
-                    longs += qty  # longs liquidated
-
-            return longs, shorts
-
-        except Exception as e:
-            print(f"[LIQ ERROR] Failed to fetch liquidations: {e}")
-            return 0, 0
+from feeds.binance_mux import get_mux
+from feeds.endpoints import BYBIT_LINEAR_WS
+from utils.multi_tf_memory import parse_timeframe
+from utils.rolling_window import BucketedWindow
+from utils.ws_supervisor import StreamSupervisor
 
-    def get_liquidation_snapshot(self):
-        now = time.time()
-        if now - self.last_check < self.refresh_interval:
-            return self._format_liq_data(**self.last_liqs)
+DEFAULT_WINDOWS = ("1m", "5m", "15m")
 
-        longs, shorts = self.fetch_bybit_liquidations()
-        self.last_check = now
 
-        previous_total = self.last_liqs['longs'] + self.last_liqs['shorts']
-        current_total = longs + shorts
+class LiquidationFeed:
+    """
+    Streams liquidations from Bybit `allLiquidation` and Binance `forceOrder`
+    into rolling long/short notional over several windows.
+
+    Every liquidation is added to time-bucketed rolling sums as it arrives,
+    so get_liquidation_snapshot() only reads running totals. A window spikes
+    when its total notional is more than `spike_threshold` times its rolling
+    baseline (the exponentially weighted mean of that window's total) and
+    above `min_notional`. Values are quote-currency notional (USDT).
+    """
+
+    def __init__(self, symbol="SOLUSDT", windows=DEFAULT_WINDOWS, clock=time.time, spike_threshold=1.5,
+                 min_notional=50_000, half_life=3600.0, warmup_samples=20, buckets=20, perp_mux=None):
+        self.symbol = symbol.upper()
+        self.clock = clock
+        self.spike_threshold = spike_threshold  # 150% of baseline = spike
+        self.min_notional = min_notional
+        self.warmup_samples = warmup_samples
+
+        # Per window: (longs liquidated, shorts liquidated, both)
+        self.windows = {
+            w: tuple(BucketedWindow(w, parse_timeframe(w), buckets, half_life) for _ in range(3))
+            for w in windows
+        }
+        self.primary = "5m" if "5m" in self.windows else windows[0]
+        self.venues = {"bybit": 0, "binance": 0}
+        self.last_liquidation = None
+        self.recorder = None
+        self.on_update = None
+
+        self.perp_mux = perp_mux or get_mux("perp")
+        self.perp_mux.register(f"{self.symbol.lower()}@forceOrder", self.handle_binance)
+        self.bybit_stream = StreamSupervisor(
+            "liq_bybit",
+            BYBIT_LINEAR_WS,
+            self.handle_bybit,
+            subscribe=[{"op": "subscribe", "args": [f"allLiquidation.{self.symbol}"]}]
+        )
+
+    async def connect(self):
+        await asyncio.gather(
+            self.perp_mux.run(self.recorder),
+            self.bybit_stream.run(self.recorder)
+        )
+
+    async def handle_bybit(self, raw):
+        msg = json.loads(raw)
+        if not msg.get("topic", "").startswith("allLiquidation."):
+            return
+        for liq in msg.get("data") or ():
+            # S is the side of the liquidated position: Buy = a long was liquidated
+            self.add("bybit", liq["T"] / 1000, liq["S"] == "Buy", float(liq["v"]) * float(liq["p"]))
+
+    async def handle_binance(self, raw):
+        msg = json.loads(raw)
+        msg = msg.get("data", msg)
+        if msg.get("e") != "forceOrder":
+            return
+        order = msg["o"]
+        # The liquidation order closes the position: a SELL order means a long was liquidated
+        price = float(order.get("ap") or order["p"])
+        qty = float(order.get("z") or order["q"])
+        self.add("binance", order["T"] / 1000, order["S"] == "SELL", qty * price)
+
+    def add(self, venue, ts, is_long, notional):
+        for longs, shorts, both in self.windows.values():
+            (longs if is_long else shorts).add(ts, notional)
+            both.add(ts, notional)
+        self.venues[venue] += 1
+        self.last_liquidation = {"venue": venue, "ts": ts, "side": "long" if is_long else "short", "notional": notional}
+        if self.on_update:
+            self.on_update()
+
+    def frame_handlers(self):
+        return {
+            "liq_bybit": self.handle_bybit,
+            **self.perp_mux.frame_handlers()
+        }
 
-        spike = False
-        if previous_total > 0 and current_total > previous_total * self.spike_threshold:
-            spike = True
+    def get_stream_stats(self):
+        return {
+            self.perp_mux.name: self.perp_mux.get_stats(),
+            "liq_bybit": self.bybit_stream.get_stats()
+        }
 
-        # Save current values for next comparison
-        self.last_liqs = {'longs': longs, 'shorts': shorts}
+    def _window_snapshot(self, now, longs, shorts, both):
+        for w in (longs, shorts, both):
+            w.expire(now)
+        baseline = both.mean if both.samples >= self.warmup_samples else None
+        spike = (
+            baseline is not None
+            and both.total >= self.min_notional
+            and both.total > baseline * self.spike_threshold
+        )
+        data = self._format_liq_data(longs.total, shorts.total, spike)
+        data["count"] = both.count
+        data["baseline"] = round(baseline, 2) if baseline is not None else None
+        return data
 
-        return self._format_liq_data(longs, shorts, spike)
+    def get_liquidation_snapshot(self):
+        now = self.clock()
+        windows = {label: self._window_snapshot(now, *rings) for label, rings in self.windows.items()}
+        snapshot = dict(windows[self.primary])
+        snapshot["spike"] = any(w["spike"] for w in windows.values())
+        snapshot["windows"] = windows
+        snapshot["last"] = self.last_liquidation
+        return snapshot
 
     def _format_liq_data(self, longs=0, shorts=0, spike=False):
         dominant = "longs" if longs > shorts else "shorts"
@@ -71,3 +136,17 @@ class LiquidationFeed:
             "bias": bias,
             "spike": spike
         }
+
+
+if __name__ == "__main__":
+    feed = LiquidationFeed(symbol="SOLUSDT")
+
+    async def report():
+        while True:
+            await asyncio.sleep(15)
+            print(f"[LIQ] {feed.get_liquidation_snapshot()}")
+
+    async def run():
+        await asyncio.gather(feed.connect(), report())
+
+    asyncio.run(run())
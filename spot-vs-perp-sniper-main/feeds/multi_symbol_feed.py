@@ -0,0 +1,261 @@
+import asyncio
+import json
+import re
+
+from feeds.binance_mux import BinanceStreamMux, get_mux
+from feeds.decoders import DEFAULT_DECODER
+from feeds.endpoints import BYBIT_LINEAR_WS, OKX_PUBLIC_WS, COINBASE_WS
+from utils import metrics
+from utils.trade_tape import TradeTape
+from utils.ws_supervisor import StreamSupervisor
+
+SUBSCRIBE_ERRORS = metrics.counter("feed_subscribe_errors_total", "Subscription error replies from a venue", ["stream"])
+
+# Multi-symbol tapes only back CVD and gap accounting, so they stay small
+MULTI_TAPE_CAPACITY = 1024
+
+BYBIT_ARGS_PER_REQUEST = 10
+OKX_ARGS_PER_REQUEST = 100
+
+
+def venue_instruments(base):
+    """
+    Instrument names for one base asset on every venue the engine watches.
+    """
+    base = base.upper()
+    return {
+        "coinbase": f"{base}-USD",
+        "binance_spot": f"{base}USDT",
+        "binance_perp": f"{base}USDT",
+        "bybit": f"{base}USDT",
+        "okx": f"{base}-USDT-SWAP"
+    }
+
+
+def _chunks(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def _coinbase_error(msg):
+    if msg.get("type") == "error":
+        return f"{msg.get('message')}: {msg.get('reason')}"
+
+
+def _bybit_error(msg):
+    # Re-subscribing a live topic is reported as a failure too; it is harmless
+    if msg.get("success") is False and "already subscribed" not in str(msg.get("ret_msg")):
+        return str(msg.get("ret_msg"))
+
+
+def _okx_error(msg):
+    if msg.get("event") == "error":
+        return f"{msg.get('code')}: {msg.get('msg')}"
+
+
+class MultiSymbolTradeFeed:
+    """
+    One venue's trade stream for many instruments over shared connections.
+
+    Frames are decoded once and routed to the instrument's tape by the
+    instrument name the decoder returns. `connections` is a list of
+    (uri, instruments); each runs under its own StreamSupervisor, subscribing
+    with `subscribe(instruments)`. Error replies to those requests
+    (`subscribe_error(msg)` returns their text) are logged and counted, and
+    any instrument they name is dropped and the rest re-subscribed, so one
+    delisted symbol cannot silently cost the venue its other symbols. With
+    `mux` (Binance) the instruments are registered as streams on the shared
+    BinanceStreamMux instead and no socket of its own is opened. Sequenced venues (contiguous trade ids) count gaps per tape; there
+    is no REST backfill here since one reconnect would mean one request per
+    symbol.
+    """
+
+    def __init__(self, name, decode, instruments, connections, sequenced=False, capacity=MULTI_TAPE_CAPACITY,
+                 mux=None, tapes=None, subscribe=None, subscribe_error=None):
+        self.name = name
+        self.decode = decode
+        # `tapes` lets instruments share a tape another feed already owns
+        tapes = tapes or {}
+        self.tapes = {inst: tapes[inst] if inst in tapes else TradeTape(name, inst, capacity) for inst in instruments}
+        self.sequenced = sequenced
+        self.recorder = None
+        self.on_update = None  # called with the instrument after each frame that carried trades
+        self.on_trades = None  # called with (instrument, trades) for each frame that carried trades
+        self.mux = mux
+        self.subscribe = subscribe
+        self.subscribe_error = subscribe_error
+        self.rejected = set()
+        self.subscribe_errors = 0
+
+        self.streams = []
+        self.stream_instruments = {}
+        for i, (uri, covered) in enumerate(connections):
+            stream_name = name if len(connections) == 1 else f"{name}_{i}"
+            stream = StreamSupervisor(
+                stream_name, uri,
+                lambda raw, stream_name=stream_name: self.handle_message(raw, stream_name),
+                subscribe=lambda stream_name=stream_name: self._payloads(stream_name)
+            )
+            self.streams.append(stream)
+            self.stream_instruments[stream.name] = covered
+
+    async def connect(self):
+        runs = [stream.run(self.recorder) for stream in self.streams]
+        if self.mux is not None:
+            runs.append(self.mux.run(self.recorder))
+        await asyncio.gather(*runs)
+
+    def _payloads(self, stream_name):
+        if self.subscribe is None:
+            return []
+        return self.subscribe([inst for inst in self.stream_instruments[stream_name] if inst not in self.rejected])
+
+    async def handle_message(self, raw, stream_name=None):
+        instrument, trades = self.decode(raw)
+        if not trades:
+            if self.subscribe_error is not None and instrument is None:
+                await self._check_subscribe_error(raw, stream_name)
+            return
+        tape = self.tapes.get(instrument)
+        if tape is None:
+            return
+        if self.sequenced:
+            tape.extend_sequenced(trades)
+        else:
+            tape.extend(trades)
+        if self.on_trades:
+            self.on_trades(instrument, trades)
+        if self.on_update:
+            self.on_update(instrument)
+
+    async def _check_subscribe_error(self, raw, stream_name):
+        try:
+            msg = json.loads(raw)
+        except ValueError:
+            return
+        error = self.subscribe_error(msg) if isinstance(msg, dict) else None
+        if error is None:
+            return
+
+        self.subscribe_errors += 1
+        SUBSCRIBE_ERRORS.labels(stream_name or self.name).inc()
+        print(f"[WS] {stream_name or self.name} subscription error: {error}")
+
+        # Venues name the offending instrument in the error text
+        names = set(re.findall(r"[A-Z0-9][A-Z0-9-]*", error))
+        rejected = [inst for inst in self.tapes if inst in names and inst not in self.rejected]
+        if not rejected:
+            return
+        self.rejected.update(rejected)
+        print(f"[WS] {self.name} dropping rejected symbols: {', '.join(rejected)}")
+
+        # A batch request may have failed as a whole; replay what is left
+        for stream in self.streams:
+            if stream_name in (None, stream.name) and set(rejected) & set(self.stream_instruments[stream.name]):
+                for payload in self._payloads(stream.name):
+                    await stream.send(payload)
+
+    def frame_handlers(self):
+        handlers = {
+            stream.name: lambda raw, stream_name=stream.name: self.handle_message(raw, stream_name)
+            for stream in self.streams
+        }
+        if self.mux is not None:
+            # Recordings made before the mux keyed these frames by feed name
+            handlers[self.name] = self.handle_message
+            handlers.update(self.mux.frame_handlers())
+        return handlers
+
+    def get_stream_stats(self):
+        stats = {}
+        if self.mux is not None:
+            stats[self.mux.name] = self.mux.get_stats()
+            stats[self.name] = {"streams": len(self.tapes), "trades_lost": sum(t.missing for t in self.tapes.values())}
+        for stream in self.streams:
+            stats[stream.name] = stream.get_stats()
+            stats[stream.name]["subscribe_errors"] = self.subscribe_errors
+            stats[stream.name]["rejected"] = sorted(self.rejected & set(self.stream_instruments[stream.name]))
+            if self.sequenced:
+                stats[stream.name]["trades_lost"] = sum(self.tapes[inst].missing for inst in self.stream_instruments[stream.name])
+        return stats
+
+
+def binance_trade_feed(symbols, market="spot", decoder=None, uri=None, mux=None, tapes=None):
+    # Rides the process-wide combined-stream mux for the host, the same socket
+    # BinanceCVDTracker, BTCReferenceFeed and funding use; `uri` gets a mux of
+    # its own for that host (e.g. a local fake exchange). Instruments whose
+    # tape is passed in `tapes` are already streamed by the tape's owner.
+    decoder = decoder or DEFAULT_DECODER
+    if mux is None:
+        mux = BinanceStreamMux(f"binance_{market}_mux", uri) if uri else get_mux(market)
+    instruments = [s.upper() for s in symbols]
+    feed = MultiSymbolTradeFeed(f"binance_{market}", decoder.binance_agg_trade, instruments, [], sequenced=True,
+                                mux=mux, tapes=tapes)
+    for inst in instruments:
+        if inst not in (tapes or {}):
+            mux.register(f"{inst.lower()}@aggTrade", feed.handle_message)
+    return feed
+
+
+def bybit_trade_feed(symbols, decoder=None, uri=None):
+    decoder = decoder or DEFAULT_DECODER
+    instruments = [s.upper() for s in symbols]
+
+    def subscribe(covered):
+        topics = [f"publicTrade.{inst}" for inst in covered]
+        return [{"op": "subscribe", "args": chunk} for chunk in _chunks(topics, BYBIT_ARGS_PER_REQUEST)]
+
+    connections = [(uri or BYBIT_LINEAR_WS, instruments)]
+    return MultiSymbolTradeFeed("bybit", decoder.bybit_public_trade, instruments, connections,
+                                subscribe=subscribe, subscribe_error=_bybit_error)
+
+
+def okx_trade_feed(inst_ids, decoder=None, uri=None):
+    decoder = decoder or DEFAULT_DECODER
+
+    def subscribe(covered):
+        args = [{"channel": "trades", "instId": inst} for inst in covered]
+        return [{"op": "subscribe", "args": chunk} for chunk in _chunks(args, OKX_ARGS_PER_REQUEST)]
+
+    connections = [(uri or OKX_PUBLIC_WS, inst_ids)]
+    return MultiSymbolTradeFeed("okx", decoder.okx_trades, inst_ids, connections,
+                                subscribe=subscribe, subscribe_error=_okx_error)
+
+
+def coinbase_trade_feed(product_ids, decoder=None, uri=None):
+    decoder = decoder or DEFAULT_DECODER
+
+    def subscribe(covered):
+        # Coinbase rejects a whole subscribe message over one unknown
+        # product, so each product goes in its own
+        return [{"type": "subscribe", "channels": [{"name": "matches", "product_ids": [product_id]}]}
+                for product_id in covered]
+
+    connections = [(uri or COINBASE_WS, product_ids)]
+    return MultiSymbolTradeFeed("coinbase", decoder.coinbase_match, product_ids, connections, sequenced=True,
+                                subscribe=subscribe, subscribe_error=_coinbase_error)
+
+
+def build_trade_feeds(bases, uris=None, decoder=None, binance_tapes=None):
+    """
+    One shared trade feed per venue for a list of base assets, keyed by
+    venue. `uris` overrides the venue endpoints from feeds.endpoints per
+    engine, e.g. to point at a local fake exchange. `binance_tapes`
+    ({"spot": {instrument: tape}, "perp": ...}) reuses tapes another feed
+    in the process already streams, such as BTCReferenceFeed's.
+    """
+    uris = uris or {}
+    binance_tapes = binance_tapes or {}
+    instruments = [venue_instruments(b) for b in bases]
+
+    def names(venue):
+        return [i[venue] for i in instruments]
+
+    return {
+        "coinbase": coinbase_trade_feed(names("coinbase"), decoder, uris.get("coinbase")),
+        "binance_spot": binance_trade_feed(names("binance_spot"), "spot", decoder, uris.get("binance_spot"),
+                                           tapes=binance_tapes.get("spot")),
+        "binance_perp": binance_trade_feed(names("binance_perp"), "perp", decoder, uris.get("binance_perp"),
+                                           tapes=binance_tapes.get("perp")),
+        "bybit": bybit_trade_feed(names("bybit"), decoder, uris.get("bybit")),
+        "okx": okx_trade_feed(names("okx"), decoder, uris.get("okx"))
+    }
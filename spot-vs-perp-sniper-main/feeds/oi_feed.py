@@ -1,64 +1,97 @@
-import time
-import requests
+import asyncio
 
-class OIFeed:
-    def __init__(self, symbol="SOLUSDT"):
-        self.symbol = symbol
-        self.last_oi = None
-        self.last_check = 0
-        self.refresh_interval = 15  # seconds
-        self.spike_threshold_pct = 1.0  # spike if OI changes > 1%
+from utils.rest_poller import get_poller
 
-    def fetch_oi_from_bybit(self):
-        try:
-            # ✅ FIXED: Use interval=15min (not just 15)
-            url = f"https://api.bybit.com/v5/market/open-interest?category=linear&symbol={self.symbol}&interval=15min"
-            response = requests.get(url, timeout=5)
-            data = response.json()
+BYBIT_OI_REST = "https://api.bybit.com/v5/market/open-interest"
+BINANCE_OI_REST = "https://fapi.binance.com/fapi/v1/openInterest"
+OKX_OI_REST = "https://www.okx.com/api/v5/public/open-interest"
 
-            print(f"[OI DEBUG] Raw API response: {data}")
 
-            oi_list = data.get("result", {}).get("list", [])
-            if not oi_list:
-                print("[OI DEBUG] Empty OI list from Bybit.")
-                return None
+def parse_bybit_oi(data):
+    # Newest entry first; open interest in base coin
+    return float(data["result"]["list"][0]["openInterest"])
 
-            latest_entry = oi_list[-1]
-            latest_oi = float(latest_entry.get("openInterest", 0))
 
-            return latest_oi
+def parse_binance_oi(data):
+    return float(data["openInterest"])
 
-        except Exception as e:
-            print(f"[OI ERROR] Failed to fetch OI: {e}")
-            return None
 
-    def get_snapshot(self):
-        now = time.time()
-        if now - self.last_check < self.refresh_interval:
-            return self._format_oi_data(self.last_oi, 0)
+def parse_okx_oi(data):
+    # "oi" is in contracts, "oiCcy" in base coin
+    return float(data["data"][0]["oiCcy"])
+
+
+class OIFeed:
+    """
+    Open interest summed across Bybit, Binance and OKX linear perps, in base
+    coin.
+
+    Each venue is polled by the shared RestPoller on its own jittered
+    interval; get_snapshot() only reads the cached values. `oi_delta` is the
+    sum of each venue's change between its last two polls, so a venue that
+    starts or stops answering never shows up as a jump in the total.
+    """
+
+    def __init__(self, symbol="SOLUSDT", refresh_interval=15, spike_threshold_pct=1.0, poller=None):
+        self.symbol = symbol.upper()
+        self.refresh_interval = refresh_interval  # seconds
+        self.spike_threshold_pct = spike_threshold_pct  # spike if OI changes > 1%
+        self.poller = poller or get_poller()
+        self.venues = {}  # venue -> {"oi", "prev", "updated"}
+
+        base = self.symbol[:-4] if self.symbol.endswith("USDT") else self.symbol
+        requests = {
+            "bybit": (BYBIT_OI_REST, {"category": "linear", "symbol": self.symbol, "intervalTime": "5min", "limit": 1}, parse_bybit_oi),
+            "binance": (BINANCE_OI_REST, {"symbol": self.symbol}, parse_binance_oi),
+            "okx": (OKX_OI_REST, {"instType": "SWAP", "instId": f"{base}-USDT-SWAP"}, parse_okx_oi)
+        }
+        for venue, (url, params, parse) in requests.items():
+            self.poller.add(
+                f"oi_{venue}_{self.symbol}", url, refresh_interval, params=params, parse=parse,
+                on_result=lambda result, venue=venue: self._apply(venue, result)
+            )
+
+    async def connect(self):
+        await self.poller.run()
+
+    def _apply(self, venue, result):
+        state = self.venues.get(venue)
+        if state is None:
+            self.venues[venue] = {"oi": result.value, "prev": None, "updated": result.fetched_at}
+            return
+        state["prev"] = state["oi"]
+        state["oi"] = result.value
+        state["updated"] = result.fetched_at
 
-        current_oi = self.fetch_oi_from_bybit()
-        if current_oi is None:
+    def get_snapshot(self):
+        if not self.venues:
             return self._format_oi_data(None, 0)
 
-        delta = 0
+        current_oi = sum(state["oi"] for state in self.venues.values())
+        delta = sum(state["oi"] - state["prev"] for state in self.venues.values() if state["prev"] is not None)
+
         direction = "flat"
         spike = False
         bias = "neutral"
 
-        if self.last_oi is not None:
-            delta = current_oi - self.last_oi
-            percent_change = (abs(delta) / self.last_oi) * 100 if self.last_oi != 0 else 0
-
-            if percent_change >= self.spike_threshold_pct:
-                spike = True
-                direction = "up" if delta > 0 else "down"
-                bias = "long" if delta > 0 else "short"
+        previous_oi = current_oi - delta
+        percent_change = (abs(delta) / previous_oi) * 100 if previous_oi != 0 else 0
+        if percent_change >= self.spike_threshold_pct:
+            spike = True
+            direction = "up" if delta > 0 else "down"
+            bias = "long" if delta > 0 else "short"
 
-        self.last_oi = current_oi
-        self.last_check = now
+        data = self._format_oi_data(current_oi, delta, direction, spike, bias)
+        data["venues"] = {venue: round(state["oi"], 2) for venue, state in self.venues.items()}
+        return data
 
-        return self._format_oi_data(current_oi, delta, direction, spike, bias)
+    def get_poll_stats(self):
+        prefix = "oi_"
+        suffix = f"_{self.symbol}"
+        return {
+            name: stats for name, stats in self.poller.get_stats().items()
+            if name.startswith(prefix) and name.endswith(suffix)
+        }
 
     def _format_oi_data(self, oi, delta, direction="flat", spike=False, bias="neutral"):
         return {
@@ -68,3 +101,17 @@ class OIFeed:
             "spike": spike,
             "bias": bias
         }
+
+
+if __name__ == "__main__":
+    feed = OIFeed(symbol="SOLUSDT")
+
+    async def report():
+        while True:
+            await asyncio.sleep(15)
+            print(f"[OI] {feed.get_snapshot()} {feed.get_poll_stats()}")
+
+    async def run():
+        await asyncio.gather(feed.connect(), report())
+
+    asyncio.run(run())
@@ -1,42 +1,49 @@
 import asyncio
-import websockets
-import json
+
+from feeds.decoders import DEFAULT_DECODER
+from feeds.endpoints import OKX_PUBLIC_WS
+from utils.trade_tape import TradeTape
+from utils.ws_supervisor import StreamSupervisor
 
 class OKXCVDTracker:
-    def __init__(self, instId="SOL-USDT-SWAP"):
+    def __init__(self, instId="SOL-USDT-SWAP", decoder=None):
         self.instId = instId
-        self.cvd = 0
+        self.tape = TradeTape("okx_perp", instId)
         self.price = None
+        self.decoder = decoder or DEFAULT_DECODER
+        self.recorder = None
+        self.on_update = None  # called after each frame that carried trades
+
+        # OKX trade ids are not contiguous per instrument, so there is no gap
+        # accounting or backfill; the supervisor only keeps the stream alive.
+        sub_msg = {
+            "op": "subscribe",
+            "args": [{
+                "channel": "trades",
+                "instId": self.instId
+            }]
+        }
+        self.stream = StreamSupervisor("okx", OKX_PUBLIC_WS, self.handle_message, subscribe=[sub_msg])
 
     async def connect(self):
-        uri = "wss://ws.okx.com:8443/ws/v5/public"
-        async with websockets.connect(uri) as ws:
-            sub_msg = {
-                "op": "subscribe",
-                "args": [{
-                    "channel": "trades",
-                    "instId": self.instId
-                }]
-            }
-            await ws.send(json.dumps(sub_msg))
-            async for message in ws:
-                await self.handle_message(json.loads(message))
-
-    async def handle_message(self, msg):
-        if "data" in msg:
-            for trade in msg["data"]:
-                side = trade.get("side")  # "buy" or "sell"
-                sz = float(trade.get("sz", 0))
-                px = float(trade.get("px", 0))
-                self.price = px
-
-                if side == "buy":
-                    self.cvd += sz
-                elif side == "sell":
-                    self.cvd -= sz
+        await self.stream.run(self.recorder)
+
+    async def handle_message(self, raw):
+        _, trades = self.decoder.okx_trades(raw)
+        if trades:
+            self.tape.extend(trades)
+            self.price = self.tape.last_price
+            if self.on_update:
+                self.on_update()
+
+    def frame_handlers(self):
+        return {"okx": self.handle_message}
+
+    def get_stream_stats(self):
+        return {"okx": self.stream.get_stats()}
 
     def get_cvd(self):
-        return round(self.cvd, 2)
+        return round(self.tape.cvd, 2)
 
     def get_price(self):
         return self.price
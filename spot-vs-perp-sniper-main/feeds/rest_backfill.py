@@ -0,0 +1,63 @@
+# feeds/rest_backfill.py
+#
+# REST fetchers used by StreamSupervisor to fill trades missed while a
+# websocket was down. Each returns (ts, price, qty, side, trade_id) tuples in
+# trade id order, ready for TradeTape.extend_sequenced().
+
+import aiohttp
+
+from feeds.decoders import iso_to_ts
+from feeds.endpoints import BINANCE_SPOT_REST_HOST, BINANCE_PERP_REST_HOST, COINBASE_REST_HOST
+from utils.trade_tape import BUY, SELL
+
+BINANCE_SPOT_REST = f"{BINANCE_SPOT_REST_HOST}/api/v3/aggTrades"
+BINANCE_PERP_REST = f"{BINANCE_PERP_REST_HOST}/fapi/v1/aggTrades"
+COINBASE_REST = f"{COINBASE_REST_HOST}/products/{{product_id}}/trades"
+
+TIMEOUT = aiohttp.ClientTimeout(total=10)
+
+
+async def fetch_binance_agg_trades(url, symbol, from_id, limit=1000, max_pages=10):
+    trades = []
+    async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+        for _ in range(max_pages):
+            params = {"symbol": symbol.upper(), "fromId": from_id, "limit": limit}
+            async with session.get(url, params=params) as resp:
+                resp.raise_for_status()
+                page = await resp.json()
+
+            for t in page:
+                trades.append((t["T"] / 1000, float(t["p"]), float(t["q"]), SELL if t["m"] else BUY, t["a"]))
+            if len(page) < limit:
+                break
+            from_id = page[-1]["a"] + 1
+    return trades
+
+
+async def fetch_coinbase_trades(product_id, after_id, limit=1000, max_pages=10):
+    # Coinbase pages newest-first; `after` walks towards older trade ids
+    url = COINBASE_REST.format(product_id=product_id)
+    trades = []
+    cursor = None
+    async with aiohttp.ClientSession(timeout=TIMEOUT) as session:
+        for _ in range(max_pages):
+            params = {"limit": limit}
+            if cursor is not None:
+                params["after"] = cursor
+            async with session.get(url, params=params) as resp:
+                resp.raise_for_status()
+                page = await resp.json()
+
+            for t in page:
+                if t["trade_id"] <= after_id:
+                    continue
+                side = BUY if t["side"] == "buy" else SELL
+                ts = iso_to_ts(t["time"])
+                trades.append((ts, float(t["price"]), float(t["size"]), side, t["trade_id"]))
+
+            if not page or page[-1]["trade_id"] <= after_id + 1:
+                break
+            cursor = page[-1]["trade_id"]
+
+    trades.sort(key=lambda t: t[4])
+    return trades
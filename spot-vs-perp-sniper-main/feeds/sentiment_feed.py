@@ -1,39 +1,139 @@
+import asyncio
 import os
-import requests
+import random
 import time
+
+import aiohttp
 from dotenv import load_dotenv
 
 load_dotenv()
 
+LUNARCRUSH_URL = os.getenv("LUNARCRUSH_URL", "https://api.lunarcrush.com/v2")
+
+
 class SentimentTracker:
-    def __init__(self, symbol="SOL"):
+    """
+    LunarCrush sentiment kept fresh by a background task.
+
+    run() refreshes every `refresh_interval` seconds (jittered so several
+    trackers don't fire together) over one pooled session. A failed refresh
+    keeps the last good values and retries with jittered exponential backoff
+    instead of blocking the loop or zeroing the scores. get_summary() never
+    does I/O: it serves whatever is cached and flags it stale once it is older
+    than `ttl`.
+    """
+
+    def __init__(self, symbol="SOL", url=None, api_key=None, refresh_interval=300.0, ttl=900.0,
+                 timeout=5.0, backoff_base=2.0, backoff_max=300.0, clock=time.time):
         self.symbol = symbol.upper()
-        self.api_key = os.getenv("LUNARCRUSH_API_KEY")
+        self.url = url or LUNARCRUSH_URL
+        self.api_key = api_key or os.getenv("LUNARCRUSH_API_KEY")
+        self.refresh_interval = refresh_interval
+        self.ttl = ttl
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.clock = clock
+
         self.last_score = 0
         self.last_mentions = 0
         self.last_change = 0
+        self.updated_at = None
+        self.failures = 0
+        self.last_error = None
+        self.stats = {"refreshes": 0, "errors": 0, "last_latency": None}
+        self._task = None
+
+    def _params(self):
+        # yarl rejects None values, so an unset LUNARCRUSH_API_KEY is left out
+        params = {"data": "assets", "symbol": self.symbol}
+        if self.api_key:
+            params["key"] = self.api_key
+        return params
+
+    async def fetch_sentiment(self, session):
+        started = time.perf_counter()
+        async with session.get(self.url, params=self._params()) as resp:
+            resp.raise_for_status()
+            data = await resp.json(content_type=None)
+        self.stats["last_latency"] = time.perf_counter() - started
+
+        return self._parse(data)
+
+    @staticmethod
+    def _parse(data):
+        if not isinstance(data, dict) or not isinstance(data.get("data"), list) or not data["data"]:
+            raise ValueError(f"unexpected response: {str(data)[:200]}")
+        return data["data"][0]
 
-    def fetch_sentiment(self):
-        url = f"https://api.lunarcrush.com/v2?data=assets&key={self.api_key}&symbol={self.symbol}"
+    async def refresh(self, session):
+        try:
+            info = await self.fetch_sentiment(session)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, TypeError, AttributeError) as e:
+            # Response errors carry the request URL (and the API key); keep only the status
+            self._record_error(f"HTTP {e.status}" if isinstance(e, aiohttp.ClientResponseError) else repr(e))
+            return False
 
-        for attempt in range(3):
+        self._apply(info, self.clock())
+        return True
+
+    def _record_error(self, error):
+        # Keep serving the last good values; get_summary() marks them stale
+        self.failures += 1
+        self.last_error = error
+        self.stats["errors"] += 1
+        print(f"[Sentiment Fetch Error] Attempt {self.failures} → {error}")
+
+    def _apply(self, info, fetched_at):
+        self.last_score = info.get("galaxy_score", 0)
+        self.last_mentions = info.get("social_volume", 0)
+        self.last_change = info.get("price_score", 0)
+        self.updated_at = fetched_at
+        self.failures = 0
+        self.last_error = None
+        self.stats["refreshes"] += 1
+
+    def schedule(self, poller):
+        """
+        Poll through a shared RestPoller instead of run(); the poller owns the
+        session, interval jitter and backoff.
+        """
+        poller.add(
+            f"sentiment_{self.symbol}",
+            self.url,
+            self.refresh_interval,
+            params=self._params(),
+            parse=self._parse,
+            on_result=lambda result: self._apply(result.value, result.fetched_at),
+            on_error=lambda endpoint, e: self._record_error(endpoint.last_error)
+        )
+
+    def _next_delay(self):
+        if self.failures:
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self.failures - 1))
+            return delay * random.uniform(0.5, 1.0)
+        return self.refresh_interval * random.uniform(0.9, 1.1)
+
+    async def run(self):
+        async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
+            while True:
+                await self.refresh(session)
+                await asyncio.sleep(self._next_delay())
+
+    def start(self):
+        # Idempotent; call from inside the running event loop
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self.run())
+        return self._task
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
             try:
-                res = requests.get(url, timeout=5)
-                data = res.json()
-                if "data" in data and isinstance(data["data"], list):
-                    info = data["data"][0]
-                    self.last_score = info.get("galaxy_score", 0)
-                    self.last_mentions = info.get("social_volume", 0)
-                    self.last_change = info.get("price_score", 0)
-                    return
-            except Exception as e:
-                print(f"[Sentiment Fetch Error] Attempt {attempt+1}/3 → {e}")
-                time.sleep(1)
-
-        # Fallback to blank if unreachable
-        self.last_score = 0
-        self.last_mentions = 0
-        self.last_change = 0
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
     def get_summary(self):
         badge = "📊"
@@ -42,9 +142,13 @@ class SentimentTracker:
         elif self.last_score > 50:
             badge = "⚡"
 
+        age = self.clock() - self.updated_at if self.updated_at is not None else None
         return {
             "badge": badge,
             "galaxy_score": self.last_score,
             "mentions": self.last_mentions,
-            "price_score": self.last_change
+            "price_score": self.last_change,
+            "age": age,
+            "stale": age is None or age > self.ttl,
+            "error": self.last_error
         }
@@ -0,0 +1,340 @@
+import argparse
+import asyncio
+import hashlib
+import os
+import time
+from dotenv import load_dotenv
+
+from feeds.btc_reference_feed import BTCReferenceFeed
+from feeds.delta_spike_feed import DeltaSpikeTracker
+from feeds.funding_feed import MultiFundingTracker
+from feeds.multi_symbol_feed import venue_instruments, build_trade_feeds
+
+from utils.alert_cluster_buffer import AlertClusterBuffer
+from utils.alert_delivery import get_delivery
+from utils.frame_recorder import FrameRecorder
+from utils.memory_logger import log_snapshot
+from utils.metrics import MetricsServer, histogram
+from utils.cvd_snapshot_writer import symbol_column_enabled, write_snapshot_to_supabase
+from utils.multi_tf_memory import MultiTFMemory
+from utils.profiler import get_profiler
+from utils.signal_ladder import LADDER, NO_SIGNAL
+from utils.supabase_writer import get_writer
+from utils.spot_perp_alert_dispatcher import SpotPerpAlertDispatcher
+from utils.spot_perp_scorer import score_spot_perp_confluence_multi
+from spot_vs_perp_engine import FORCE_TEST_ALERT, RECORD_FRAMES_DIR, POLL_INTERVAL_SECONDS, MEMORY_TIMEFRAMES
+
+load_dotenv()
+
+# Comma-separated base assets, e.g. "SOL,ETH,AVAX,DOGE"
+MULTI_SYMBOLS = os.getenv("MULTI_SYMBOLS", "SOL")
+
+# Symbols with new trades are evaluated every MULTI_EVAL_INTERVAL_SECONDS;
+# quiet ones still get evaluated every POLL_INTERVAL_SECONDS.
+MULTI_EVAL_INTERVAL_SECONDS = float(os.getenv("MULTI_EVAL_INTERVAL_SECONDS", "1"))
+
+PASS_SECONDS = histogram("engine_pass_seconds", "Duration of one multi-symbol evaluation pass")
+
+
+def parse_symbols(symbols):
+    if isinstance(symbols, str):
+        symbols = symbols.split(",")
+    return [s.strip().upper() for s in symbols if s.strip()]
+
+
+class SymbolState:
+    """
+    Everything the engine keeps for one symbol: where its flow comes from
+    (venue tapes in-process, or a row of the shared table when sharded), its
+    funding tracker, memory, spike tracker, alert gating and cooldowns. A
+    sharded symbol's spike tracker lives in its worker, so `delta_tracker`
+    is None there.
+    """
+
+    __slots__ = (
+        "symbol", "tapes", "row", "funding",
+        "memory", "delta_tracker", "alert_buffer", "alert_dispatcher",
+        "last_signal", "last_signal_time", "last_signal_hash",
+        "dirty", "last_eval"
+    )
+
+    def __init__(self, symbol, funding, clock, delivery, tapes=None, row=None):
+        self.symbol = symbol
+        self.tapes = tapes
+        self.row = row
+        self.funding = funding
+
+        self.memory = MultiTFMemory(timeframes=MEMORY_TIMEFRAMES, clock=clock)
+        self.delta_tracker = DeltaSpikeTracker(clock=clock) if row is None else None
+        self.alert_buffer = AlertClusterBuffer(buffer_window=60, clock=clock)
+        self.alert_dispatcher = SpotPerpAlertDispatcher(clock=clock, delivery=delivery, symbol=symbol)
+
+        self.last_signal = None
+        self.last_signal_time = 0
+        self.last_signal_hash = ""
+
+        self.dirty = False
+        self.last_eval = 0
+
+
+class MultiSymbolEvaluator:
+    """
+    Scoring, logging and alerting shared by the in-process and sharded
+    multi-symbol engines. Subclasses own the feeds, fill `self.states` and
+    implement read_flows(state) and btc_spot(); check_spike(state) reads the
+    symbol's own DeltaSpikeTracker unless overridden.
+    """
+
+    def __init__(self, clock=time.time, dry_run=False):
+        self.clock = clock
+        self.dry_run = dry_run
+        self.states = {}
+        self.alert_delivery = get_delivery()
+        self.supabase_writer = get_writer()
+        self.metrics_server = MetricsServer()
+        self.profiler = get_profiler()
+        self.signal_cooldown_seconds = 300
+        self.stats = {"evaluations": 0, "passes": 0, "last_pass_seconds": 0.0, "max_pass_seconds": 0.0, "overruns": 0}
+
+    def read_flows(self, state):
+        # -> (cb_cvd, bin_spot, bin_perp, bybit_cvd, okx_cvd, price)
+        raise NotImplementedError
+
+    def btc_spot(self):
+        raise NotImplementedError
+
+    def check_spike(self, state):
+        # The tracker is fed every perp trade by the feeds, not from read_flows
+        return state.delta_tracker.check_spike()
+
+    async def monitor(self, interval=MULTI_EVAL_INTERVAL_SECONDS):
+        while True:
+            started = time.perf_counter()
+            try:
+                self.evaluate_pass()
+            except Exception as e:
+                print(f"[ERROR] Multi-symbol monitor pass failed: {e}")
+
+            elapsed = time.perf_counter() - started
+            if elapsed > interval:
+                self.stats["overruns"] += 1
+                print(f"⚠️ Multi-symbol pass took {elapsed:.3f}s (interval {interval}s)")
+            await asyncio.sleep(max(0.0, interval - elapsed))
+
+    def evaluate_pass(self):
+        """
+        Evaluates every symbol that traded since the last pass, plus any that
+        has gone POLL_INTERVAL_SECONDS without an evaluation. Returns the
+        snapshots produced.
+        """
+        started = time.perf_counter()
+        now = self.clock()
+        btc_spot = self.btc_spot()
+
+        snapshots = []
+        for state in self.states.values():
+            if state.dirty or now - state.last_eval >= POLL_INTERVAL_SECONDS:
+                snapshots.append(self.evaluate_symbol(state, now, btc_spot))
+
+        elapsed = time.perf_counter() - started
+        self.stats["passes"] += 1
+        self.stats["evaluations"] += len(snapshots)
+        self.stats["last_pass_seconds"] = elapsed
+        self.stats["max_pass_seconds"] = max(self.stats["max_pass_seconds"], elapsed)
+        PASS_SECONDS.observe(elapsed)
+        if self.profiler.enabled:
+            self.profiler.observe_iteration(elapsed)
+        return snapshots
+
+    def evaluate_symbol(self, state, now, btc_spot):
+        state.dirty = False
+        state.last_eval = now
+        # Stages are aggregated over symbols; the pass as a whole is the iteration
+        lap = self.profiler.laps()
+
+        cb_cvd, bin_spot, bin_perp, bybit_cvd, okx_cvd, price = self.read_flows(state)
+        funding = state.funding.get_average()
+        lap("read_flows")
+
+        spike_data = self.check_spike(state)
+        lap("delta_spike")
+
+        state.memory.update(cb_cvd, bin_spot, bin_perp)
+        deltas = state.memory.get_all_deltas()
+        lap("memory")
+        scored = score_spot_perp_confluence_multi(deltas)
+        confidence = scored["score"]
+        bias_label = scored["label"]
+        lap("scorer")
+
+        rule = LADDER.match(cb_cvd, bin_spot, bin_perp, bybit_cvd, okx_cvd, btc_spot, funding, spike_data["spike"])
+        signal = rule.text if rule else NO_SIGNAL
+        lap("signal")
+
+        if not self.dry_run and signal != state.last_signal:
+            print(f"[{state.symbol}] 🧠 {signal} | 💡 {confidence}/10 → {bias_label.upper()}")
+
+        snapshot = {
+            "exchange": "multi",
+            "symbol": state.symbol,
+            "signal": signal,
+            "confidence": confidence,
+            "bias": bias_label,
+            "price": price,
+            "funding_rate": funding,
+            "spike": spike_data["spike"],
+            "spike_delta": spike_data["net_delta"],
+            "btc_spot": btc_spot
+        }
+
+        if not self.dry_run:
+            log_snapshot(snapshot, ts=now)
+        lap("log_snapshot")
+
+        signal_signature = f"{signal}-{bin_spot}-{cb_cvd}-{bin_perp}"
+        signal_hash = hashlib.sha256(signal_signature.encode()).hexdigest()
+
+        is_unique = signal_hash != state.last_signal_hash
+        is_cooldown = now - state.last_signal_time > self.signal_cooldown_seconds
+        is_meaningful = rule is not None and rule.meaningful
+
+        if is_unique and is_cooldown and is_meaningful:
+            if not self.dry_run:
+                write_snapshot_to_supabase(snapshot, self.supabase_writer)
+            state.last_signal_time = now
+            state.last_signal_hash = signal_hash
+        state.last_signal = signal
+        lap("supabase")
+
+        if self.dry_run:
+            return snapshot
+
+        if state.alert_buffer.should_send(signal, confidence, bias_label):
+            state.alert_dispatcher.maybe_alert(
+                signal,
+                confidence,
+                bias_label,
+                deltas.get("15m", {}),
+                force_test=FORCE_TEST_ALERT
+            )
+        lap("alerts")
+
+        return snapshot
+
+
+class MultiSymbolEngine(MultiSymbolEvaluator):
+    """
+    Spot-vs-perp engine for a list of symbols in one process.
+
+    Each venue gets one shared feed (Binance combined streams, multi-arg
+    subscriptions on Bybit/OKX, one Coinbase subscription with every product)
+    instead of six sockets per symbol, funding comes from Binance's
+    all-market mark price stream, and BTC reference flow is shared by every
+    symbol. Feeds mark a symbol dirty when it trades; the monitor evaluates
+    only dirty symbols on each tick.
+    """
+
+    def __init__(self, symbols, clock=time.time, dry_run=False, recorder=None, uris=None):
+        super().__init__(clock=clock, dry_run=dry_run)
+        self.symbols = parse_symbols(symbols)
+
+        instruments = {s: venue_instruments(s) for s in self.symbols}
+        self.btc = BTCReferenceFeed()
+        # BTC in the symbol list reads the reference feed's tapes rather than
+        # subscribing btcusdt@aggTrade a second time on the same mux
+        share_btc = "BTC" in instruments and not {"binance_spot", "binance_perp"} & set(uris or {})
+        binance_tapes = None
+        if share_btc:
+            binance_tapes = {"spot": {"BTCUSDT": self.btc.spot_tape}, "perp": {"BTCUSDT": self.btc.perp_tape}}
+        venue_feeds = build_trade_feeds(self.symbols, uris, binance_tapes=binance_tapes)
+        self.coinbase = venue_feeds["coinbase"]
+        self.binance_spot = venue_feeds["binance_spot"]
+        self.binance_perp = venue_feeds["binance_perp"]
+        self.bybit = venue_feeds["bybit"]
+        self.okx = venue_feeds["okx"]
+        self.funding_tracker = MultiFundingTracker([i["binance_perp"] for i in instruments.values()])
+
+        for symbol, names in instruments.items():
+            tapes = {venue: venue_feeds[venue].tapes[names[venue]] for venue in venue_feeds}
+            funding = self.funding_tracker.trackers[names["binance_perp"]]
+            self.states[symbol] = SymbolState(symbol, funding, clock, self.alert_delivery, tapes=tapes)
+
+        # Route each feed's per-instrument updates to the owning symbol
+        for venue, feed in venue_feeds.items():
+            owners = {names[venue]: self.states[symbol] for symbol, names in instruments.items()}
+            feed.on_update = lambda instrument, owners=owners: setattr(owners[instrument], "dirty", True)
+            if venue == "binance_perp":
+                # Every perp trade goes to the spike tracker, not one CVD tick per pass
+                feed.on_trades = lambda instrument, trades, owners=owners: owners[instrument].delta_tracker.add_trades(trades)
+        if share_btc:
+            self.btc.on_update = lambda state=self.states["BTC"]: setattr(state, "dirty", True)
+            self.btc.on_perp_trades = self.states["BTC"].delta_tracker.add_trades
+
+        if recorder is None and RECORD_FRAMES_DIR:
+            recorder = FrameRecorder(RECORD_FRAMES_DIR)
+        self.recorder = recorder
+        for feed in self.stream_feeds():
+            feed.recorder = recorder
+
+    def stream_feeds(self):
+        return [self.coinbase, self.binance_spot, self.binance_perp, self.bybit, self.okx, self.btc, self.funding_tracker]
+
+    def frame_handlers(self):
+        handlers = {}
+        for feed in self.stream_feeds():
+            handlers.update(feed.frame_handlers())
+        return handlers
+
+    def get_stream_stats(self):
+        stats = {}
+        for feed in self.stream_feeds():
+            stats.update(feed.get_stream_stats())
+        return stats
+
+    def read_flows(self, state):
+        t = state.tapes
+        price = t["binance_perp"].last_price or t["coinbase"].last_price or t["bybit"].last_price or t["okx"].last_price
+        return (
+            round(t["coinbase"].cvd, 2),
+            round(t["binance_spot"].cvd, 2),
+            round(t["binance_perp"].cvd, 2),
+            round(t["bybit"].cvd, 2),
+            round(t["okx"].cvd, 2),
+            price
+        )
+
+    def btc_spot(self):
+        return round(self.btc.spot_tape.cvd, 2)
+
+    async def run(self):
+        print(f"[MULTI] Watching {len(self.symbols)} symbols: {', '.join(self.symbols[:20])}{' ...' if len(self.symbols) > 20 else ''}")
+        if self.supabase_writer.is_configured() and not symbol_column_enabled():
+            print("⚠️ SUPABASE_SNAPSHOT_SYMBOL is off: cvd_snapshots rows will not say which symbol they are for (see utils/cvd_snapshot_writer.py).")
+        try:
+            await asyncio.gather(
+                *(feed.connect() for feed in self.stream_feeds()),
+                self.supabase_writer.run(),
+                self.alert_delivery.run(),
+                self.metrics_server.run(),
+                self.profiler.run(),
+                self.monitor()
+            )
+        finally:
+            if self.recorder:
+                self.recorder.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the spot-vs-perp engine over many symbols in one process.")
+    parser.add_argument("--symbols", default=MULTI_SYMBOLS, help="comma-separated base assets (default: MULTI_SYMBOLS env)")
+    parser.add_argument("--profile", action="store_true", help="time engine stages and sample stacks (same as PROFILE=true)")
+    args = parser.parse_args()
+    if args.profile:
+        get_profiler().enabled = True
+
+    engine = MultiSymbolEngine(args.symbols)
+    asyncio.run(engine.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# outcome_labeller.py
+#
+# Fills `confirmed_outcome` for stored snapshots from what the price did
+# next. Each snapshot is joined as-of (searchsorted) onto a price path and
+# followed for every horizon in OUTCOME_HORIZONS. The move in the signal's
+# direction (Rule.direction) is checked against two barriers: reaching
+# +breakout% first is a breakout, reaching -trap% first is a trap, and
+# neither within the horizon is none. Max favourable / adverse excursion and
+# time to the barrier are kept per horizon. The primary horizon's label
+# becomes the snapshot's outcome.
+#
+# Works on the local snapshot cache (sniper_pattern_learner.py syncs it).
+# Only rows without a label are processed unless --full is given.
+#
+#   python outcome_labeller.py [--prices cvd_memory|series.csv|cache] [--horizons 15m=0.5,1h=1.0/0.7] [--primary 1h] [--full] [--push]
+#
+# The price path defaults to the local snapshot log (CVD_MEMORY_DIR) and
+# falls back to the prices stored with the snapshots themselves.
+
+import argparse
+import os
+import time
+
+import numpy as np
+import requests
+from dotenv import load_dotenv
+
+from spot_perp_backtester import load_series
+from utils.memory_logger import MEMORY_DIR
+from utils.multi_tf_memory import parse_timeframe
+from utils.signal_ladder import LADDER
+from utils.snapshot_cache import SnapshotCache, SupabaseSnapshotSource, SNAPSHOT_CACHE_PATH
+from utils.snapshot_log import SnapshotLogReader, list_segments
+
+load_dotenv()
+
+# horizon=breakout% or horizon=breakout%/trap%
+OUTCOME_HORIZONS = os.getenv("OUTCOME_HORIZONS", "15m=0.5,1h=1.0,4h=2.0")
+OUTCOME_PRIMARY_HORIZON = os.getenv("OUTCOME_PRIMARY_HORIZON", "1h")
+
+# label_events() outcome codes index OUTCOMES; UNLABELLED marks rows that
+# have no entry price, no direction or an incomplete horizon
+OUTCOMES = ("none", "breakout", "trap")
+NONE, BREAKOUT, TRAP = range(3)
+UNLABELLED = -1
+
+
+def parse_horizons(text):
+    """
+    "15m=0.5,1h=1.0/0.7" -> {"15m": (900, 0.5, 0.5), "1h": (3600, 1.0, 0.7)}
+    """
+    horizons = {}
+    for item in filter(None, (part.strip() for part in text.split(","))):
+        name, _, thresholds = item.partition("=")
+        breakout, _, trap = thresholds.partition("/")
+        breakout = float(breakout)
+        trap = float(trap) if trap else breakout
+        if breakout <= 0 or trap <= 0:
+            raise ValueError(f"horizon {name}: thresholds must be positive")
+        horizons[name.strip()] = (parse_timeframe(name.strip()), breakout, trap)
+    return dict(sorted(horizons.items(), key=lambda item: item[1][0]))
+
+
+def label_events(event_ts, direction, path_ts, path_price, horizon, breakout_pct, trap_pct, max_cells=4_000_000):
+    """
+    Labels events at `event_ts` (sorted or not) against a sorted price path.
+
+    The entry price is the last path sample at or before the event; the
+    samples after it up to event + horizon form the window. `direction`
+    (+1/-1, 0 to skip) orients the move so positive is favourable. Returns
+    {"outcome", "mfe", "mae", "seconds"}: outcome codes, max favourable and
+    adverse excursion in %, and seconds until the first barrier (NaN for
+    none). Windows are gathered into (events x samples) blocks of at most
+    `max_cells` and reduced with numpy, so there is no per-sample loop.
+    """
+    event_ts = np.asarray(event_ts, dtype=np.float64)
+    direction = np.asarray(direction, dtype=np.float64)
+    n = len(event_ts)
+    outcome = np.full(n, UNLABELLED, dtype=np.int8)
+    mfe = np.full(n, np.nan)
+    mae = np.full(n, np.nan)
+    seconds = np.full(n, np.nan)
+    result = {"outcome": outcome, "mfe": mfe, "mae": mae, "seconds": seconds}
+    if n == 0 or len(path_ts) == 0:
+        return result
+
+    entry_idx = np.searchsorted(path_ts, event_ts, side="right") - 1
+    end_idx = np.searchsorted(path_ts, event_ts + horizon, side="right")  # exclusive
+    # An event whose horizon runs past the end of the path is left for a later run
+    rows = np.flatnonzero((entry_idx >= 0) & (direction != 0) & (event_ts + horizon <= path_ts[-1]))
+    if not len(rows):
+        return result
+
+    lengths = end_idx[rows] - entry_idx[rows] - 1
+    width = max(1, int(lengths.max()))
+    steps = np.arange(width)
+    chunk = max(1, max_cells // width)
+    last = len(path_ts) - 1
+
+    for lo in range(0, len(rows), chunk):
+        r = rows[lo:lo + chunk]
+        start = entry_idx[r]
+        idx = np.minimum(start[:, None] + 1 + steps, last)
+        inside = steps < lengths[lo:lo + chunk, None]
+        move = (path_price[idx] / path_price[start][:, None] - 1) * 100 * direction[r, None]
+
+        best = np.where(inside, move, -np.inf).max(axis=1)
+        worst = np.where(inside, move, np.inf).min(axis=1)
+        mfe[r] = np.maximum(np.where(np.isfinite(best), best, 0.0), 0.0)
+        mae[r] = np.maximum(np.where(np.isfinite(worst), -worst, 0.0), 0.0)
+
+        up = inside & (move >= breakout_pct)
+        down = inside & (move <= -trap_pct)
+        first_up = np.where(up.any(axis=1), up.argmax(axis=1), width)
+        first_down = np.where(down.any(axis=1), down.argmax(axis=1), width)
+        outcome[r] = np.where(first_up < first_down, BREAKOUT, np.where(first_down < first_up, TRAP, NONE))
+
+        hit = np.minimum(first_up, first_down)
+        decided = np.flatnonzero(hit < width)
+        seconds[r[decided]] = path_ts[idx[decided, hit[decided]]] - event_ts[r[decided]]
+
+    return result
+
+
+def _sorted_path(ts, price):
+    ts = np.asarray(ts, dtype=np.float64)
+    price = np.asarray(price, dtype=np.float64)
+    keep = np.isfinite(ts) & np.isfinite(price) & (price > 0)
+    ts, price = ts[keep], price[keep]
+    order = np.argsort(ts, kind="stable")
+    return ts[order], price[order]
+
+
+def load_price_paths(source, cache, start_ts=None):
+    """
+    {symbol: (ts, price)} sorted price paths; symbol is None for
+    single-symbol data. `source` is a snapshot log directory, a series
+    .csv/.npz (see spot_perp_backtester.load_series) or "cache".
+    """
+    if source.endswith((".csv", ".npz")):
+        series = load_series(source)
+        return {None: _sorted_path(series["ts"], series["price"])}
+
+    if source != "cache":
+        columns = {}
+        for record in SnapshotLogReader(source).range(start_ts):
+            price = record.get("price")
+            if isinstance(price, (int, float)):
+                ts_list, price_list = columns.setdefault(record.get("symbol"), ([], []))
+                ts_list.append(record["ts"])
+                price_list.append(price)
+        return {symbol: _sorted_path(ts, price) for symbol, (ts, price) in columns.items()}
+
+    cols = cache.columns(("ts", "price", "symbol"), start_ts=start_ts)
+    strings = cache.strings()
+    paths = {}
+    for code in np.unique(cols["symbol"]):
+        mask = cols["symbol"] == code
+        paths[strings[code]] = _sorted_path(cols["ts"][mask], cols["price"][mask])
+    return paths
+
+
+def signal_directions(strings):
+    # Direction per string code; 0 for anything that is not a ladder rule
+    by_text = {rule.text: rule.direction for rule in LADDER.rules}
+    return np.array([by_text.get(value, 0) for value in strings], dtype=np.int8)
+
+
+def directions_key():
+    # Changes whenever a rule's direction does; stored labels then need redoing
+    return ",".join(f"{rule.name}:{rule.direction}" for rule in LADDER.rules)
+
+
+def label_cache(cache, paths, horizons, primary, full=False):
+    """
+    Labels cached snapshots for every horizon and sets the primary horizon's
+    outcome on the snapshot rows. Returns per-horizon counts of the rows
+    labelled in this run and the (ids, outcomes) set as primary. With
+    `full`, earlier labels are dropped first and rows that no longer get one
+    have their outcome cleared (returned with outcome None).
+    """
+    strings = cache.strings()
+    signal_direction = signal_directions(strings)
+
+    summary = {}
+    primary_ids, primary_outcomes = [], []
+    with cache.conn:
+        stale = cache.labels(primary)["id"] if full else np.zeros(0, dtype=np.int64)
+        if full:
+            for name in horizons:
+                cache.delete_labels(name)
+            cache.set_outcomes(stale, [None] * len(stale))
+
+        for name, (seconds, breakout_pct, trap_pct) in horizons.items():
+            # Each horizon picks up its own pending rows, so a short horizon is
+            # not relabelled while a longer one is still waiting for prices
+            cols = cache.columns(("id", "ts", "signal", "symbol"), unlabelled=None if full else name)
+            directions = signal_direction[cols["signal"]]
+            counts = {"labelled": 0, **{o: 0 for o in OUTCOMES}}
+            mfe_total = mae_total = 0.0
+            for code in np.unique(cols["symbol"]):
+                # A single unnamed series (a .csv/.npz path) serves every symbol
+                path = paths.get(strings[code], paths.get(None) if len(paths) == 1 else None)
+                if path is None:
+                    continue
+                mask = cols["symbol"] == code
+                result = label_events(cols["ts"][mask], directions[mask], *path, seconds, breakout_pct, trap_pct)
+
+                done = result["outcome"] >= 0
+                ids = cols["id"][mask][done]
+                outcomes = [OUTCOMES[o] for o in result["outcome"][done]]
+                cache.write_labels(name, ids, outcomes, result["mfe"][done], result["mae"][done], result["seconds"][done])
+                if name == primary:
+                    cache.set_outcomes(ids, outcomes)
+                    primary_ids.extend(ids.tolist())
+                    primary_outcomes.extend(outcomes)
+
+                counts["labelled"] += int(done.sum())
+                for i, o in enumerate(OUTCOMES):
+                    counts[o] += int((result["outcome"] == i).sum())
+                mfe_total += float(result["mfe"][done].sum())
+                mae_total += float(result["mae"][done].sum())
+
+            if counts["labelled"]:
+                counts["mean_mfe_pct"] = round(mfe_total / counts["labelled"], 3)
+                counts["mean_mae_pct"] = round(mae_total / counts["labelled"], 3)
+            summary[name] = counts
+
+        cleared = np.setdiff1d(stale, np.asarray(primary_ids, dtype=np.int64)).tolist()
+        primary_ids.extend(cleared)
+        primary_outcomes.extend([None] * len(cleared))
+        cache.set_meta("label_directions", directions_key())
+
+    return summary, (primary_ids, primary_outcomes)
+
+
+def push_outcomes(source, ids, outcomes):
+    by_outcome = {}
+    for i, o in zip(ids, outcomes):
+        by_outcome.setdefault(o, []).append(i)
+    for outcome, group in by_outcome.items():
+        source.set_outcome(group, outcome)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Label cached snapshots as trap / breakout / none from the later price path.")
+    parser.add_argument("--cache", default=SNAPSHOT_CACHE_PATH)
+    parser.add_argument("--prices", help=f"snapshot log directory, series .csv/.npz, or 'cache' (default: {MEMORY_DIR} if it has segments, else cache)")
+    parser.add_argument("--horizons", default=OUTCOME_HORIZONS, help="e.g. 15m=0.5,1h=1.0/0.7 (breakout%%/trap%%)")
+    parser.add_argument("--primary", default=OUTCOME_PRIMARY_HORIZON, help="horizon whose label becomes confirmed_outcome")
+    parser.add_argument("--full", action="store_true", help="relabel every row, e.g. after changing thresholds")
+    parser.add_argument("--push", action="store_true", help="also write confirmed_outcome back to Supabase")
+    args = parser.parse_args()
+
+    horizons = parse_horizons(args.horizons)
+    if args.primary not in horizons:
+        parser.error(f"--primary {args.primary} is not one of the horizons ({', '.join(horizons)})")
+    prices = args.prices or (MEMORY_DIR if list_segments(MEMORY_DIR) else "cache")
+
+    cache = SnapshotCache(args.cache)
+    try:
+        started = time.perf_counter()
+        full = args.full
+        if not full and cache.get_meta("label_directions") != directions_key() and len(cache.labels(args.primary)["id"]):
+            print("♻️ Signal directions changed since the last run, relabelling everything.")
+            full = True
+        first = np.concatenate([
+            cache.columns(("ts",), unlabelled=None if full else name)["ts"] for name in horizons
+        ])
+        if not len(first):
+            print("⚠️ No unlabelled snapshots in the cache.")
+            return
+        paths = load_price_paths(prices, cache, start_ts=float(first.min()) - 60)
+        loaded = time.perf_counter()
+
+        summary, (ids, outcomes) = label_cache(cache, paths, horizons, args.primary, full=full)
+        print(f"🏷️ Labelled against {prices} ({sum(len(p[0]) for p in paths.values())} price samples) "
+              f"in {time.perf_counter() - started:.2f}s (path load {loaded - started:.2f}s)")
+        for name, counts in summary.items():
+            marker = " (primary)" if name == args.primary else ""
+            print(f"   - {name}{marker}: {counts}")
+
+        if args.push and ids:
+            source = SupabaseSnapshotSource()
+            if not source.is_configured():
+                print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
+            else:
+                try:
+                    push_outcomes(source, ids, outcomes)
+                    print(f"🔄 Pushed {len(ids)} outcomes to Supabase")
+                except requests.RequestException as e:
+                    print(f"❌ Pushing outcomes failed: {e}")
+    finally:
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
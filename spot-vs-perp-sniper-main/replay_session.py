@@ -0,0 +1,53 @@
+# replay_session.py
+#
+# Replays frames captured with RECORD_FRAMES_DIR through a dry-run engine.
+#
+#   python replay_session.py recordings/ --speed max
+#   python replay_session.py recordings/ --speed 10
+
+import argparse
+import asyncio
+from collections import Counter
+
+from spot_vs_perp_engine import SpotVsPerpEngine
+from utils.frame_replay import FrameReplayer, ReplayClock
+
+
+async def replay(directory, speed, tick_interval):
+    clock = ReplayClock()
+    engine = SpotVsPerpEngine(clock=clock, dry_run=True)
+    signals = Counter()
+
+    async def on_tick():
+        snapshot = await engine.evaluate()
+        signals[snapshot["signal"]] += 1
+
+    replayer = FrameReplayer(
+        directory,
+        engine.frame_handlers(),
+        clock,
+        speed=speed,
+        on_tick=on_tick,
+        tick_interval=tick_interval
+    )
+    stats = await replayer.run()
+
+    print("\n🎞️ REPLAY SUMMARY")
+    print("--------------------------------------------------")
+    for key, value in stats.items():
+        print(f"   - {key}: {value}")
+    print("\n🧠 Signals per evaluation:")
+    for signal, count in signals.most_common():
+        print(f"   {count:>6}  {signal}")
+    print("--------------------------------------------------")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory")
+    parser.add_argument("--speed", default="max", help="'max' or a multiplier such as 1 or 10")
+    parser.add_argument("--tick", type=float, default=5.0, help="seconds of recorded time between evaluations")
+    args = parser.parse_args()
+
+    speed = None if args.speed == "max" else float(args.speed)
+    asyncio.run(replay(args.directory, speed, args.tick))
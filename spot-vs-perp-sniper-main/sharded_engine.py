@@ -0,0 +1,261 @@
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from feeds.btc_reference_feed import BTCReferenceFeed
+from feeds.delta_spike_feed import DeltaSpikeTracker
+from feeds.funding_feed import MultiFundingTracker
+from feeds.multi_symbol_feed import venue_instruments, build_trade_feeds
+from multi_symbol_engine import MultiSymbolEvaluator, SymbolState, MULTI_SYMBOLS, MULTI_EVAL_INTERVAL_SECONDS, parse_symbols
+from utils.profiler import get_profiler
+from utils.shared_state_table import SharedStateTable, COLUMNS
+
+# Worker processes default to one per core; each publishes its dirty rows
+# every SHARD_PUBLISH_INTERVAL_SECONDS.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or os.cpu_count() or 1
+SHARD_PUBLISH_INTERVAL_SECONDS = float(os.getenv("SHARD_PUBLISH_INTERVAL_SECONDS", "0.05"))
+
+VENUES = ("coinbase", "binance_spot", "binance_perp", "bybit", "okx")
+OFFSET_FIELDS = ("cb_cvd", "bin_spot", "bin_perp", "bybit_cvd", "okx_cvd", "trades")
+
+
+class ShardWorker:
+    """
+    Runs the venue trade feeds for one slice of the symbol universe inside a
+    worker process and publishes each symbol's CVD/price into its row of the
+    shared state table. A restarted worker continues from the cumulative CVD
+    and trade counts already in its rows, so readers see no drop to zero.
+
+    Each symbol's DeltaSpikeTracker runs here too, fed every perp trade, and
+    its spike flag and primary-window delta are published with the row.
+    Rows whose tracker still holds delta are republished until it drains, so
+    a spike clears on the coordinator even when the symbol goes quiet.
+    """
+
+    def __init__(self, table, symbols, first_row, uris=None, publish_interval=SHARD_PUBLISH_INTERVAL_SECONDS):
+        self.table = table
+        self.symbols = symbols
+        self.first_row = first_row
+        self.publish_interval = publish_interval
+        self.feeds = build_trade_feeds(symbols, uris)
+
+        self.rows = []
+        self.dirty = set()
+        self.trackers = [DeltaSpikeTracker() for _ in symbols]
+        self.draining = set()  # rows published with a nonzero spike window
+        for symbol in symbols:
+            names = venue_instruments(symbol)
+            self.rows.append(tuple(self.feeds[venue].tapes[names[venue]] for venue in VENUES))
+
+        # (cb, bin_spot, bin_perp, bybit, okx, trades) published by a previous run of this shard
+        self.offsets = [
+            tuple(float(values[COLUMNS[name]]) for name in OFFSET_FIELDS)
+            for values in (table.read(first_row + i) for i in range(len(symbols)))
+        ]
+
+        for venue, feed in self.feeds.items():
+            row_of = {venue_instruments(s)[venue]: first_row + i for i, s in enumerate(symbols)}
+            feed.on_update = lambda instrument, row_of=row_of: self.dirty.add(row_of[instrument])
+            if venue == "binance_perp":
+                trackers = {inst: self.trackers[row - first_row] for inst, row in row_of.items()}
+                feed.on_trades = lambda instrument, trades, trackers=trackers: trackers[instrument].add_trades(trades)
+
+    async def run(self):
+        await asyncio.gather(
+            *(feed.connect() for feed in self.feeds.values()),
+            self.publish_loop()
+        )
+
+    async def publish_loop(self):
+        while True:
+            await asyncio.sleep(self.publish_interval)
+            self.publish()
+
+    def publish(self):
+        dirty, self.dirty = self.dirty | self.draining, set()
+        now = time.time()
+        for row in dirty:
+            cb, bin_spot, bin_perp, bybit, okx = self.rows[row - self.first_row]
+            o_cb, o_spot, o_perp, o_bybit, o_okx, o_trades = self.offsets[row - self.first_row]
+            price = bin_perp.last_price or cb.last_price or bybit.last_price or okx.last_price or 0.0
+            spike = self.trackers[row - self.first_row].check_spike()
+            if spike["spike"] or spike["net_delta"]:
+                self.draining.add(row)
+            else:
+                self.draining.discard(row)
+            self.table.write(row, (
+                o_cb + cb.cvd,
+                o_spot + bin_spot.cvd,
+                o_perp + bin_perp.cvd,
+                o_bybit + bybit.cvd,
+                o_okx + okx.cvd,
+                price,
+                max(cb.last_ts, bin_spot.last_ts, bin_perp.last_ts, bybit.last_ts, okx.last_ts),
+                o_trades + cb.count + bin_spot.count + bin_perp.count + bybit.count + okx.count,
+                1.0 if spike["spike"] else 0.0,
+                spike["net_delta"],
+                now
+            ))
+
+
+def run_shard(table_name, rows, symbols, first_row, uris=None, publish_interval=SHARD_PUBLISH_INTERVAL_SECONDS):
+    # Process entry point; must stay importable for the spawn start method
+    table = SharedStateTable.attach(table_name, rows)
+    try:
+        asyncio.run(ShardWorker(table, symbols, first_row, uris, publish_interval).run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        table.close()
+
+
+class ShardedEngine(MultiSymbolEvaluator):
+    """
+    Multi-symbol engine split across worker processes.
+
+    The symbol list is cut into contiguous shards; each worker process runs
+    its own feed ingestion (see ShardWorker) and publishes into a shared
+    memory table. The coordinator keeps BTC reference flow and funding (both
+    single all-market streams), reads the table once per pass, marks symbols
+    whose rows changed as dirty and runs the usual scoring and alerting.
+    Dead workers are restarted.
+    """
+
+    def __init__(self, symbols, shards=SHARD_COUNT, clock=time.time, dry_run=False, uris=None,
+                 publish_interval=SHARD_PUBLISH_INTERVAL_SECONDS, interval=MULTI_EVAL_INTERVAL_SECONDS):
+        super().__init__(clock=clock, dry_run=dry_run)
+        self.symbols = parse_symbols(symbols)
+        self.uris = uris
+        self.publish_interval = publish_interval
+        self.interval = interval
+
+        shards = max(1, min(shards, len(self.symbols)))
+        size = -(-len(self.symbols) // shards)
+        self.shards = [(i, self.symbols[i:i + size]) for i in range(0, len(self.symbols), size)]
+
+        self.table = SharedStateTable.create(len(self.symbols))
+        self.snapshot = self.table.snapshot()
+        self.last_updated = self.snapshot[:, COLUMNS["updated"]].copy()
+        self.processes = {}
+
+        self.btc = BTCReferenceFeed()
+        self.funding_tracker = MultiFundingTracker([venue_instruments(s)["binance_perp"] for s in self.symbols])
+        for row, symbol in enumerate(self.symbols):
+            funding = self.funding_tracker.trackers[venue_instruments(symbol)["binance_perp"]]
+            self.states[symbol] = SymbolState(symbol, funding, clock, self.alert_delivery, row=row)
+
+    def start_workers(self):
+        for first_row, _ in self.shards:
+            self._start_worker(first_row)
+
+    def _start_worker(self, first_row):
+        symbols = dict(self.shards)[first_row]
+        # A worker killed between the two seq bumps leaves its rows odd forever
+        self.table.release(first_row, len(symbols))
+        ctx = multiprocessing.get_context("spawn")
+        process = ctx.Process(
+            target=run_shard,
+            args=(self.table.name, self.table.rows, symbols, first_row, self.uris, self.publish_interval),
+            name=f"shard-{first_row}",
+            daemon=True
+        )
+        process.start()
+        self.processes[first_row] = process
+
+    def check_workers(self):
+        for first_row, process in list(self.processes.items()):
+            if not process.is_alive():
+                print(f"⚠️ Shard {process.name} exited with {process.exitcode}, restarting.")
+                self._start_worker(first_row)
+
+    def stop_workers(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join(timeout=5)
+        self.processes = {}
+
+    def refresh(self):
+        # One consistent read of the table per pass; changed rows become dirty
+        self.snapshot = self.table.snapshot()
+        updated = self.snapshot[:, COLUMNS["updated"]]
+        for row in (updated != self.last_updated).nonzero()[0]:
+            self.states[self.symbols[row]].dirty = True
+        self.last_updated = updated.copy()
+
+    def evaluate_pass(self):
+        self.refresh()
+        return super().evaluate_pass()
+
+    def read_flows(self, state):
+        r = self.snapshot[state.row]
+        return (
+            round(float(r[COLUMNS["cb_cvd"]]), 2),
+            round(float(r[COLUMNS["bin_spot"]]), 2),
+            round(float(r[COLUMNS["bin_perp"]]), 2),
+            round(float(r[COLUMNS["bybit_cvd"]]), 2),
+            round(float(r[COLUMNS["okx_cvd"]]), 2),
+            float(r[COLUMNS["price"]]) or None
+        )
+
+    def btc_spot(self):
+        return round(self.btc.spot_tape.cvd, 2)
+
+    def check_spike(self, state):
+        # Published by the symbol's worker from every perp trade
+        r = self.snapshot[state.row]
+        return {"spike": bool(r[COLUMNS["spike"]]), "net_delta": float(r[COLUMNS["spike_delta"]])}
+
+    def get_shard_stats(self):
+        trades = self.snapshot[:, COLUMNS["trades"]]
+        return {
+            f"shard-{first_row}": {
+                "symbols": len(symbols),
+                "alive": first_row in self.processes and self.processes[first_row].is_alive(),
+                "trades": int(trades[first_row:first_row + len(symbols)].sum())
+            }
+            for first_row, symbols in self.shards
+        }
+
+    async def supervise_workers(self, interval=5.0):
+        while True:
+            await asyncio.sleep(interval)
+            self.check_workers()
+
+    async def run(self):
+        print(f"[SHARDED] {len(self.symbols)} symbols across {len(self.shards)} worker processes")
+        self.start_workers()
+        try:
+            await asyncio.gather(
+                self.btc.connect(),
+                self.funding_tracker.connect(),
+                self.supabase_writer.run(),
+                self.alert_delivery.run(),
+                self.metrics_server.run(),
+                self.profiler.run(),
+                self.supervise_workers(),
+                self.monitor(self.interval)
+            )
+        finally:
+            self.stop_workers()
+            self.table.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the multi-symbol engine with feed ingestion sharded across processes.")
+    parser.add_argument("--symbols", default=MULTI_SYMBOLS, help="comma-separated base assets (default: MULTI_SYMBOLS env)")
+    parser.add_argument("--shards", type=int, default=SHARD_COUNT, help="worker processes (default: SHARD_COUNT env or CPU count)")
+    parser.add_argument("--interval", type=float, default=MULTI_EVAL_INTERVAL_SECONDS, help="coordinator pass interval in seconds")
+    parser.add_argument("--profile", action="store_true", help="time coordinator stages and sample stacks (same as PROFILE=true)")
+    args = parser.parse_args()
+    if args.profile:
+        get_profiler().enabled = True
+
+    engine = ShardedEngine(args.symbols, shards=args.shards, interval=args.interval)
+    asyncio.run(engine.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,14 @@ import time
 from datetime import datetime
 
 class SniperExecutor:
-    def __init__(self, score_threshold=7.0):
+    def __init__(self, score_threshold=7.0, clock=time.time):
+        self.clock = clock
         self.last_trade_time = 0
         self.cooldown = 900  # 15 min cooldown
         self.score_threshold = score_threshold
 
     def should_execute(self, confidence, label):
-        now = time.time()
+        now = self.clock()
         if confidence >= self.score_threshold and label == "spot_dominant":
             if now - self.last_trade_time > self.cooldown:
                 return True
@@ -19,7 +20,7 @@ class SniperExecutor:
 
     def execute(self, signal, confidence, price, label):
         timestamp = datetime.utcnow().isoformat()
-        self.last_trade_time = time.time()
+        self.last_trade_time = self.clock()
 
         trade = {
             "timestamp": timestamp,
@@ -1,66 +1,124 @@
 # sniper_pattern_learner.py
+#
+# Per-signal trap/breakout rates over the full snapshot history. Supabase
+# `cvd_snapshots` is synced incrementally into a local SQLite cache
+# (utils/snapshot_cache.py), so each run only downloads rows newer than the
+# last one and the rates are computed with numpy group-bys over every row.
+#
+#   python sniper_pattern_learner.py [--cache path] [--no-sync] [--full] [--since-days 30]
 
-import os
+import argparse
+import time
 import requests
-from collections import defaultdict
-from datetime import datetime
-
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-def fetch_recent_snapshots(limit=100):
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}"
-    }
-    url = f"{SUPABASE_URL}/rest/v1/cvd_snapshots?order=timestamp.desc&limit={limit}"
-
-    resp = requests.get(url, headers=headers)
-    if resp.status_code == 200:
-        return resp.json()
-    else:
-        print(f"❌ Failed to fetch snapshots: {resp.status_code}")
-        return []
+import numpy as np
+from dotenv import load_dotenv
 
-def analyze_patterns(snapshots):
-    pattern_counts = defaultdict(int)
-    outcome_counts = defaultdict(int)
-    trap_signals = 0
-    breakout_signals = 0
+from utils.snapshot_cache import SnapshotCache, SupabaseSnapshotSource, SNAPSHOT_CACHE_PATH
+
+load_dotenv()
 
-    for snap in snapshots:
-        signal = snap.get("signal", "UNKNOWN")
-        outcome = snap.get("confirmed_outcome", "unknown")
+def pattern_stats(signals, outcomes, strings, trap="trap", breakout="breakout"):
+    """
+    Occurrences, labelled rows and trap/breakout rates per signal from
+    dictionary-coded arrays (`strings[code]` is the text). Rates are over
+    all occurrences of the signal. Sorted by occurrences, most first.
+    """
+    signals = np.asarray(signals, dtype=np.int64)
+    outcomes = np.asarray(outcomes, dtype=np.int64)
+    size = len(strings)
 
-        pattern_counts[signal] += 1
-        outcome_counts[(signal, outcome)] += 1
+    def code(value):
+        return strings.index(value) if value in strings else -1
 
-        if outcome == "trap":
-            trap_signals += 1
-        elif outcome == "breakout":
-            breakout_signals += 1
+    counts = np.bincount(signals, minlength=size)
+    labelled = np.bincount(signals[outcomes != 0], minlength=size)
+    traps = np.bincount(signals[outcomes == code(trap)], minlength=size)
+    breakouts = np.bincount(signals[outcomes == code(breakout)], minlength=size)
 
+    stats = []
+    for c in np.flatnonzero(counts)[np.argsort(-counts[counts > 0], kind="stable")]:
+        count = int(counts[c])
+        stats.append({
+            "signal": strings[c] if strings[c] is not None else "UNKNOWN",
+            "count": count,
+            "labelled": int(labelled[c]),
+            "traps": int(traps[c]),
+            "breakouts": int(breakouts[c]),
+            "trap_rate": traps[c] / count * 100,
+            "breakout_rate": breakouts[c] / count * 100
+        })
+    return stats
+
+def print_report(stats):
     print("\n🧠 SNIPER PATTERN LEARNER REPORT")
     print("--------------------------------------------------")
-    for signal, count in pattern_counts.items():
-        trap_rate = 0
-        breakout_rate = 0
-        if count > 0:
-            trap_rate = (outcome_counts.get((signal, "trap"), 0) / count) * 100
-            breakout_rate = (outcome_counts.get((signal, "breakout"), 0) / count) * 100
-
-        print(f"🔍 Signal: {signal}")
-        print(f"   - Occurrences: {count}")
-        print(f"   - Trap Rate: {trap_rate:.1f}%")
-        print(f"   - Breakout Rate: {breakout_rate:.1f}%\n")
-
-    print(f"📊 Total Trap Signals: {trap_signals}")
-    print(f"📈 Total Breakout Signals: {breakout_signals}")
+    for s in stats:
+        print(f"🔍 Signal: {s['signal']}")
+        print(f"   - Occurrences: {s['count']} ({s['labelled']} labelled)")
+        print(f"   - Trap Rate: {s['trap_rate']:.1f}%")
+        print(f"   - Breakout Rate: {s['breakout_rate']:.1f}%\n")
+
+    print(f"📊 Total Trap Signals: {sum(s['traps'] for s in stats)}")
+    print(f"📈 Total Breakout Signals: {sum(s['breakouts'] for s in stats)}")
     print("--------------------------------------------------")
 
+def analyze_patterns(snapshots):
+    # Row dicts as returned by Supabase; coded on the fly for pattern_stats()
+    strings = [None]
+    codes = {}
+
+    def encode(value):
+        if value is None:
+            return 0
+        if value not in codes:
+            codes[value] = len(strings)
+            strings.append(value)
+        return codes[value]
+
+    signals = [encode(snap.get("signal", "UNKNOWN")) for snap in snapshots]
+    outcomes = [encode(snap.get("confirmed_outcome")) for snap in snapshots]
+    stats = pattern_stats(signals, outcomes, strings)
+    print_report(stats)
+    return stats
+
+def analyze_cache(cache, since_days=None):
+    start_ts = time.time() - since_days * 86400 if since_days else None
+    cols = cache.columns(("signal", "outcome"), start_ts=start_ts)
+    stats = pattern_stats(cols["signal"], cols["outcome"], cache.strings())
+    print_report(stats)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Trap/breakout rates per signal over the cached snapshot history.")
+    parser.add_argument("--cache", default=SNAPSHOT_CACHE_PATH, help="local SQLite cache (default: SNAPSHOT_CACHE_PATH env)")
+    parser.add_argument("--no-sync", action="store_true", help="analyze the cache without contacting Supabase")
+    parser.add_argument("--full", action="store_true", help="drop the cache and download everything again")
+    parser.add_argument("--page-size", type=int, default=1000)
+    parser.add_argument("--since-days", type=float, help="only analyze the last N days")
+    args = parser.parse_args()
+
+    cache = SnapshotCache(args.cache)
+    try:
+        if args.full:
+            cache.reset()
+
+        if not args.no_sync:
+            source = SupabaseSnapshotSource()
+            if source.is_configured():
+                try:
+                    result = cache.sync(source, page_size=args.page_size)
+                    print(f"🔄 Synced {result['rows']} new snapshots in {result['pages']} pages ({result['seconds']}s)")
+                except requests.RequestException as e:
+                    print(f"❌ Snapshot sync failed, analyzing cached rows: {e}")
+            else:
+                print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
+
+        if cache.count():
+            analyze_cache(cache, args.since_days)
+        else:
+            print("⚠️ No data available to analyze.")
+    finally:
+        cache.close()
+
 if __name__ == "__main__":
-    snapshots = fetch_recent_snapshots(limit=250)
-    if snapshots:
-        analyze_patterns(snapshots)
-    else:
-        print("⚠️ No data available to analyze.")
+    main()
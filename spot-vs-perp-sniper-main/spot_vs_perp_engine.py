@@ -1,3 +1,4 @@
+import argparse
 import asyncio
 import os
 import time
@@ -13,169 +14,288 @@ from feeds.delta_spike_feed import DeltaSpikeTracker
 from feeds.btc_reference_feed import BTCReferenceFeed
 
 from utils.alert_cluster_buffer import AlertClusterBuffer
-from utils.discord_alert import send_discord_alert
+from utils.alert_delivery import get_delivery
+from utils.frame_recorder import FrameRecorder
 from utils.memory_logger import log_snapshot
+from utils.metrics import MetricsServer, histogram
 from utils.cvd_snapshot_writer import write_snapshot_to_supabase
 from utils.multi_tf_memory import MultiTFMemory
+from utils.profiler import get_profiler
+from utils.signal_ladder import LADDER, NO_SIGNAL
+from utils.supabase_writer import get_writer
 from utils.spot_perp_alert_dispatcher import SpotPerpAlertDispatcher
 from utils.spot_perp_scorer import score_spot_perp_confluence_multi
 from sniper_executor import SniperExecutor
 
 load_dotenv()
 FORCE_TEST_ALERT = os.getenv("FORCE_TEST_ALERT", "false").lower() == "true"
+RECORD_FRAMES_DIR = os.getenv("RECORD_FRAMES_DIR")
+
+# "poll" evaluates every POLL_INTERVAL_SECONDS; "event" re-evaluates when feeds
+# report new trades, coalescing bursts for EVENT_DEBOUNCE_SECONDS and never
+# going longer than EVENT_MAX_STALENESS_SECONDS without an evaluation.
+MONITOR_MODE = os.getenv("MONITOR_MODE", "poll").lower()
+POLL_INTERVAL_SECONDS = 5
+EVENT_DEBOUNCE_SECONDS = float(os.getenv("EVENT_DEBOUNCE_SECONDS", "0.15"))
+EVENT_MAX_STALENESS_SECONDS = float(os.getenv("EVENT_MAX_STALENESS_SECONDS", "5"))
+
+# Comma-separated CVD memory timeframes, e.g. "1m,5m,15m,1h,4h"
+MEMORY_TIMEFRAMES = tuple(os.getenv("MEMORY_TIMEFRAMES", "5m,15m,1h").split(","))
+
+EVALUATE_SECONDS = histogram("engine_evaluate_seconds", "Duration of one monitor() evaluation")
 
 class SpotVsPerpEngine:
-    def __init__(self):
+    def __init__(self, clock=time.time, dry_run=False, recorder=None, mode=MONITOR_MODE):
+        # clock: swapped for a ReplayClock when replaying recorded frames
+        # dry_run: skip file/Supabase/Discord/executor side effects and the console report
+        self.clock = clock
+        self.dry_run = dry_run
+        self.mode = mode
+
         self.coinbase = CoinbaseSpotCVD(product_id="SOL-USD")
         self.binance = BinanceCVDTracker(spot_symbol="SOLUSDT", perp_symbol="SOLUSDT")
         self.bybit = BybitCVDTracker(symbol="SOLUSDT")
         self.okx = OKXCVDTracker(instId="SOL-USDT-SWAP")
         self.btc = BTCReferenceFeed()
         self.funding_tracker = FundingRateTracker()
-        self.delta_tracker = DeltaSpikeTracker()
-
-        self.memory = MultiTFMemory()
-        self.alert_buffer = AlertClusterBuffer(buffer_window=60)
-        self.alert_dispatcher = SpotPerpAlertDispatcher()
-        self.executor = SniperExecutor()
+        self.delta_tracker = DeltaSpikeTracker(clock=clock)
+        # The spike tracker sees every Binance perp trade rather than one CVD sample per evaluation
+        self.binance.on_perp_trades = self.delta_tracker.add_trades
+
+        self.memory = MultiTFMemory(timeframes=MEMORY_TIMEFRAMES, clock=clock)
+        self.alert_buffer = AlertClusterBuffer(buffer_window=60, clock=clock)
+        self.alert_delivery = get_delivery()
+        self.alert_dispatcher = SpotPerpAlertDispatcher(clock=clock, delivery=self.alert_delivery)
+        self.executor = SniperExecutor(clock=clock)
+        self.supabase_writer = get_writer()
+        self.metrics_server = MetricsServer()
+        self.profiler = get_profiler()
 
         self.signal_cooldown_seconds = 300
         self.last_signal = None
         self.last_signal_time = 0
         self.last_signal_hash = ""
 
+        self.last_report_time = 0
+        self.last_report_signal = None
+
+        if recorder is None and RECORD_FRAMES_DIR:
+            recorder = FrameRecorder(RECORD_FRAMES_DIR)
+        self.recorder = recorder
+        for feed in self.stream_feeds():
+            feed.recorder = recorder
+
+        self.update_event = asyncio.Event()
+        if mode == "event":
+            # Only trades wake the monitor; funding ticks (markPrice@1s, Bybit
+            # tickers every ~100ms) would keep it evaluating with nothing new
+            for feed in self.trade_feeds():
+                feed.on_update = self.update_event.set
+
+    def trade_feeds(self):
+        return [self.coinbase, self.binance, self.bybit, self.okx, self.btc]
+
+    def stream_feeds(self):
+        return self.trade_feeds() + [self.funding_tracker]
+
+    def frame_handlers(self):
+        handlers = {}
+        for feed in self.stream_feeds():
+            handlers.update(feed.frame_handlers())
+        return handlers
+
+    def get_stream_stats(self):
+        # Reconnects, time-to-recover and trades lost per websocket stream
+        stats = {}
+        for feed in self.stream_feeds():
+            stats.update(feed.get_stream_stats())
+        return stats
+
     async def run(self):
-        await asyncio.gather(
-            self.coinbase.connect(),
-            self.binance.connect(),
-            self.bybit.connect(),
-            self.okx.connect(),
-            self.btc.connect(),
-            self.monitor()
-        )
+        try:
+            await asyncio.gather(
+                self.coinbase.connect(),
+                self.binance.connect(),
+                self.bybit.connect(),
+                self.okx.connect(),
+                self.btc.connect(),
+                self.funding_tracker.connect(),
+                self.supabase_writer.run(),
+                self.alert_delivery.run(),
+                self.metrics_server.run(),
+                self.profiler.run(),
+                self.monitor_events() if self.mode == "event" else self.monitor()
+            )
+        finally:
+            if self.recorder:
+                self.recorder.close()
 
     async def monitor(self):
         while True:
             try:
-                cb_cvd = self.coinbase.get_cvd()
-                cb_price = self.coinbase.get_last_price()
-
-                bin_data = self.binance.get_cvd()
-                bin_spot = bin_data["spot"]
-                bin_perp = bin_data["perp"]
-                bin_price = bin_data["price"]
-
-                bybit_cvd = self.bybit.get_cvd()
-                bybit_price = self.bybit.get_price()
-
-                okx_cvd = self.okx.get_cvd()
-                okx_price = self.okx.get_price()
-
-                await self.funding_tracker.update()
-                self.delta_tracker.add_tick(bin_perp)
-                spike_data = self.delta_tracker.check_spike()
-
-                btc_data = self.btc.get_deltas()
-                btc_spot = btc_data["btc_spot"]
-                btc_perp = btc_data["btc_perp"]
-                btc_price = btc_data["price"]
-
-                self.memory.update(cb_cvd, bin_spot, bin_perp)
-                deltas = self.memory.get_all_deltas()
-                scored = score_spot_perp_confluence_multi(deltas)
-                confidence = scored["score"]
-                bias_label = scored["label"]
-
-                signal = "📊 No clear bias"
-
-                if bin_perp > 0 and cb_cvd < 0 and bin_spot < 0:
-                    signal = "🔻 Perp pump + spot fade — bull trap forming (short opportunity)"
-
-                elif self.funding_tracker.get_average() < -0.01 and cb_cvd > 0:
-                    signal = "💥 Negative funding + Spot buying — short squeeze trap"
-
-                elif spike_data["spike"] and cb_cvd < 0:
-                    signal = "🔥 Perp delta spike + Spot selling — buyer trap likely"
-
-                elif cb_cvd > 0 and bin_spot > 0 and bin_perp < 0 and btc_spot > 0:
-                    signal = "✅ Spot-led move with BTC confirmation — strong demand"
-
-                elif cb_cvd > 0 and bin_spot > 0 and btc_spot < 0:
-                    signal = "⚠️ SOL spot strong but BTC fading — possible local top"
-
-                elif bin_perp > 0 and cb_cvd < 0 and bin_spot <= 0:
-                    signal = "🚨 Perp-led pump — no spot participation (trap)"
-
-                elif bybit_cvd > 0 and bin_perp < 0:
-                    signal = "⚠️ Bybit retail buying, Binance fading — exit risk"
-
-                elif okx_cvd < 0 and bin_perp > 0:
-                    signal = "🟡 OKX selling, Binance buying — Asia dump risk"
-
-                elif cb_cvd > 0 and bin_spot < 0:
-                    signal = "🕣 Coinbase buying, Binance Spot selling — divergence"
-
-                print("\n==================== SPOT vs PERP REPORT (SOL) ====================")
-                print(f"🟩 CB Spot CVD: {cb_cvd} | Price: {cb_price}")
-                print(f"🗭 Binance Spot CVD: {bin_spot}")
-                print(f"🔳 Binance Perp CVD: {bin_perp} | Price: {bin_price}")
-                print(f"🕧 Bybit Perp CVD: {bybit_cvd} | Price: {bybit_price}")
-                print(f"🕪 OKX CVD: {okx_cvd} | Price: {okx_price}")
-                print(f"📉 Funding Rate: {self.funding_tracker.get_average()}%")
-                print(f"⚡ Delta Spike: {spike_data}")
-                print(f"🔗 BTC Spot: {btc_spot} | BTC Perp: {btc_perp} | Price: {btc_price}")
-                print(f"\n🧠 Signal: {signal}")
-                for tf, tf_deltas in deltas.items():
-                    print(f"🕒 {tf} Δ → CB: {tf_deltas['cb_cvd']}% | Spot: {tf_deltas['bin_spot']}% | Perp: {tf_deltas['bin_perp']}%")
-                print(f"💡 Confidence: {confidence}/10 → {bias_label.upper()}")
-                print("====================================================================")
-
-                snapshot = {
-                    "exchange": "multi",
-                    "signal": signal,
-                    "confidence": confidence,
-                    "bias": bias_label,
-                    "price": bin_price or cb_price or bybit_price or okx_price,
-                    "funding_rate": self.funding_tracker.get_average(),
-                    "spike": spike_data["spike"],
-                    "spike_delta": spike_data["net_delta"],
-                    "btc_spot": btc_spot,
-                    "btc_perp": btc_perp
-                }
-
-                log_snapshot(snapshot)
-
-                now = time.time()
-                signal_signature = f"{signal}-{bin_spot}-{cb_cvd}-{bin_perp}"
-                signal_hash = hashlib.sha256(signal_signature.encode()).hexdigest()
-
-                is_unique = signal_hash != self.last_signal_hash
-                is_cooldown = now - self.last_signal_time > self.signal_cooldown_seconds
-                is_meaningful = any(tag in signal for tag in ["✅", "🚨", "⚠️", "🟡", "🕣", "💥", "🔥", "🔻"])
-
-                if is_unique and is_cooldown and is_meaningful:
-                    write_snapshot_to_supabase(snapshot)
-                    self.last_signal = signal
-                    self.last_signal_time = now
-                    self.last_signal_hash = signal_hash
-
-                if self.alert_buffer.should_send(signal, confidence, bias_label):
-                    await self.alert_dispatcher.maybe_alert(
-                        signal,
-                        confidence,
-                        bias_label,
-                        deltas.get("15m", {}),
-                        force_test=FORCE_TEST_ALERT
-                    )
-
-                if self.executor.should_execute(confidence, bias_label):
-                    self.executor.execute(signal, confidence, bin_price or cb_price, bias_label)
+                await self.timed_evaluate()
+            except Exception as e:
+                print(f"[ERROR] Monitor loop failed: {e}")
+
+            await asyncio.sleep(POLL_INTERVAL_SECONDS)
+
+    async def monitor_events(self, debounce=EVENT_DEBOUNCE_SECONDS, max_staleness=EVENT_MAX_STALENESS_SECONDS):
+        while True:
+            try:
+                await asyncio.wait_for(self.update_event.wait(), timeout=max_staleness)
+                # Let the rest of the burst land before evaluating once
+                await asyncio.sleep(debounce)
+            except asyncio.TimeoutError:
+                pass
 
+            self.update_event.clear()
+            try:
+                await self.timed_evaluate()
             except Exception as e:
                 print(f"[ERROR] Monitor loop failed: {e}")
 
-            await asyncio.sleep(5)
+    async def timed_evaluate(self):
+        started = time.perf_counter()
+        try:
+            return await self.evaluate()
+        finally:
+            EVALUATE_SECONDS.observe(time.perf_counter() - started)
+
+    async def evaluate(self):
+        lap = self.profiler.laps()
+
+        cb_cvd = self.coinbase.get_cvd()
+        cb_price = self.coinbase.get_last_price()
+
+        bin_data = self.binance.get_cvd()
+        bin_spot = bin_data["spot"]
+        bin_perp = bin_data["perp"]
+        bin_price = bin_data["price"]
+
+        bybit_cvd = self.bybit.get_cvd()
+        bybit_price = self.bybit.get_price()
+
+        okx_cvd = self.okx.get_cvd()
+        okx_price = self.okx.get_price()
+        lap("read_feeds")
+
+        spike_data = self.delta_tracker.check_spike()
+        lap("delta_spike")
+
+        btc_data = self.btc.get_deltas()
+        btc_spot = btc_data["btc_spot"]
+        btc_perp = btc_data["btc_perp"]
+        btc_price = btc_data["price"]
+        lap("btc_reference")
+
+        self.memory.update(cb_cvd, bin_spot, bin_perp)
+        deltas = self.memory.get_all_deltas()
+        lap("memory")
+        scored = score_spot_perp_confluence_multi(deltas)
+        confidence = scored["score"]
+        bias_label = scored["label"]
+        lap("scorer")
+
+        rule = LADDER.match(
+            cb_cvd,
+            bin_spot,
+            bin_perp,
+            bybit_cvd,
+            okx_cvd,
+            btc_spot,
+            self.funding_tracker.get_average(),
+            spike_data["spike"]
+        )
+        signal = rule.text if rule else NO_SIGNAL
+        lap("funding_and_signal")
+
+        # Event mode can evaluate several times a second; only print the
+        # report when the signal changes or on the poll cadence
+        now = self.clock()
+        should_report = signal != self.last_report_signal or now - self.last_report_time >= POLL_INTERVAL_SECONDS
+
+        if not self.dry_run and should_report:
+            self.last_report_time = now
+            self.last_report_signal = signal
+            print("\n==================== SPOT vs PERP REPORT (SOL) ====================")
+            print(f"🟩 CB Spot CVD: {cb_cvd} | Price: {cb_price}")
+            print(f"🗭 Binance Spot CVD: {bin_spot}")
+            print(f"🔳 Binance Perp CVD: {bin_perp} | Price: {bin_price}")
+            print(f"🕧 Bybit Perp CVD: {bybit_cvd} | Price: {bybit_price}")
+            print(f"🕪 OKX CVD: {okx_cvd} | Price: {okx_price}")
+            print(f"📉 Funding Rate: {self.funding_tracker.get_average()}%")
+            spike_windows = " | ".join(
+                f"{tf} {w['net_delta']:.2f}" + (f" (z {w['z']:.1f})" if w["z"] is not None else "")
+                for tf, w in spike_data["windows"].items()
+            )
+            print(f"⚡ Delta Spike: {spike_data['spike']} | {spike_windows}")
+            print(f"🔗 BTC Spot: {btc_spot} | BTC Perp: {btc_perp} | Price: {btc_price}")
+            print(f"\n🧠 Signal: {signal}")
+            for tf, tf_deltas in deltas.items():
+                print(f"🕒 {tf} Δ → CB: {tf_deltas['cb_cvd']}% | Spot: {tf_deltas['bin_spot']}% | Perp: {tf_deltas['bin_perp']}%")
+            print(f"💡 Confidence: {confidence}/10 → {bias_label.upper()}")
+            print("====================================================================")
+        lap("report")
+
+        snapshot = {
+            "exchange": "multi",
+            "signal": signal,
+            "confidence": confidence,
+            "bias": bias_label,
+            "price": bin_price or cb_price or bybit_price or okx_price,
+            "funding_rate": self.funding_tracker.get_average(),
+            "spike": spike_data["spike"],
+            "spike_delta": spike_data["net_delta"],
+            "btc_spot": btc_spot,
+            "btc_perp": btc_perp
+        }
+
+        if not self.dry_run:
+            log_snapshot(snapshot, ts=now)
+        lap("log_snapshot")
+
+        signal_signature = f"{signal}-{bin_spot}-{cb_cvd}-{bin_perp}"
+        signal_hash = hashlib.sha256(signal_signature.encode()).hexdigest()
+
+        is_unique = signal_hash != self.last_signal_hash
+        is_cooldown = now - self.last_signal_time > self.signal_cooldown_seconds
+        is_meaningful = rule is not None and rule.meaningful
+
+        if is_unique and is_cooldown and is_meaningful:
+            if not self.dry_run:
+                write_snapshot_to_supabase(snapshot, self.supabase_writer)
+            self.last_signal = signal
+            self.last_signal_time = now
+            self.last_signal_hash = signal_hash
+        lap("supabase")
+
+        if self.dry_run:
+            lap.finish()
+            return snapshot
+
+        if self.alert_buffer.should_send(signal, confidence, bias_label):
+            self.alert_dispatcher.maybe_alert(
+                signal,
+                confidence,
+                bias_label,
+                deltas.get("15m", {}),
+                force_test=FORCE_TEST_ALERT
+            )
+        lap("alerts")
+
+        if self.executor.should_execute(confidence, bias_label):
+            self.executor.execute(signal, confidence, bin_price or cb_price, bias_label)
+        lap("executor")
+
+        lap.finish()
+        return snapshot
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the SOL spot-vs-perp engine.")
+    parser.add_argument("--profile", action="store_true", help="time engine stages and sample stacks (same as PROFILE=true)")
+    args = parser.parse_args()
+    if args.profile:
+        get_profiler().enabled = True
+
     engine = SpotVsPerpEngine()
     asyncio.run(engine.run())
@@ -0,0 +1,46 @@
+import numpy as np
+
+from outcome_labeller import BREAKOUT, NONE, TRAP, UNLABELLED, label_events, signal_directions
+from utils.signal_ladder import LADDER
+
+HOUR = 3600.0
+
+
+def path(end_pct, seconds=2 * HOUR, step=5.0, start=100.0):
+    ts = np.arange(0.0, seconds + step, step)
+    price = start * (1 + end_pct / 100 * ts / seconds)
+    return ts, price
+
+
+def directions(*names):
+    return np.array([LADDER.by_name[name].direction for name in names])
+
+
+def test_bearish_rule_on_falling_price_is_breakout():
+    ts, price = path(-3.0)
+    result = label_events([0.0], directions("bull_trap"), ts, price, HOUR, 1.0, 1.0)
+    assert result["outcome"][0] == BREAKOUT
+    assert result["mfe"][0] > 1.0
+
+
+def test_bearish_rule_on_rising_price_is_trap():
+    ts, price = path(3.0)
+    result = label_events([0.0, 0.0], directions("bull_trap", "asia_dump_risk"), ts, price, HOUR, 1.0, 1.0)
+    assert list(result["outcome"]) == [TRAP, TRAP]
+
+
+def test_bullish_rule_on_rising_price_is_breakout():
+    ts, price = path(3.0)
+    result = label_events([0.0], directions("short_squeeze"), ts, price, HOUR, 1.0, 1.0)
+    assert result["outcome"][0] == BREAKOUT
+
+
+def test_flat_price_is_none_and_undirected_rules_are_skipped():
+    ts, price = path(0.0)
+    result = label_events([0.0, 0.0], directions("bull_trap", "cb_binance_divergence"), ts, price, HOUR, 1.0, 1.0)
+    assert list(result["outcome"]) == [NONE, UNLABELLED]
+
+
+def test_signal_directions_follow_the_ladder():
+    strings = [None, LADDER.by_name["bull_trap"].text, LADDER.by_name["short_squeeze"].text, "not a rule"]
+    assert list(signal_directions(strings)) == [0, -1, 1, 0]
@@ -2,7 +2,8 @@ import time
 import hashlib
 
 class AlertClusterBuffer:
-    def __init__(self, buffer_window=60):
+    def __init__(self, buffer_window=60, clock=time.time):
+        self.clock = clock
         self.last_signal_hash = None
         self.last_sent_time = 0
         self.buffer_window = buffer_window
@@ -10,7 +11,7 @@ class AlertClusterBuffer:
         self.pending_count = 0
 
     def should_send(self, signal_text, confidence, label):
-        now = time.time()
+        now = self.clock()
         fingerprint = f"{signal_text}-{confidence}-{label}"
         signal_hash = hashlib.sha256(fingerprint.encode()).hexdigest()
 
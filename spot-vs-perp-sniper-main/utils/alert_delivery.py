@@ -0,0 +1,257 @@
+# utils/alert_delivery.py
+
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+
+import aiohttp
+
+from utils import metrics
+
+DISCORD_MAX_CONTENT = 2000
+
+DELIVERY_SECONDS = metrics.histogram("alert_delivery_seconds", "Time to deliver one coalesced alert batch", ["sink"])
+DELIVERY_FAILURES = metrics.counter("alert_delivery_failures_total", "Alert batches that timed out or failed", ["sink", "reason"])
+DROPPED_ALERTS = metrics.counter("alert_dropped_total", "Alerts dropped because a sink queue was full", ["sink"])
+
+
+class RateLimited(Exception):
+    """
+    Raised by a sink that must wait `retry_after` seconds; the first
+    `delivered` messages of the batch already went out.
+    """
+
+    def __init__(self, retry_after, delivered=0):
+        super().__init__(f"rate limited for {retry_after:.1f}s")
+        self.retry_after = retry_after
+        self.delivered = delivered
+
+
+class DiscordSink:
+    """
+    Posts to a Discord webhook and honours its rate-limit headers
+    (X-RateLimit-Remaining / X-RateLimit-Reset-After, 429 retry_after).
+
+    It never sleeps out a rate limit itself: it raises RateLimited and the
+    delivery worker waits until `blocked_until` outside the send timeout,
+    then retries the undelivered rest of the batch. `delivered` counts the
+    messages of the current batch already posted, so a send that times out
+    or fails part way is also retried from there. Any other non-2xx status
+    raises aiohttp.ClientResponseError.
+    """
+
+    def __init__(self, webhook_url, timeout=10.0, name="discord"):
+        self.webhook_url = webhook_url
+        self.timeout = timeout
+        self.name = name
+        self.blocked_until = 0
+        self.delivered = 0
+
+    async def send(self, session, messages):
+        self.delivered = 0
+        for content, completed in self._chunks(messages):
+            wait = self.blocked_until - time.monotonic()
+            if wait > 0:
+                raise RateLimited(wait, self.delivered)
+            await self._post(session, content, self.delivered)
+            self.delivered += completed
+
+    @staticmethod
+    def _chunks(messages):
+        # (content, messages completed by it): whole messages are packed into
+        # posts of up to DISCORD_MAX_CONTENT, longer ones are split
+        group = []
+        for message in messages:
+            if group and len("\n\n".join(group + [message])) > DISCORD_MAX_CONTENT:
+                yield "\n\n".join(group), len(group)
+                group = []
+            if len(message) > DISCORD_MAX_CONTENT:
+                for i in range(0, len(message), DISCORD_MAX_CONTENT):
+                    last = i + DISCORD_MAX_CONTENT >= len(message)
+                    yield message[i:i + DISCORD_MAX_CONTENT], 1 if last else 0
+                continue
+            group.append(message)
+        if group:
+            yield "\n\n".join(group), len(group)
+
+    async def _post(self, session, content, delivered):
+        async with session.post(self.webhook_url, json={"content": content}) as resp:
+            remaining = resp.headers.get("X-RateLimit-Remaining")
+            reset_after = resp.headers.get("X-RateLimit-Reset-After")
+            if remaining == "0" and reset_after:
+                self.blocked_until = time.monotonic() + float(reset_after)
+
+            if resp.status == 429:
+                try:
+                    retry_after = float((await resp.json()).get("retry_after", 1))
+                except (aiohttp.ContentTypeError, ValueError):
+                    retry_after = float(resp.headers.get("Retry-After", 1))
+                self.blocked_until = time.monotonic() + retry_after
+                raise RateLimited(retry_after, delivered)
+
+            resp.raise_for_status()
+            print("✅ SOL sniper alert sent to Discord.")
+
+
+class WebhookSink:
+    """
+    Posts {"alerts": [...]} to any HTTP endpoint.
+    """
+
+    def __init__(self, url, timeout=10.0, name="webhook"):
+        self.url = url
+        self.timeout = timeout
+        self.name = name
+
+    async def send(self, session, messages):
+        payload = {"sent_at": datetime.utcnow().isoformat(), "alerts": messages}
+        async with session.post(self.url, json=payload) as resp:
+            resp.raise_for_status()
+
+
+class FileSink:
+    """
+    Appends alerts to a local JSONL file.
+    """
+
+    def __init__(self, path, timeout=5.0, name="file"):
+        self.path = path
+        self.timeout = timeout
+        self.name = name
+
+    async def send(self, session, messages):
+        now = datetime.utcnow().isoformat()
+        with open(self.path, "a") as f:
+            for message in messages:
+                f.write(json.dumps({"timestamp": now, "message": message}) + "\n")
+
+
+class AlertDelivery:
+    """
+    Background alert fan-out.
+
+    enqueue() hands a message to every sink's own queue and returns
+    immediately. Each sink has a worker that coalesces whatever arrives within
+    `coalesce_window` into one delivery and runs it under the sink's timeout,
+    so a slow or rate-limited sink never holds up the others or the caller.
+    All HTTP sinks share one long-lived session.
+
+    A sink's `blocked_until` (rate limit) is waited out before the timed send
+    starts. Batches that hit a rate limit are retried from the first
+    undelivered message. Batches that time out or fail with an
+    aiohttp.ClientError (including a non-2xx status) are retried the same
+    way, up to `max_attempts` times, before they are dropped.
+    """
+
+    def __init__(self, sinks, coalesce_window=2.0, max_batch=10, max_queue=1000, max_attempts=3):
+        self.sinks = sinks
+        self.max_attempts = max_attempts
+        self.coalesce_window = coalesce_window
+        self.max_batch = max_batch
+        self.queues = {sink.name: asyncio.Queue(maxsize=max_queue) for sink in sinks}
+        self.session = None
+        self.stats = {sink.name: {"delivered": 0, "batches": 0, "dropped": 0, "timeouts": 0, "rate_limited": 0, "errors": 0, "last_latency": None}
+                      for sink in sinks}
+
+    def enqueue(self, message):
+        for sink in self.sinks:
+            try:
+                self.queues[sink.name].put_nowait(message)
+            except asyncio.QueueFull:
+                self.stats[sink.name]["dropped"] += 1
+                DROPPED_ALERTS.labels(sink.name).inc()
+
+    async def run(self):
+        if not self.sinks:
+            return
+        self.session = aiohttp.ClientSession()
+        try:
+            await asyncio.gather(*(self._worker(sink) for sink in self.sinks))
+        finally:
+            await self.session.close()
+
+    async def _worker(self, sink):
+        queue = self.queues[sink.name]
+        stats = self.stats[sink.name]
+
+        pending = []
+        attempts = 0
+        while True:
+            batch = pending or [await queue.get()]
+            deadline = time.monotonic() + self.coalesce_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            wait = getattr(sink, "blocked_until", 0) - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            pending = []
+            started = time.perf_counter()
+            try:
+                await asyncio.wait_for(sink.send(self.session, batch), timeout=sink.timeout)
+                stats["delivered"] += len(batch)
+                stats["batches"] += 1
+                attempts = 0
+            except RateLimited as e:
+                # Not a failure: wait it out on the next pass, resend the rest
+                stats["delivered"] += e.delivered
+                stats["rate_limited"] += 1
+                pending = batch[e.delivered:]
+            except (asyncio.TimeoutError, aiohttp.ClientError) as e:
+                if isinstance(e, asyncio.TimeoutError):
+                    stats["timeouts"] += 1
+                    DELIVERY_FAILURES.labels(sink.name, "timeout").inc()
+                    reason = f"timed out after {sink.timeout}s"
+                else:
+                    stats["errors"] += 1
+                    DELIVERY_FAILURES.labels(sink.name, "error").inc()
+                    reason = f"failed: {e}"
+                # Messages posted before the failure are not sent twice
+                delivered = getattr(sink, "delivered", 0)
+                stats["delivered"] += delivered
+                rest = batch[delivered:]
+                attempts += 1
+                if attempts < self.max_attempts:
+                    pending = rest
+                    print(f"❌ Alert sink '{sink.name}' {reason}, retrying ({attempts}/{self.max_attempts}).")
+                else:
+                    attempts = 0
+                    print(f"❌ Alert sink '{sink.name}' {reason}, dropping {len(rest)} alert(s).")
+            except Exception as e:
+                stats["errors"] += 1
+                DELIVERY_FAILURES.labels(sink.name, "error").inc()
+                print(f"❌ Alert sink '{sink.name}' failed: {e}")
+            stats["last_latency"] = time.perf_counter() - started
+            DELIVERY_SECONDS.labels(sink.name).observe(stats["last_latency"])
+
+
+def sinks_from_env():
+    sinks = []
+    if os.getenv("DISCORD_WEBHOOK_SOL"):
+        sinks.append(DiscordSink(os.getenv("DISCORD_WEBHOOK_SOL")))
+    if os.getenv("ALERT_WEBHOOK_URL"):
+        sinks.append(WebhookSink(os.getenv("ALERT_WEBHOOK_URL")))
+    if os.getenv("ALERT_LOG_FILE"):
+        sinks.append(FileSink(os.getenv("ALERT_LOG_FILE")))
+    return sinks
+
+
+_delivery = None
+
+def get_delivery():
+    global _delivery
+    if _delivery is None:
+        sinks = sinks_from_env()
+        if not sinks:
+            print("❌ No alert sinks configured (DISCORD_WEBHOOK_SOL, ALERT_WEBHOOK_URL, ALERT_LOG_FILE).")
+        _delivery = AlertDelivery(sinks)
+    return _delivery
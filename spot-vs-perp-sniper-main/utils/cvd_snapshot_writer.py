@@ -1,21 +1,23 @@
 # utils/cvd_snapshot_writer.py
 
 import os
-import requests
 from datetime import datetime
 
-# Load Supabase credentials from environment
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-
-def write_snapshot_to_supabase(snapshot):
-    # Guard clause if env vars missing
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
-        return
-
-    # Prepare payload
-    payload = {
+from utils.supabase_writer import get_writer
+
+# The original cvd_snapshots table has no symbol column and rejects rows that
+# carry one, so multi-symbol rows only include it once the table has it:
+#
+#   ALTER TABLE cvd_snapshots ADD COLUMN IF NOT EXISTS symbol text;
+#   CREATE INDEX IF NOT EXISTS cvd_snapshots_symbol_ts ON cvd_snapshots (symbol, timestamp);
+#
+# then set SUPABASE_SNAPSHOT_SYMBOL=1.
+def symbol_column_enabled():
+    # Read per call so values from load_dotenv() are picked up
+    return os.getenv("SUPABASE_SNAPSHOT_SYMBOL", "0").strip().lower() in ("1", "true", "yes")
+
+def build_snapshot_row(snapshot, with_symbol=None):
+    row = {
         "timestamp": datetime.utcnow().isoformat(),
         "exchange": snapshot.get("exchange", "unknown"),
         "spot_cvd": snapshot.get("spot_cvd", 0.0),
@@ -24,26 +26,20 @@ def write_snapshot_to_supabase(snapshot):
         "signal": snapshot.get("signal", "unspecified"),
         "confirmed_outcome": snapshot.get("confirmed_outcome", None)
     }
+    # Only multi-symbol snapshots carry a symbol; single-symbol rows keep the original shape
+    if with_symbol is None:
+        with_symbol = symbol_column_enabled()
+    if with_symbol and "symbol" in snapshot:
+        row["symbol"] = snapshot["symbol"]
+    return row
 
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=minimal"
-    }
+def write_snapshot_to_supabase(snapshot, writer=None):
+    # Queues the row for the background SupabaseWriter; never blocks the loop
+    writer = writer or get_writer()
 
-    url = f"{SUPABASE_URL}/rest/v1/cvd_snapshots"
-
-    try:
-        response = requests.post(url, json=payload, headers=headers)
-
-        if response.status_code == 201:
-            print("✅ Snapshot saved to Supabase.")
-        else:
-            print(f"❌ Supabase write failed.")
-            print(f"    Status: {response.status_code}")
-            print(f"    Response: {response.text}")
+    # Guard clause if env vars missing
+    if not writer.is_configured():
+        print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
+        return
 
-    except Exception as e:
-        print("❌ Exception during Supabase write:")
-        print(str(e))
+    writer.enqueue("cvd_snapshots", build_snapshot_row(snapshot))
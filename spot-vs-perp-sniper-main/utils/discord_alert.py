@@ -6,15 +6,22 @@ load_dotenv()
 
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_SOL")  # Set this in .env
 
+# One session for the life of the process instead of one per alert
+_session = None
+
 async def send_discord_alert(message: str):
+    # Direct one-off send; the engine delivers through utils.alert_delivery
+    global _session
     if not DISCORD_WEBHOOK_URL:
         print("❌ No Discord webhook set for SOL sniper alerts.")
         return
 
-    async with aiohttp.ClientSession() as session:
-        payload = {"content": message}
-        async with session.post(DISCORD_WEBHOOK_URL, json=payload) as resp:
-            if resp.status != 204:
-                print(f"❌ Discord webhook failed with status: {resp.status}")
-            else:
-                print("✅ SOL sniper alert sent to Discord.")
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10))
+
+    payload = {"content": message}
+    async with _session.post(DISCORD_WEBHOOK_URL, json=payload) as resp:
+        if resp.status != 204:
+            print(f"❌ Discord webhook failed with status: {resp.status}")
+        else:
+            print("✅ SOL sniper alert sent to Discord.")
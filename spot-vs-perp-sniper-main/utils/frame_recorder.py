@@ -0,0 +1,106 @@
+# utils/frame_recorder.py
+
+import glob
+import gzip
+import os
+import time
+
+SEGMENT_PATTERN = "frames-*.log.gz"
+
+
+class FrameRecorder:
+    """
+    Appends raw websocket frames to gzip segments, one line per frame:
+        <recv_ts>\t<stream>\t<raw frame>
+
+    Segments roll over by uncompressed size or age and are never rewritten.
+    Lines are buffered and compressed in batches to keep record() cheap.
+    """
+
+    def __init__(self, directory, segment_bytes=256 * 1024 * 1024, segment_seconds=3600,
+                 flush_bytes=256 * 1024, flush_seconds=5, compresslevel=3):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.flush_bytes = flush_bytes
+        self.flush_seconds = flush_seconds
+        self.compresslevel = compresslevel
+
+        self.frames = 0
+        self._file = None
+        self._segment_started = 0
+        self._segment_written = 0
+        self._segment_index = 0
+        self._buffer = []
+        self._buffered = 0
+        self._last_flush = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def record(self, stream, raw):
+        now = time.time()
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        line = f"{now:.6f}\t{stream}\t{raw}\n"
+
+        self._buffer.append(line)
+        self._buffered += len(line)
+        self.frames += 1
+
+        if self._buffered >= self.flush_bytes or now - self._last_flush >= self.flush_seconds:
+            self.flush(now)
+
+    def flush(self, now=None):
+        now = now or time.time()
+        self._last_flush = now
+        if not self._buffer:
+            return
+
+        if self._file is None or self._segment_written >= self.segment_bytes or now - self._segment_started >= self.segment_seconds:
+            self._open_segment(now)
+
+        data = "".join(self._buffer).encode()
+        self._file.write(data)
+        self._segment_written += len(data)
+        self._buffer = []
+        self._buffered = 0
+
+    def _open_segment(self, now):
+        if self._file is not None:
+            self._file.close()
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+        path = os.path.join(self.directory, f"frames-{stamp}-{self._segment_index:04d}.log.gz")
+        self._segment_index += 1
+
+        self._file = gzip.open(path, "ab", compresslevel=self.compresslevel)
+        self._segment_started = now
+        self._segment_written = 0
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def list_segments(directory):
+    # Segment names start with a UTC stamp, so lexical order is time order
+    return sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))
+
+
+def read_frames(directory):
+    """
+    Yields (recv_ts, stream, raw) from every segment in time order. A segment
+    cut short by a crash is read up to its last complete line.
+    """
+    for path in list_segments(directory):
+        with gzip.open(path, "rt") as f:
+            try:
+                for line in f:
+                    if not line.endswith("\n"):
+                        break
+                    ts, stream, raw = line.rstrip("\n").split("\t", 2)
+                    yield float(ts), stream, raw
+            except (EOFError, gzip.BadGzipFile) as e:
+                print(f"⚠️ Truncated frame segment {path}: {e}")
@@ -1,23 +1,25 @@
 # utils/memory_logger.py
 
-import json
+import os
 from datetime import datetime
 
-MEMORY_FILE = "cvd_memory.json"
+from utils.snapshot_log import SnapshotLog, SnapshotLogReader
 
-def log_snapshot(snapshot):
-    snapshot["timestamp"] = datetime.utcnow().isoformat()
+MEMORY_DIR = os.getenv("CVD_MEMORY_DIR", "cvd_memory")
+MEMORY_FSYNC = os.getenv("CVD_MEMORY_FSYNC", "interval")
+
+_log = None
 
-    try:
-        with open(MEMORY_FILE, "r") as f:
-            history = json.load(f)
-    except FileNotFoundError:
-        history = []
+def log_snapshot(snapshot, ts=None):
+    global _log
+    if _log is None:
+        _log = SnapshotLog(MEMORY_DIR, fsync=MEMORY_FSYNC)
 
-    history.append(snapshot)
+    snapshot["timestamp"] = datetime.utcnow().isoformat()
+    _log.append(snapshot, ts=ts)
 
-    # Limit file size
-    history = history[-500:]
+def tail_snapshots(n=500):
+    return SnapshotLogReader(MEMORY_DIR).tail(n)
 
-    with open(MEMORY_FILE, "w") as f:
-        json.dump(history, f, indent=2)
+def read_snapshots(start_ts=None, end_ts=None):
+    return SnapshotLogReader(MEMORY_DIR).range(start_ts, end_ts)
@@ -0,0 +1,265 @@
+# utils/metrics.py
+
+import asyncio
+import math
+import os
+import time
+from bisect import bisect_left
+
+from aiohttp import web
+
+# METRICS_PORT=0 (or empty) disables the /metrics listener; metrics are still
+# collected in memory
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108") or 0) or None
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+
+# Seconds; spans sub-millisecond handler times up to slow HTTP calls
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if value != value:
+        return "NaN"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "fn")
+
+    def __init__(self):
+        self.value = 0.0
+        self.fn = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, fn):
+        # Evaluated at scrape time instead of on every update
+        self.fn = fn
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class _Metric:
+    kind = None
+    child_class = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        if not self.labelnames:
+            self._default = self.labels()
+
+    def _new_child(self):
+        return self.child_class()
+
+    def labels(self, *values):
+        """
+        Child for one label combination; hold on to it in hot paths.
+        """
+        key = tuple(str(v) for v in values)
+        child = self.children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}, got {values}")
+            child = self.children[key] = self._new_child()
+        return child
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, child in list(self.children.items()):
+            lines.extend(self._render_child(_label_str(self.labelnames, key), key, child))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+    child_class = _CounterChild
+
+    def inc(self, amount=1):
+        self._default.inc(amount)
+
+    def _render_child(self, labels, key, child):
+        return [f"{self.name}{labels} {_format_value(child.value)}"]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+    child_class = _GaugeChild
+
+    def set(self, value):
+        self._default.set(value)
+
+    def set_function(self, fn):
+        self._default.set_function(fn)
+
+    def _render_child(self, labels, key, child):
+        try:
+            value = child.get()
+        except Exception:
+            value = math.nan
+        return [f"{self.name}{labels} {_format_value(value)}"]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def _render_child(self, labels, key, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (math.inf,), child.counts):
+            cumulative += count
+            le = _label_str(self.labelnames, key, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        # Modules that are imported (or reloaded) more than once share one metric
+        metric = self.metrics.get(name)
+        if metric is None:
+            metric = self.metrics[name] = cls(name, documentation, labelnames, **kwargs)
+        elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+            raise ValueError(f"metric {name} already registered with a different type or labels")
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+LOOP_LAG = histogram("event_loop_lag_seconds", "How late asyncio woke a periodic timer")
+
+
+async def watch_loop_lag(interval=0.5):
+    """
+    Sleeps `interval` in a loop and records how much later than asked the
+    loop resumed it; blocking callbacks show up directly as lag.
+    """
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        LOOP_LAG.observe(max(0.0, time.perf_counter() - started - interval))
+
+
+class MetricsServer:
+    """
+    Serves REGISTRY in Prometheus text format at /metrics and runs the
+    event-loop lag watcher alongside it.
+    """
+
+    def __init__(self, host=METRICS_HOST, port=METRICS_PORT, registry=REGISTRY):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.runner = None
+
+    async def handle_metrics(self, request):
+        return web.Response(text=self.registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        try:
+            await site.start()
+        except OSError as e:
+            # A taken port (second engine, shard next to its coordinator)
+            # must not take the engine down with it
+            print(f"[METRICS] Could not listen on {self.host}:{self.port}, /metrics disabled: {e}")
+            await self.runner.cleanup()
+            self.runner = None
+            return False
+        # Port 0 binds an ephemeral port; report the real one
+        self.port = site._server.sockets[0].getsockname()[1]
+        print(f"[METRICS] Serving http://{self.host}:{self.port}/metrics")
+        return True
+
+    async def run(self):
+        # port=None: lag watcher only; port=0: listen on an ephemeral port
+        if self.port is None or not await self.start():
+            await watch_loop_lag()
+            return
+        try:
+            await watch_loop_lag()
+        finally:
+            await self.runner.cleanup()
@@ -3,46 +3,150 @@
 import time
 from collections import deque
 
+DEFAULT_TIMEFRAMES = ("5m", "15m", "1h")
+DEFAULT_SERIES = ("cb_cvd", "bin_spot", "bin_perp")
+
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 60 * 60}
+
+
+def parse_timeframe(tf):
+    # "30s", "1m", "15m", "4h" -> seconds
+    return int(tf[:-1]) * _UNIT_SECONDS[tf[-1]]
+
+
+def pct_change(a, b):
+    return round(((b - a) / abs(a)) * 100, 2) if a != 0 else 0
+
+
+class _Window:
+    __slots__ = ("label", "max_age", "head", "sums", "mins", "maxs")
+
+    def __init__(self, label, max_age, n_series):
+        self.label = label
+        self.max_age = max_age
+        self.head = 0  # absolute index of the oldest point inside the window
+        self.sums = [0.0] * n_series
+        # Monotonic deques of absolute indices give O(1) amortized min/max
+        self.mins = [deque() for _ in range(n_series)]
+        self.maxs = [deque() for _ in range(n_series)]
+
+
 class MultiTFMemory:
-    def __init__(self):
-        self.windows = {
-            "5m": {"max_age": 5 * 60, "memory": deque()},
-            "15m": {"max_age": 15 * 60, "memory": deque()},
-            "1h": {"max_age": 60 * 60, "memory": deque()}
-        }
-
-    def update(self, cb_cvd, bin_spot, bin_perp):
-        now = time.time()
-        point = (now, cb_cvd, bin_spot, bin_perp)
-
-        for tf in self.windows:
-            self.windows[tf]["memory"].append(point)
-            self._cleanup(tf, now)
-
-    def _cleanup(self, tf, now):
-        max_age = self.windows[tf]["max_age"]
-        memory = self.windows[tf]["memory"]
-        while memory and now - memory[0][0] > max_age:
-            memory.popleft()
+    """
+    Rolling CVD memory over several timeframes backed by one shared buffer.
+
+    Every point is stored once; each timeframe only keeps a head pointer into
+    the buffer plus running sums and min/max deques, all advanced
+    incrementally on update(). Points older than the longest timeframe are
+    trimmed from the front in amortized O(1).
+    """
+
+    def __init__(self, timeframes=DEFAULT_TIMEFRAMES, series=DEFAULT_SERIES, clock=time.time):
+        self.clock = clock
+        self.series = tuple(series)
+        self.windows = [_Window(tf, parse_timeframe(tf), len(self.series)) for tf in timeframes]
+
+        self._ts = []
+        self._points = []
+        self._base = 0  # absolute index of self._points[0]
+
+    def update(self, *values):
+        """
+        Adds one point; values are given in the order of `self.series`.
+        """
+        now = self.clock()
+        points = self._points
+        idx = self._base + len(points)
+        self._ts.append(now)
+        points.append(values)
+
+        base = self._base
+        ts = self._ts
+        n = len(values)
+
+        for w in self.windows:
+            sums = w.sums
+            for s in range(n):
+                v = values[s]
+                sums[s] += v
+
+                mins = w.mins[s]
+                while mins and points[mins[-1] - base][s] >= v:
+                    mins.pop()
+                mins.append(idx)
+
+                maxs = w.maxs[s]
+                while maxs and points[maxs[-1] - base][s] <= v:
+                    maxs.pop()
+                maxs.append(idx)
+
+            head = w.head
+            while now - ts[head - base] > w.max_age:
+                old = points[head - base]
+                for s in range(n):
+                    sums[s] -= old[s]
+                head += 1
+            w.head = head
+
+            for s in range(n):
+                mins = w.mins[s]
+                while mins[0] < head:
+                    mins.popleft()
+                maxs = w.maxs[s]
+                while maxs[0] < head:
+                    maxs.popleft()
+
+        self._trim()
+
+    def _trim(self):
+        # Drop the prefix no window can reach once it is at least half the buffer
+        oldest = min(w.head for w in self.windows) - self._base
+        if oldest > 1024 and oldest * 2 > len(self._points):
+            del self._ts[:oldest]
+            del self._points[:oldest]
+            self._base += oldest
+
+    def _window(self, tf):
+        for w in self.windows:
+            if w.label == tf:
+                return w
+        raise KeyError(tf)
 
     def get_all_deltas(self):
         result = {}
-        for tf, data in self.windows.items():
-            result[tf] = self._calculate_deltas(data["memory"])
+        for w in self.windows:
+            result[w.label] = self._calculate_deltas(w)
         return result
 
-    def _calculate_deltas(self, memory):
-        if len(memory) < 2:
-            return {"cb_cvd": 0, "bin_spot": 0, "bin_perp": 0}
+    def _calculate_deltas(self, w):
+        if self._base + len(self._points) - w.head < 2:
+            return {name: 0 for name in self.series}
+
+        start = self._points[w.head - self._base]
+        end = self._points[-1]
 
-        start = memory[0]
-        end = memory[-1]
+        return {name: pct_change(start[s], end[s]) for s, name in enumerate(self.series)}
 
-        def pct_change(a, b):
-            return round(((b - a) / abs(a)) * 100, 2) if a != 0 else 0
+    def get_window_stats(self, tf):
+        """
+        Point count plus delta, pct change, sum, mean, min and max per series.
+        """
+        w = self._window(tf)
+        base = self._base
+        count = base + len(self._points) - w.head
+        if count == 0:
+            return {"count": 0}
 
-        return {
-            "cb_cvd": pct_change(start[1], end[1]),
-            "bin_spot": pct_change(start[2], end[2]),
-            "bin_perp": pct_change(start[3], end[3])
-        }
+        start = self._points[w.head - base]
+        end = self._points[-1]
+        stats = {"count": count}
+        for s, name in enumerate(self.series):
+            stats[name] = {
+                "delta": end[s] - start[s],
+                "pct": pct_change(start[s], end[s]),
+                "sum": w.sums[s],
+                "mean": w.sums[s] / count,
+                "min": self._points[w.mins[s][0] - base][s],
+                "max": self._points[w.maxs[s][0] - base][s]
+            }
+        return stats
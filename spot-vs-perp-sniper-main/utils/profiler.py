@@ -0,0 +1,267 @@
+# utils/profiler.py
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+import time
+from array import array
+from datetime import datetime
+
+PROFILE_ENABLED = os.getenv("PROFILE", "false").lower() == "true"
+# An evaluation slower than this dumps the stacks sampled since the last dump
+PROFILE_SLOW_SECONDS = float(os.getenv("PROFILE_SLOW_SECONDS", "0.25"))
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_REPORT_SECONDS = float(os.getenv("PROFILE_REPORT_SECONDS", "60"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+
+
+class StageStats:
+    """
+    Last `window` durations of one stage, for rolling percentiles.
+    """
+
+    __slots__ = ("samples", "window", "head", "count", "total", "max")
+
+    def __init__(self, window):
+        self.samples = array("d", bytes(8 * window))
+        self.window = window
+        self.head = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        self.samples[self.head] = seconds
+        self.head = (self.head + 1) % self.window
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def summary(self):
+        recent = sorted(self.samples[:min(self.count, self.window)])
+        if not recent:
+            return None
+
+        def pct(p):
+            return round(recent[min(len(recent) - 1, int(p * len(recent)))] * 1000, 3)
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count * 1000, 3),
+            "p50_ms": pct(0.50),
+            "p90_ms": pct(0.90),
+            "p99_ms": pct(0.99),
+            "max_ms": round(self.max * 1000, 3)
+        }
+
+
+class StackSampler:
+    """
+    Background thread that samples one thread's Python stack every
+    `interval` seconds and counts identical stacks, ready to be written in
+    the collapsed ("folded") format flamegraph.pl and speedscope read.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self.samples = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_name(code):
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _sample(self):
+        frame = sys._current_frames().get(self.thread_id)
+        names = []
+        while frame is not None:
+            names.append(self._frame_name(frame.f_code))
+            frame = frame.f_back
+        if names:
+            key = ";".join(reversed(names))
+            with self._lock:
+                self.stacks[key] = self.stacks.get(key, 0) + 1
+                self.samples += 1
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="stack-sampler", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def take(self):
+        # Stacks sampled since the previous take()
+        with self._lock:
+            stacks, self.stacks = self.stacks, {}
+            self.samples = 0
+        return stacks
+
+
+class _Laps:
+    """
+    Times consecutive stages of one evaluation: call it with a stage name
+    at the end of each stage, then finish() once at the end.
+    """
+
+    __slots__ = ("profiler", "started", "last")
+
+    def __init__(self, profiler):
+        self.profiler = profiler
+        self.started = self.last = time.perf_counter()
+
+    def __call__(self, stage):
+        now = time.perf_counter()
+        self.profiler.record(stage, now - self.last)
+        self.last = now
+
+    def finish(self):
+        self.profiler.observe_iteration(time.perf_counter() - self.started)
+
+
+class _NoLaps:
+    __slots__ = ()
+
+    def __call__(self, stage):
+        pass
+
+    def finish(self):
+        pass
+
+
+_NO_LAPS = _NoLaps()
+
+
+class Profiler:
+    """
+    Opt-in hot-path profiler (PROFILE=true or --profile).
+
+    Engines time each named stage of an evaluation with laps(); stream
+    supervisors record every frame handler as "handler:<stream>". Each
+    stage keeps rolling percentiles over its last `window` samples. While
+    enabled, a sampler thread also collects the event loop thread's stacks;
+    they are written as a collapsed-stack file on SIGUSR1, via dump(), or
+    automatically when an evaluation takes longer than `slow_seconds`.
+
+    Disabled, laps() hands back a shared no-op and handlers only test
+    `enabled`, so the instrumentation can stay in place.
+    """
+
+    def __init__(self, enabled=PROFILE_ENABLED, window=2048, slow_seconds=PROFILE_SLOW_SECONDS,
+                 sample_interval=PROFILE_SAMPLE_INTERVAL, dump_dir=PROFILE_DIR, min_dump_interval=60.0):
+        self.enabled = enabled
+        self.window = window
+        self.slow_seconds = slow_seconds
+        self.sample_interval = sample_interval
+        self.dump_dir = dump_dir
+        self.min_dump_interval = min_dump_interval
+        self.stages = {}
+        self.sampler = None
+        self.slow_iterations = 0
+        self.last_dump = 0.0
+
+    def laps(self):
+        return _Laps(self) if self.enabled else _NO_LAPS
+
+    def record(self, stage, seconds):
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats(self.window)
+        stats.add(seconds)
+
+    def observe_iteration(self, seconds):
+        self.record("iteration", seconds)
+        if seconds > self.slow_seconds:
+            self.slow_iterations += 1
+            if self.sampler is not None and time.monotonic() - self.last_dump >= self.min_dump_interval:
+                path = self.dump("slow")
+                print(f"[PROFILE] Evaluation took {seconds * 1000:.1f} ms; stacks written to {path}")
+
+    def start(self):
+        """
+        Starts stack sampling for the calling thread (the event loop's) and
+        hooks SIGUSR1 to dump() when a loop is running.
+        """
+        if not self.enabled or self.sampler is not None:
+            return
+        self.sampler = StackSampler(threading.get_ident(), self.sample_interval)
+        self.sampler.start()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGUSR1, self._dump_on_signal)
+        except (RuntimeError, NotImplementedError, AttributeError):
+            pass  # no running loop, or a platform without SIGUSR1
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler = None
+
+    def _dump_on_signal(self):
+        print(f"[PROFILE] Stacks written to {self.dump('signal')}")
+
+    def dump(self, reason="manual", path=None):
+        """
+        Writes the stacks sampled since the last dump in collapsed format
+        ("frame;frame;frame count" per line) and returns the path.
+        """
+        stacks = self.sampler.take() if self.sampler is not None else {}
+        self.last_dump = time.monotonic()
+        if path is None:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S-%f")
+            path = os.path.join(self.dump_dir, f"profile-{stamp}-{reason}.folded")
+        with open(path, "w") as f:
+            for stack, count in sorted(stacks.items(), key=lambda item: -item[1]):
+                f.write(f"{stack} {count}\n")
+        return path
+
+    def report(self):
+        out = {}
+        for stage, stats in sorted(self.stages.items()):
+            summary = stats.summary()
+            if summary is not None:
+                out[stage] = summary
+        return out
+
+    def print_report(self):
+        report = self.report()
+        if not report:
+            return
+        print(f"[PROFILE] {'stage':<32} {'count':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+        for stage, s in report.items():
+            print(f"[PROFILE] {stage:<32} {s['count']:>8} {s['p50_ms']:>9} {s['p90_ms']:>9} {s['p99_ms']:>9} {s['max_ms']:>9}")
+
+    async def run(self, report_interval=PROFILE_REPORT_SECONDS):
+        if not self.enabled:
+            return
+        self.start()
+        try:
+            while True:
+                await asyncio.sleep(report_interval)
+                self.print_report()
+        finally:
+            self.stop()
+
+
+_profiler = None
+
+def get_profiler():
+    global _profiler
+    if _profiler is None:
+        _profiler = Profiler()
+    return _profiler
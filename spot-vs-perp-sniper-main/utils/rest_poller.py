@@ -0,0 +1,187 @@
+# utils/rest_poller.py
+
+import asyncio
+import random
+import time
+from collections import namedtuple
+from urllib.parse import urlparse
+
+import aiohttp
+
+# One cached reading per endpoint: `value` is whatever the endpoint's parse()
+# returned, so readers get typed values rather than raw JSON
+CachedResponse = namedtuple("CachedResponse", ["endpoint", "value", "fetched_at", "latency"])
+
+
+class PollEndpoint:
+    __slots__ = (
+        "name", "url", "params", "interval", "jitter", "parse", "on_result", "on_error", "host",
+        "requests", "errors", "failures", "last_latency", "max_latency", "total_latency",
+        "last_error", "last_ok"
+    )
+
+    def __init__(self, name, url, interval, params=None, jitter=0.1, parse=None, on_result=None, on_error=None):
+        self.name = name
+        self.url = url
+        self.params = params
+        self.interval = interval
+        self.jitter = jitter
+        self.parse = parse
+        self.on_result = on_result
+        self.on_error = on_error
+        self.host = urlparse(url).netloc
+
+        self.requests = 0
+        self.errors = 0
+        self.failures = 0  # consecutive
+        self.last_latency = None
+        self.max_latency = 0.0
+        self.total_latency = 0.0
+        self.last_error = None
+        self.last_ok = None
+
+    def stats(self):
+        ok = self.requests - self.errors
+        return {
+            "host": self.host,
+            "interval": self.interval,
+            "requests": self.requests,
+            "errors": self.errors,
+            "consecutive_failures": self.failures,
+            "last_latency": self.last_latency,
+            "avg_latency": self.total_latency / ok if ok else None,
+            "max_latency": self.max_latency,
+            "last_ok": self.last_ok,
+            "last_error": self.last_error
+        }
+
+
+class RestPoller:
+    """
+    Async scheduler for periodic REST reads.
+
+    Every endpoint runs on its own jittered interval over one pooled aiohttp
+    session, with at most `max_per_host` requests in flight per host. Parsed
+    responses land in a cache read with get()/value(), so callers never wait
+    on the network; a failing endpoint keeps its last good value and retries
+    with jittered exponential backoff up to `backoff_max`.
+    """
+
+    def __init__(self, max_per_host=4, timeout=10.0, backoff_max=300.0, clock=time.time):
+        self.max_per_host = max_per_host
+        self.timeout = timeout
+        self.backoff_max = backoff_max
+        self.clock = clock
+        self.endpoints = {}
+        self.cache = {}
+        self.session = None
+        self._host_limits = {}
+        self._tasks = {}
+        self._task = None
+
+    def add(self, name, url, interval, params=None, jitter=0.1, parse=None, on_result=None, on_error=None):
+        # parse(json) -> value; on_result(CachedResponse) / on_error(endpoint, exc) are optional hooks
+        endpoint = PollEndpoint(name, url, interval, params, jitter, parse, on_result, on_error)
+        self.endpoints[name] = endpoint
+        if self.session is not None:
+            self._tasks[name] = asyncio.ensure_future(self._poll(endpoint))
+        return endpoint
+
+    def get(self, name):
+        return self.cache.get(name)
+
+    def value(self, name, default=None):
+        cached = self.cache.get(name)
+        return cached.value if cached is not None else default
+
+    async def _fetch(self, endpoint):
+        limit = self._host_limits.setdefault(endpoint.host, asyncio.Semaphore(self.max_per_host))
+        async with limit:
+            started = time.perf_counter()
+            async with self.session.get(endpoint.url, params=endpoint.params) as resp:
+                resp.raise_for_status()
+                data = await resp.json(content_type=None)
+            latency = time.perf_counter() - started
+
+        value = endpoint.parse(data) if endpoint.parse else data
+        return CachedResponse(endpoint.name, value, self.clock(), latency)
+
+    async def poll_once(self, endpoint):
+        endpoint.requests += 1
+        try:
+            result = await self._fetch(endpoint)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+            endpoint.errors += 1
+            endpoint.failures += 1
+            # Response errors repeat the request URL (and any key in it); keep only the status
+            endpoint.last_error = f"HTTP {e.status}" if isinstance(e, aiohttp.ClientResponseError) else repr(e)
+            if endpoint.on_error:
+                endpoint.on_error(endpoint, e)
+            return False
+
+        endpoint.failures = 0
+        endpoint.last_ok = result.fetched_at
+        endpoint.last_latency = result.latency
+        endpoint.total_latency += result.latency
+        endpoint.max_latency = max(endpoint.max_latency, result.latency)
+        self.cache[endpoint.name] = result
+        if endpoint.on_result:
+            endpoint.on_result(result)
+        return True
+
+    def _next_delay(self, endpoint):
+        if endpoint.failures:
+            delay = min(self.backoff_max, endpoint.interval * 2 ** (endpoint.failures - 1))
+            return delay * random.uniform(0.5, 1.0)
+        return endpoint.interval * random.uniform(1 - endpoint.jitter, 1 + endpoint.jitter)
+
+    async def _poll(self, endpoint):
+        # Spread the first requests so endpoints added together don't fire together
+        await asyncio.sleep(random.uniform(0, endpoint.interval * endpoint.jitter))
+        while True:
+            await self.poll_once(endpoint)
+            await asyncio.sleep(self._next_delay(endpoint))
+
+    async def _run(self):
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit_per_host=self.max_per_host)
+        )
+        try:
+            for name, endpoint in self.endpoints.items():
+                self._tasks[name] = asyncio.ensure_future(self._poll(endpoint))
+            await asyncio.Future()
+        finally:
+            for task in self._tasks.values():
+                task.cancel()
+            await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+            self._tasks.clear()
+            await self.session.close()
+            self.session = None
+
+    async def run(self):
+        # Several feeds call run(); the scheduler is started once and shared
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+        await asyncio.shield(self._task)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self):
+        return {name: endpoint.stats() for name, endpoint in self.endpoints.items()}
+
+
+_poller = None
+
+def get_poller():
+    global _poller
+    if _poller is None:
+        _poller = RestPoller()
+    return _poller
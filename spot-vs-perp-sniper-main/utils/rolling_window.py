@@ -0,0 +1,104 @@
+# utils/rolling_window.py
+
+import math
+from array import array
+
+
+class BucketedWindow:
+    """
+    Ring of fixed-width time buckets holding a summed value (signed volume,
+    notional, ...) and an event count.
+
+    add() and reading `total` are O(1); advancing to a new bucket evicts the oldest one
+    and, before doing so, feeds the closing window total to an exponentially
+    weighted mean/variance (West's incremental form of Welford's update)
+    that serves as the window's baseline.
+    """
+
+    __slots__ = (
+        "label", "seconds", "width", "n", "net", "counts", "head",
+        "total", "count", "alpha", "mean", "var", "samples", "_since_resync"
+    )
+
+    def __init__(self, label, seconds, buckets, half_life):
+        self.label = label
+        self.seconds = seconds
+        self.width = seconds / buckets
+        self.n = buckets
+        self.net = array("d", bytes(8 * buckets))
+        self.counts = array("q", bytes(8 * buckets))
+        self.head = None  # absolute index of the newest bucket
+        self.total = 0.0
+        self.count = 0
+
+        # Baseline of the window total, sampled once per bucket
+        self.alpha = 1 - 0.5 ** (self.width / half_life)
+        self.mean = 0.0
+        self.var = 0.0
+        self.samples = 0
+        self._since_resync = 0
+
+    def advance(self, idx):
+        head = self.head
+        if head is None:
+            self.head = idx
+            return
+        if idx <= head:
+            return
+
+        # An idle gap longer than the ring (plus a full baseline's worth of
+        # empty samples) would only add zeros; cap the work.
+        steps = idx - head
+        limit = self.n * 10
+        if steps > limit:
+            head = idx - limit
+            steps = limit
+
+        net, counts, n = self.net, self.counts, self.n
+        for _ in range(steps):
+            self._observe(self.total)
+            head += 1
+            slot = head % n
+            self.total -= net[slot]
+            self.count -= counts[slot]
+            net[slot] = 0.0
+            counts[slot] = 0
+
+        self.head = idx
+        self._since_resync += steps
+        if self._since_resync >= n:
+            # Re-derive the running total so float drift never accumulates
+            self._since_resync = 0
+            self.total = sum(net)
+
+    def _observe(self, x):
+        if self.samples == 0:
+            self.mean = x
+        else:
+            diff = x - self.mean
+            incr = self.alpha * diff
+            self.mean += incr
+            self.var = (1 - self.alpha) * (self.var + diff * incr)
+        self.samples += 1
+
+    def expire(self, now):
+        # Bring the window up to `now` before reading it
+        self.advance(int(now // self.width))
+
+    def add(self, ts, delta):
+        idx = int(ts // self.width)
+        self.advance(idx)
+        if idx <= self.head - self.n:
+            return  # older than the window; dropped
+        slot = idx % self.n
+        self.net[slot] += delta
+        self.counts[slot] += 1
+        self.total += delta
+        self.count += 1
+
+    def std(self):
+        return math.sqrt(self.var) if self.var > 0 else 0.0
+
+    def zscore(self):
+        std = self.std()
+        return (self.total - self.mean) / std if std > 0 else 0.0
@@ -0,0 +1,88 @@
+# utils/shared_state_table.py
+
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Column 0 is the row's seqlock counter; the rest are published values
+FIELDS = ("seq", "cb_cvd", "bin_spot", "bin_perp", "bybit_cvd", "okx_cvd", "price", "last_trade_ts", "trades",
+          "spike", "spike_delta", "updated")
+COLUMNS = {name: i for i, name in enumerate(FIELDS)}
+VALUE_FIELDS = FIELDS[1:]
+
+
+class SharedStateTable:
+    """
+    Fixed-size float64 table in POSIX shared memory, one row per symbol.
+
+    A single writer process owns each row and publishes with a per-row
+    seqlock: the sequence column goes odd while the row is being written and
+    even once it is consistent. Readers copy the whole table in one shot and
+    only re-read rows that were torn by a concurrent write, so the coordinator
+    never takes a lock and a slow reader never blocks a worker.
+    """
+
+    def __init__(self, rows, name=None, create=False):
+        self.rows = rows
+        size = max(1, rows * len(FIELDS) * 8)
+        self.shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+        # Workers are started by the creating process and share its resource
+        # tracker, so only the creator unlinks the segment.
+        self.owner = create
+        self.data = np.ndarray((rows, len(FIELDS)), dtype=np.float64, buffer=self.shm.buf)
+        if create:
+            self.data[:] = 0.0
+
+    @classmethod
+    def create(cls, rows):
+        return cls(rows, create=True)
+
+    @classmethod
+    def attach(cls, name, rows):
+        return cls(rows, name=name)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def write(self, row, values):
+        # values: one float per VALUE_FIELDS entry
+        r = self.data[row]
+        r[0] += 1  # odd: write in progress
+        r[1:] = values
+        r[0] += 1  # even: row consistent again
+
+    def release(self, first_row, count):
+        """
+        Makes odd sequence numbers in rows [first_row, first_row + count) even
+        again. Only for rows whose writer is dead: a writer killed mid-write
+        leaves its rows odd, which would make every later read fail.
+        """
+        seq = self.data[first_row:first_row + count, 0]
+        seq[seq % 2 == 1] += 1
+
+    def read(self, row, retries=100):
+        r = self.data[row]
+        for _ in range(retries):
+            seq = r[0]
+            values = r.copy()
+            if seq % 2 == 0 and r[0] == seq:
+                return values
+        raise RuntimeError(f"shared state row {row} kept changing while being read")
+
+    def snapshot(self):
+        """
+        Consistent copy of every row.
+        """
+        copy = self.data.copy()
+        torn = np.flatnonzero((copy[:, 0] % 2 == 1) | (self.data[:, 0] != copy[:, 0]))
+        for row in torn:
+            copy[row] = self.read(row)
+        return copy
+
+    def close(self):
+        # Drop the ndarray view first or SharedMemory.close() raises BufferError
+        self.data = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,184 @@
+# utils/signal_ladder.py
+
+import operator
+from collections import namedtuple
+
+import numpy as np
+
+NO_SIGNAL = "📊 No clear bias"
+BULL_TRAP = "🔻 Perp pump + spot fade — bull trap forming (short opportunity)"
+SHORT_SQUEEZE = "💥 Negative funding + Spot buying — short squeeze trap"
+SPIKE_SPOT_SELLING = "🔥 Perp delta spike + Spot selling — buyer trap likely"
+SPOT_LED_BTC_CONFIRMED = "✅ Spot-led move with BTC confirmation — strong demand"
+BTC_FADING = "⚠️ SOL spot strong but BTC fading — possible local top"
+PERP_LED_PUMP = "🚨 Perp-led pump — no spot participation (trap)"
+BYBIT_RETAIL_EXIT = "⚠️ Bybit retail buying, Binance fading — exit risk"
+ASIA_DUMP_RISK = "🟡 OKX selling, Binance buying — Asia dump risk"
+CB_BINANCE_DIVERGENCE = "🕣 Coinbase buying, Binance Spot selling — divergence"
+
+FUNDING_SQUEEZE_THRESHOLD = -0.01
+
+# Positional order of the features for classify_signal(), the compiled
+# scalar predicates and the columns of a feature matrix
+FEATURES = ("cb_cvd", "bin_spot", "bin_perp", "bybit_cvd", "okx_cvd", "btc_spot", "funding", "spike")
+
+OPS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne
+}
+
+# name: stable identifier; text: what gets printed, stored and alerted;
+# conditions: (feature, op, value) triples that must all hold;
+# meaningful: whether a match is worth storing and alerting on;
+# direction: the price move the signal calls for (+1 up, -1 down, 0 none),
+# which the outcome labeller checks for follow-through (breakout) or reversal
+# (trap); rules without one are not labelled
+Rule = namedtuple("Rule", ["name", "text", "conditions", "meaningful", "direction"], defaults=[True, 0])
+
+# Ladder order matters for first-match evaluation: the first matching rule wins
+RULES = [
+    Rule("bull_trap", BULL_TRAP, (("bin_perp", ">", 0), ("cb_cvd", "<", 0), ("bin_spot", "<", 0)), direction=-1),
+    Rule("short_squeeze", SHORT_SQUEEZE, (("funding", "<", FUNDING_SQUEEZE_THRESHOLD), ("cb_cvd", ">", 0)), direction=1),
+    Rule("spike_spot_selling", SPIKE_SPOT_SELLING, (("spike", "==", True), ("cb_cvd", "<", 0)), direction=-1),
+    Rule("spot_led_btc_confirmed", SPOT_LED_BTC_CONFIRMED,
+         (("cb_cvd", ">", 0), ("bin_spot", ">", 0), ("bin_perp", "<", 0), ("btc_spot", ">", 0)), direction=1),
+    Rule("btc_fading", BTC_FADING, (("cb_cvd", ">", 0), ("bin_spot", ">", 0), ("btc_spot", "<", 0)), direction=-1),
+    Rule("perp_led_pump", PERP_LED_PUMP, (("bin_perp", ">", 0), ("cb_cvd", "<", 0), ("bin_spot", "<=", 0)), direction=-1),
+    Rule("bybit_retail_exit", BYBIT_RETAIL_EXIT, (("bybit_cvd", ">", 0), ("bin_perp", "<", 0)), direction=-1),
+    Rule("asia_dump_risk", ASIA_DUMP_RISK, (("okx_cvd", "<", 0), ("bin_perp", ">", 0)), direction=-1),
+    Rule("cb_binance_divergence", CB_BINANCE_DIVERGENCE, (("cb_cvd", ">", 0), ("bin_spot", "<", 0))),
+]
+
+SIGNALS = [rule.text for rule in RULES]
+
+
+class RuleTable:
+    """
+    Declarative rules compiled once for fast evaluation.
+
+    Scalar evaluation runs generated Python functions that take the features
+    positionally (no dict lookups or per-condition calls per tick). Matrix
+    evaluation computes each distinct condition once as a boolean column and
+    combines them per rule, for backfills over whole feature series.
+
+    Results are rule indices: 0 means no match and i means self.rules[i - 1],
+    so an index array can be mapped straight onto `texts`.
+    """
+
+    def __init__(self, rules=RULES, features=FEATURES):
+        self.rules = list(rules)
+        self.features = tuple(features)
+        self.texts = [NO_SIGNAL] + [rule.text for rule in self.rules]
+        self.by_name = {rule.name: rule for rule in self.rules}
+
+        self._conditions = []  # distinct (feature, op, value) triples
+        self._rule_conditions = []  # per rule: indices into _conditions
+        seen = {}
+        for rule in self.rules:
+            if not rule.conditions:
+                raise ValueError(f"rule {rule.name!r} has no conditions")
+            indices = []
+            for feature, op, value in rule.conditions:
+                if feature not in self.features:
+                    raise ValueError(f"rule {rule.name!r}: unknown feature {feature!r}")
+                if op not in OPS:
+                    raise ValueError(f"rule {rule.name!r}: unknown operator {op!r}")
+                key = (feature, op, value)
+                if key not in seen:
+                    seen[key] = len(self._conditions)
+                    self._conditions.append(key)
+                indices.append(seen[key])
+            self._rule_conditions.append(indices)
+
+        self.first_index, self.all_indices = self._compile_scalar()
+
+    def _compile_scalar(self):
+        # Constants are bound by name rather than formatted into the source,
+        # so any numeric value (inf, nan, numpy scalars) round-trips exactly
+        namespace = {}
+        constants = {}
+        exprs = []
+        for rule in self.rules:
+            terms = []
+            for feature, op, value in rule.conditions:
+                name = f"_c{len(constants)}"
+                constants[name] = value
+                terms.append(f"{feature} {op} {name}")
+            exprs.append(" and ".join(terms))
+
+        args = ", ".join(self.features)
+        lines = [f"def first_index({args}):"]
+        lines += [f"    if {expr}: return {i}" for i, expr in enumerate(exprs, 1)]
+        lines += ["    return 0", "", f"def all_indices({args}):", "    out = []"]
+        lines += [f"    if {expr}: out.append({i})" for i, expr in enumerate(exprs, 1)]
+        lines += ["    return out"]
+
+        namespace.update(constants)
+        exec("\n".join(lines), namespace)
+        return namespace["first_index"], namespace["all_indices"]
+
+    def _values(self, snapshot):
+        return [snapshot[feature] for feature in self.features]
+
+    def match(self, *values):
+        """
+        First matching Rule for positional feature values, or None.
+        """
+        idx = self.first_index(*values)
+        return self.rules[idx - 1] if idx else None
+
+    def first(self, snapshot):
+        """
+        First matching Rule for a {feature: value} snapshot, or None.
+        """
+        return self.match(*self._values(snapshot))
+
+    def all(self, snapshot):
+        return [self.rules[i - 1] for i in self.all_indices(*self._values(snapshot))]
+
+    def _columns(self, matrix):
+        # A dict of 1-D arrays, or a 2-D array with columns in `features` order
+        if isinstance(matrix, dict):
+            return {feature: np.asarray(matrix[feature]) for feature in self.features}
+        # One transposed copy is cheaper than comparing strided columns
+        columns = np.ascontiguousarray(np.asarray(matrix).T)
+        return {feature: columns[i] for i, feature in enumerate(self.features)}
+
+    def rule_masks(self, matrix):
+        columns = self._columns(matrix)
+        masks = [OPS[op](columns[feature], value) for feature, op, value in self._conditions]
+        out = []
+        for indices in self._rule_conditions:
+            mask = masks[indices[0]]
+            for i in indices[1:]:
+                mask = mask & masks[i]
+            out.append(mask)
+        return out
+
+    def first_matrix(self, matrix):
+        """
+        First-match rule index per row (int8; 0 = no match).
+        """
+        masks = self.rule_masks(matrix)
+        out = np.zeros(len(masks[0]), dtype=np.int8)
+        # Later rules first so earlier ones overwrite them: first match wins
+        for i in range(len(masks) - 1, -1, -1):
+            np.putmask(out, masks[i], i + 1)
+        return out
+
+    def all_matrix(self, matrix):
+        """
+        (rows, rules) boolean matrix of every rule that holds per row.
+        """
+        return np.column_stack(self.rule_masks(matrix))
+
+
+LADDER = RuleTable()
+
+
+def classify_signal(cb_cvd, bin_spot, bin_perp, bybit_cvd, okx_cvd, btc_spot, funding, spike):
+    return LADDER.texts[LADDER.first_index(cb_cvd, bin_spot, bin_perp, bybit_cvd, okx_cvd, btc_spot, funding, spike)]
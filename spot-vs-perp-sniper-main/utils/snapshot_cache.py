@@ -0,0 +1,317 @@
+# utils/snapshot_cache.py
+
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import requests
+
+SNAPSHOT_CACHE_PATH = os.getenv("SNAPSHOT_CACHE_PATH", "cvd_snapshots_cache.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    exchange INTEGER,
+    symbol INTEGER,
+    signal INTEGER,
+    price REAL,
+    spot_cvd REAL,
+    perp_cvd REAL,
+    outcome INTEGER
+);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+CREATE TABLE IF NOT EXISTS strings (
+    code INTEGER PRIMARY KEY,
+    value TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS labels (
+    id INTEGER NOT NULL,
+    horizon TEXT NOT NULL,
+    outcome INTEGER NOT NULL,
+    mfe REAL,
+    mae REAL,
+    seconds REAL,
+    PRIMARY KEY (id, horizon)
+);
+"""
+
+# Code 0 stands for NULL in every string column, so arrays never hold None
+NULL_CODE = 0
+
+
+def parse_timestamp(value):
+    # Rows written with datetime.utcnow().isoformat() carry no offset; they are UTC
+    dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+class SupabaseSnapshotSource:
+    """
+    Pages through a Supabase table in id order with a keyset filter, so every
+    request is a primary-key range scan no matter how far the cache has got.
+    """
+
+    def __init__(self, url=None, key=None, table="cvd_snapshots", timeout=30, session=None):
+        self.url = url or os.getenv("SUPABASE_URL")
+        self.key = key or os.getenv("SUPABASE_KEY")
+        self.table = table
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.session.headers.update({
+            "apikey": self.key or "",
+            "Authorization": f"Bearer {self.key}"
+        })
+
+    def is_configured(self):
+        return bool(self.url and self.key)
+
+    def fetch_page(self, after=None, limit=1000):
+        """
+        Up to `limit` rows with an id greater than `after`, in id order.
+        """
+        params = {"select": "*", "order": "id.asc", "limit": limit}
+        if after is not None:
+            params["id"] = f"gt.{int(after)}"
+        resp = self.session.get(f"{self.url}/rest/v1/{self.table}", params=params, timeout=self.timeout)
+        resp.raise_for_status()
+        return resp.json()
+
+    def set_outcome(self, ids, outcome, chunk=500):
+        # One PATCH per `chunk` ids that share an outcome
+        ids = [int(i) for i in ids]
+        for i in range(0, len(ids), chunk):
+            resp = self.session.patch(
+                f"{self.url}/rest/v1/{self.table}",
+                params={"id": f"in.({','.join(map(str, ids[i:i + chunk]))})"},
+                json={"confirmed_outcome": outcome},
+                headers={"Prefer": "return=minimal"},
+                timeout=self.timeout
+            )
+            resp.raise_for_status()
+
+
+class SnapshotCache:
+    """
+    Local SQLite copy of Supabase `cvd_snapshots` for the pattern learner.
+
+    sync() only downloads rows past the stored id watermark and upserts them
+    by id, one transaction per page, so an interrupted sync resumes where it
+    stopped. The watermark is the server-assigned id, not `timestamp`: that
+    is stamped by the client, and rows the SupabaseWriter re-sends from its
+    spill land long after newer timestamps were synced. String columns are dictionary-encoded into
+    integer codes, which lets columns() hand back plain numpy arrays for
+    vectorized group-bys over the full history.
+    """
+
+    STRING_COLUMNS = ("exchange", "symbol", "signal", "outcome")
+    NUMERIC_COLUMNS = ("id", "ts", "price", "spot_cvd", "perp_cvd")
+
+    def __init__(self, path=SNAPSHOT_CACHE_PATH):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._codes = dict(self.conn.execute("SELECT value, code FROM strings"))
+
+    def close(self):
+        self.conn.close()
+
+    # --- dictionary encoding --------------------------------------------------
+
+    def encode(self, value):
+        if value is None:
+            return NULL_CODE
+        code = self._codes.get(value)
+        if code is None:
+            code = self.conn.execute("INSERT INTO strings (value) VALUES (?)", (value,)).lastrowid
+            self._codes[value] = code
+        return code
+
+    def code(self, value):
+        # Code of an existing string, or None if it never occurred
+        return NULL_CODE if value is None else self._codes.get(value)
+
+    def strings(self):
+        """
+        Decoding table: strings()[code] is the value (None for NULL_CODE).
+        """
+        table = [None] * (max(self._codes.values(), default=0) + 1)
+        for value, code in self._codes.items():
+            table[code] = value
+        return table
+
+    # --- watermarks -----------------------------------------------------------
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row and row[0] is not None else default
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def watermark(self):
+        # Highest synced id. A watermark from the old (timestamp, id) keyset
+        # may have skipped late rows below any id, so those caches re-read
+        # everything once; the upsert by id keeps that idempotent.
+        value = self.get_meta("watermark")
+        if not value or "|" in value:
+            return None
+        return int(value)
+
+    def _set_watermark(self, row_id):
+        self.set_meta("watermark", str(row_id))
+
+    def reset(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM snapshots")
+            self.conn.execute("DELETE FROM labels")
+            self.conn.execute("DELETE FROM meta")
+
+    # --- sync -----------------------------------------------------------------
+
+    def upsert(self, rows):
+        # A remote NULL outcome never overwrites one already known locally
+        encode = self.encode
+        self.conn.executemany(
+            """
+            INSERT INTO snapshots (id, ts, exchange, symbol, signal, price, spot_cvd, perp_cvd, outcome)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                ts = excluded.ts, exchange = excluded.exchange, symbol = excluded.symbol,
+                signal = excluded.signal, price = excluded.price, spot_cvd = excluded.spot_cvd,
+                perp_cvd = excluded.perp_cvd, outcome = COALESCE(NULLIF(excluded.outcome, 0), snapshots.outcome)
+            """,
+            [
+                (
+                    r["id"],
+                    parse_timestamp(r["timestamp"]),
+                    encode(r.get("exchange")),
+                    encode(r.get("symbol")),
+                    encode(r.get("signal")),
+                    r.get("price"),
+                    r.get("spot_cvd"),
+                    r.get("perp_cvd"),
+                    encode(r.get("confirmed_outcome"))
+                )
+                for r in rows
+            ]
+        )
+
+    def sync(self, source, page_size=1000, max_pages=None):
+        """
+        Pulls every row newer than the watermark from `source`. Returns
+        {"rows", "pages", "seconds", "watermark"}.
+        """
+        started = time.perf_counter()
+        after = self.watermark()
+        rows = pages = 0
+
+        while max_pages is None or pages < max_pages:
+            page = source.fetch_page(after=after, limit=page_size)
+            if not page:
+                break
+            after = max(row["id"] for row in page)
+            with self.conn:
+                self.upsert(page)
+                self._set_watermark(after)
+            rows += len(page)
+            pages += 1
+            if len(page) < page_size:
+                break
+
+        return {"rows": rows, "pages": pages, "seconds": round(time.perf_counter() - started, 3), "watermark": after}
+
+    # --- outcome labels ---------------------------------------------------------
+
+    def write_labels(self, horizon, ids, outcomes, mfe, mae, seconds):
+        """
+        Stores one horizon's labels; `outcomes` are strings, the rest arrays
+        aligned with `ids` (NaN seconds for rows that never hit a barrier).
+        """
+        encode = self.encode
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO labels (id, horizon, outcome, mfe, mae, seconds) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (i, horizon, encode(o), m, a, None if s != s else s)
+                for i, o, m, a, s in zip(np.asarray(ids).tolist(), outcomes, np.asarray(mfe).tolist(),
+                                         np.asarray(mae).tolist(), np.asarray(seconds).tolist())
+            ]
+        )
+
+    def delete_labels(self, horizon):
+        self.conn.execute("DELETE FROM labels WHERE horizon = ?", (horizon,))
+
+    def set_outcomes(self, ids, outcomes):
+        encode = self.encode
+        self.conn.executemany(
+            "UPDATE snapshots SET outcome = ? WHERE id = ?",
+            [(encode(o), i) for i, o in zip(np.asarray(ids).tolist(), outcomes)]
+        )
+
+    def labels(self, horizon):
+        """
+        {"id", "outcome", "mfe", "mae", "seconds"} arrays for one horizon, by id.
+        """
+        rows = self.conn.execute(
+            "SELECT id, outcome, mfe, mae, seconds FROM labels WHERE horizon = ? ORDER BY id", (horizon,)
+        ).fetchall()
+        table = np.array(rows, dtype=np.float64).reshape(-1, 5)
+        return {
+            "id": table[:, 0].astype(np.int64),
+            "outcome": table[:, 1].astype(np.int64),
+            "mfe": table[:, 2],
+            "mae": table[:, 3],
+            "seconds": table[:, 4]
+        }
+
+    # --- reads ----------------------------------------------------------------
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+
+    def columns(self, names=("ts", "signal", "outcome"), start_ts=None, end_ts=None, unlabelled=None):
+        """
+        Selected columns as numpy arrays in ts order: string columns as int64
+        codes (see strings()), the rest as float64 (id as int64). With
+        `unlabelled` set to a horizon, only rows without a label for it.
+        """
+        for name in names:
+            if name not in self.STRING_COLUMNS and name not in self.NUMERIC_COLUMNS:
+                raise ValueError(f"unknown column {name!r}")
+
+        where, params = [], []
+        if unlabelled is not None:
+            where.append("NOT EXISTS (SELECT 1 FROM labels WHERE labels.id = snapshots.id AND labels.horizon = ?)")
+            params.append(unlabelled)
+        if start_ts is not None:
+            where.append("ts >= ?")
+            params.append(start_ts)
+        if end_ts is not None:
+            where.append("ts < ?")
+            params.append(end_ts)
+        sql = f"SELECT {', '.join(names)} FROM snapshots"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY ts, id"
+
+        rows = self.conn.execute(sql, params).fetchall()
+        out = {}
+        for i, name in enumerate(names):
+            if name in self.STRING_COLUMNS or name == "id":
+                out[name] = np.fromiter((r[i] or 0 for r in rows), dtype=np.int64, count=len(rows))
+            else:
+                out[name] = np.fromiter((np.nan if r[i] is None else r[i] for r in rows), dtype=np.float64, count=len(rows))
+        return out
@@ -0,0 +1,191 @@
+# utils/snapshot_log.py
+
+import glob
+import json
+import mmap
+import os
+import time
+
+SEGMENT_PREFIX = "snapshots-"
+SEGMENT_SUFFIX = ".jsonl"
+FSYNC_POLICIES = ("always", "interval", "rotate", "never")
+
+
+def _segment_start(path):
+    # snapshots-<epoch ms>.jsonl
+    name = os.path.basename(path)
+    return int(name[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]) / 1000
+
+
+def list_segments(directory):
+    return sorted(glob.glob(os.path.join(directory, f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}")))
+
+
+def _line_ts(line):
+    # Lines are written with "ts" first, so the common case skips json.loads
+    if line.startswith(b'{"ts": '):
+        return float(line[7:line.index(b",", 7)])
+    return json.loads(line)["ts"]
+
+
+class SnapshotLog:
+    """
+    Append-only JSONL snapshot log split into segments.
+
+    Each append writes one line and never touches earlier data, so a crash
+    can at worst leave a partial last line (which readers skip). Segments
+    roll over by size or age and the oldest are deleted past `max_segments`.
+
+    fsync policy:
+        always   - fsync after every append
+        interval - fsync at most every `fsync_interval` seconds
+        rotate   - fsync only when a segment is closed
+        never    - leave it to the OS
+    """
+
+    def __init__(self, directory, max_segment_bytes=16 * 1024 * 1024, max_segment_seconds=3600,
+                 max_segments=168, fsync="interval", fsync_interval=5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"fsync must be one of {FSYNC_POLICIES}")
+
+        self.directory = directory
+        self.max_segment_bytes = max_segment_bytes
+        self.max_segment_seconds = max_segment_seconds
+        self.max_segments = max_segments
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+
+        self._file = None
+        self._segment_start = 0
+        self._segment_bytes = 0
+        self._last_fsync = 0
+
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, record, ts=None):
+        ts = time.time() if ts is None else ts
+        line = (json.dumps({"ts": ts, **record}, default=str) + "\n").encode()
+
+        if (self._file is None
+                or self._segment_bytes + len(line) > self.max_segment_bytes
+                or ts - self._segment_start >= self.max_segment_seconds):
+            self._rotate(ts)
+
+        self._file.write(line)
+        self._file.flush()
+        self._segment_bytes += len(line)
+
+        if self.fsync == "always" or (self.fsync == "interval" and ts - self._last_fsync >= self.fsync_interval):
+            os.fsync(self._file.fileno())
+            self._last_fsync = ts
+
+    def _rotate(self, ts):
+        self._close_segment()
+
+        path = os.path.join(self.directory, f"{SEGMENT_PREFIX}{int(ts * 1000):015d}{SEGMENT_SUFFIX}")
+        self._file = open(path, "ab")
+        self._segment_start = ts
+        self._segment_bytes = self._file.tell()
+
+        segments = list_segments(self.directory)
+        for old in segments[:max(0, len(segments) - self.max_segments)]:
+            os.remove(old)
+
+    def _close_segment(self):
+        if self._file is None:
+            return
+        if self.fsync != "never":
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+
+    def close(self):
+        self._close_segment()
+
+
+class SnapshotLogReader:
+    """
+    Memory-mapped reader for a SnapshotLog directory: tail the newest records
+    or range-scan by timestamp without loading whole segments.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def _open(self, path):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size == 0:
+                return None
+            return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _complete_end(mm):
+        # Ignore a trailing partial line left by a crash mid-write
+        return mm.rfind(b"\n") + 1
+
+    def tail(self, n=1):
+        records = []
+        for path in reversed(list_segments(self.directory)):
+            mm = self._open(path)
+            if mm is None:
+                continue
+            with mm:
+                end = self._complete_end(mm)
+                while end > 0 and len(records) < n:
+                    start = mm.rfind(b"\n", 0, end - 1) + 1
+                    records.append(json.loads(mm[start:end]))
+                    end = start
+            if len(records) >= n:
+                break
+        records.reverse()
+        return records
+
+    def range(self, start_ts=None, end_ts=None):
+        """
+        Yields records with start_ts <= ts <= end_ts in time order.
+        """
+        segments = list_segments(self.directory)
+        for i, path in enumerate(segments):
+            if end_ts is not None and _segment_start(path) > end_ts:
+                break
+            if start_ts is not None and i + 1 < len(segments) and _segment_start(segments[i + 1]) <= start_ts:
+                continue
+
+            mm = self._open(path)
+            if mm is None:
+                continue
+            with mm:
+                end = self._complete_end(mm)
+                pos = 0 if start_ts is None else self._seek(mm, end, start_ts)
+                while pos < end:
+                    nl = mm.find(b"\n", pos, end)
+                    line = mm[pos:nl]
+                    pos = nl + 1
+                    if end_ts is not None and _line_ts(line) > end_ts:
+                        return
+                    yield json.loads(line)
+
+    @staticmethod
+    def _seek(mm, end, target):
+        # Binary search for the first line whose ts >= target
+        def line_at(pos):
+            if pos == 0:
+                return 0
+            nl = mm.find(b"\n", pos - 1, end)
+            return nl + 1 if nl != -1 else end
+
+        lo, hi = 0, end
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = line_at(mid)
+            if start >= end:
+                hi = mid
+                continue
+            nl = mm.find(b"\n", start, end)
+            if _line_ts(mm[start:nl]) >= target:
+                hi = mid
+            else:
+                lo = mid + 1
+        return line_at(lo)
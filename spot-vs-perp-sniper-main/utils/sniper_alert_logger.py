@@ -1,24 +1,9 @@
-import os
-import requests
 from datetime import datetime
 
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+from utils.supabase_writer import get_writer
 
-def log_sniper_alert(alert):
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("[X] Missing SUPABASE_URL or SUPABASE_KEY in environment.")
-        return
-
-    url = f"{SUPABASE_URL}/rest/v1/sniper_alerts"
-    headers = {
-        "apikey": SUPABASE_KEY,
-        "Authorization": f"Bearer {SUPABASE_KEY}",
-        "Content-Type": "application/json",
-        "Prefer": "return=minimal"
-    }
-
-    data = {
+def build_alert_row(alert):
+    return {
         "timestamp": datetime.utcnow().isoformat(),
         "signal": alert.get("signal"),
         "direction": alert.get("direction"),
@@ -33,11 +18,12 @@ def log_sniper_alert(alert):
         # "outcome": None
     }
 
-    try:
-        res = requests.post(url, headers=headers, json=data)
-        if res.status_code not in [200, 201, 204]:
-            print("[X] Supabase insert failed:", res.status_code, res.text)
-        else:
-            print("[✓] Sniper alert saved to Supabase.")
-    except Exception as e:
-        print("[X] Error logging sniper alert:", e)
+def log_sniper_alert(alert, writer=None):
+    # Queues the row for the background SupabaseWriter; never blocks the loop
+    writer = writer or get_writer()
+
+    if not writer.is_configured():
+        print("[X] Missing SUPABASE_URL or SUPABASE_KEY in environment.")
+        return
+
+    writer.enqueue("sniper_alerts", build_alert_row(alert))
@@ -1,22 +1,25 @@
 import time
 import hashlib
-from utils.discord_alert import send_discord_alert
+from utils.alert_delivery import get_delivery
 
 class SpotPerpAlertDispatcher:
-    def __init__(self, cooldown_seconds=300):  # 🧠 Reduced from 900 → 300 for SOL volatility
+    def __init__(self, cooldown_seconds=300, clock=time.time, delivery=None, symbol="SOL"):  # 🧠 Reduced from 900 → 300 for SOL volatility
+        self.symbol = symbol
+        self.clock = clock
+        self.delivery = delivery or get_delivery()
         self.last_signal_time = 0
         self.last_signal_hash = ""
         self.cooldown_seconds = cooldown_seconds
 
-    async def maybe_alert(self, signal_text, confidence, label, deltas, force_test=False):
-        now = time.time()
+    def maybe_alert(self, signal_text, confidence, label, deltas, force_test=False):
+        now = self.clock()
         signal_fingerprint = f"{signal_text}-{confidence}-{label}"
         signal_hash = hashlib.sha256(signal_fingerprint.encode()).hexdigest()
 
         # === TEST MODE ===
         if force_test:
             message = (
-                f"🧪 **TEST SNIPER SIGNAL (SOL)**\n"
+                f"🧪 **TEST SNIPER SIGNAL ({self.symbol})**\n"
                 f"{signal_text}\n\n"
                 f"🧠 Confidence Score: `{confidence}/10` → `{label}`\n"
                 f"🎯 Suggested Trade: **🟢 LONG (Test Mode)**\n"
@@ -25,8 +28,8 @@ class SpotPerpAlertDispatcher:
                 f"   • Binance Spot: `{deltas.get('bin_spot', 'n/a')}%`\n"
                 f"   • Binance Perp: `{deltas.get('bin_perp', 'n/a')}%`\n"
             )
-            await send_discord_alert(message)
-            print("✅ [TEST ALERT SENT]")
+            self.delivery.enqueue(message)
+            print("✅ [TEST ALERT QUEUED]")
             return
 
         # === Real Alert Conditions ===
@@ -48,16 +51,16 @@ class SpotPerpAlertDispatcher:
 
         if is_dominant_trend and is_high_confidence and is_not_duplicate and is_outside_cooldown:
             message = (
-                f"📈 **HIGH-CONFLUENCE SNIPER SIGNAL (SOL)**\n"
+                f"📈 **HIGH-CONFLUENCE SNIPER SIGNAL ({self.symbol})**\n"
                 f"{signal_text}\n\n"
                 f"🧠 Confidence Score: `{confidence}/10` → `{label}`\n"
                 f"🎯 Suggested Trade: **{direction}**\n"
                 f"📊 15m CVD Δ Breakdown:\n"
-                f"   • Coinbase (SOL-USD): `{deltas.get('cb_cvd', 'n/a')}%`\n"
+                f"   • Coinbase ({self.symbol}-USD): `{deltas.get('cb_cvd', 'n/a')}%`\n"
                 f"   • Binance Spot: `{deltas.get('bin_spot', 'n/a')}%`\n"
                 f"   • Binance Perp: `{deltas.get('bin_perp', 'n/a')}%`\n"
             )
 
-            await send_discord_alert(message)
+            self.delivery.enqueue(message)
             self.last_signal_time = now
             self.last_signal_hash = signal_hash
@@ -1,5 +1,11 @@
 # utils/spot_perp_scorer.py
 
+TF_WEIGHTS = {
+    "5m": 1.0,
+    "15m": 1.5,
+    "1h": 1.0
+}
+
 def score_spot_perp_confluence_multi(deltas: dict):
     """
     Scores 5m, 15m, 1h CVD delta behavior to assign confluence bias and confidence.
@@ -8,14 +14,8 @@ def score_spot_perp_confluence_multi(deltas: dict):
     score = 0
     notes = []
 
-    tf_weights = {
-        "5m": 1.0,
-        "15m": 1.5,
-        "1h": 1.0
-    }
-
     for tf, delta in deltas.items():
-        weight = tf_weights.get(tf, 1.0)
+        weight = TF_WEIGHTS.get(tf, 1.0)
 
         cb = delta.get("cb_cvd", 0)
         spot = delta.get("bin_spot", 0)
@@ -0,0 +1,265 @@
+# utils/supabase_writer.py
+
+import asyncio
+import json
+import os
+import random
+import time
+
+import aiohttp
+
+from utils import metrics
+
+RETRYABLE_STATUSES = {408, 429, 500, 502, 503, 504}
+# Rejections caused by the rows themselves (bad column, constraint, conflict);
+# a batch is split until the offending rows are isolated
+ROW_REJECT_STATUSES = {400, 409, 422}
+
+SENT, REJECTED, FAILED = "sent", "rejected", "failed"
+
+REQUEST_SECONDS = metrics.histogram("supabase_request_seconds", "Supabase insert round trip", ["table"])
+REQUEST_ERRORS = metrics.counter("supabase_request_errors_total", "Supabase inserts that failed or errored", ["table"])
+SPILLED_ROWS = metrics.counter("supabase_spilled_rows_total", "Rows written to the local spill file")
+REJECTED_ROWS = metrics.counter("supabase_rejected_rows_total", "Rows Supabase refused, moved to the rejected file")
+
+
+class SupabaseWriter:
+    """
+    Background writer for Supabase inserts.
+
+    enqueue() never blocks the event loop: rows go into a bounded queue and
+    run() drains it, posting one multi-row insert per table per batch over a
+    single pooled session. Failed batches are retried with exponential
+    backoff; batches that still fail, and rows that arrive while the queue is
+    full, are spilled to a local JSONL file that is re-sent once the remote
+    accepts writes again. Rows the remote refuses outright (non-retryable
+    4xx) are never retried: they go to `<spill>.rejected` for inspection so
+    they cannot block the rows behind them.
+    """
+
+    def __init__(self, url=None, key=None, max_queue=10000, batch_size=200, flush_interval=1.0,
+                 max_retries=4, backoff_base=0.5, backoff_max=30.0, timeout=10.0, spill_path=None):
+        # Read at construction so values from load_dotenv() are picked up
+        self.url = url or os.getenv("SUPABASE_URL")
+        self.key = key or os.getenv("SUPABASE_KEY")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.spill_path = spill_path or os.getenv("SUPABASE_SPILL_FILE", "supabase_spill.jsonl")
+        self.rejected_path = self.spill_path + ".rejected"
+        self.draining_path = self.spill_path + ".draining"
+
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.session = None
+        self.stats = {
+            "enqueued": 0,
+            "sent": 0,
+            "batches": 0,
+            "retries": 0,
+            "spilled": 0,
+            "recovered": 0,
+            "rejected": 0,
+            "last_latency": None
+        }
+
+    def is_configured(self):
+        return bool(self.url and self.key)
+
+    def enqueue(self, table, row):
+        try:
+            self.queue.put_nowait((table, row))
+            self.stats["enqueued"] += 1
+            return True
+        except asyncio.QueueFull:
+            self._spill(table, [row])
+            return False
+
+    async def run(self):
+        if not self.is_configured():
+            print("❌ Missing Supabase credentials. Check SUPABASE_URL and SUPABASE_KEY in your .env or Railway variables.")
+            return
+
+        self._recover_draining()
+        self.session = aiohttp.ClientSession(
+            headers={
+                "apikey": self.key,
+                "Authorization": f"Bearer {self.key}",
+                "Content-Type": "application/json",
+                "Prefer": "return=minimal"
+            },
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=4)
+        )
+        try:
+            while True:
+                batch = await self._next_batch()
+                if batch:
+                    await self._send_batch(batch)
+        finally:
+            await self.close()
+
+    async def _next_batch(self):
+        try:
+            first = await asyncio.wait_for(self.queue.get(), timeout=self.flush_interval)
+        except asyncio.TimeoutError:
+            return []
+
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+        return batch
+
+    async def _send_batch(self, batch):
+        by_table = {}
+        for table, row in batch:
+            by_table.setdefault(table, []).append(row)
+
+        all_ok = True
+        for table, rows in by_table.items():
+            sent, failed = await self._send_rows(table, rows)
+            self.stats["sent"] += sent
+            if failed:
+                self._spill(table, failed)
+                all_ok = False
+
+        if all_ok and os.path.exists(self.spill_path):
+            await self._drain_spill()
+
+    async def _post(self, table, rows):
+        started = time.perf_counter()
+        async with self.session.post(f"{self.url}/rest/v1/{table}", data=json.dumps(rows, default=str)) as resp:
+            self.stats["last_latency"] = time.perf_counter() - started
+            REQUEST_SECONDS.labels(table).observe(self.stats["last_latency"])
+            if resp.status in (200, 201, 204):
+                self.stats["batches"] += 1
+                return True, resp.status
+            REQUEST_ERRORS.labels(table).inc()
+            body = await resp.text()
+            print(f"❌ Supabase insert into {table} failed: {resp.status} {body[:200]}")
+            return False, resp.status
+
+    async def _post_with_retry(self, table, rows):
+        # SENT, REJECTED (non-retryable status, with the status) or FAILED
+        for attempt in range(self.max_retries + 1):
+            try:
+                ok, status = await self._post(table, rows)
+                if ok:
+                    return SENT, status
+                if status not in RETRYABLE_STATUSES:
+                    return REJECTED, status
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                REQUEST_ERRORS.labels(table).inc()
+                print(f"❌ Supabase write error ({table}): {e!r}")
+
+            if attempt < self.max_retries:
+                self.stats["retries"] += 1
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+        return FAILED, None
+
+    async def _send_rows(self, table, rows):
+        """
+        Posts `rows`, quarantining refused ones. Returns (rows sent, rows
+        that failed transiently and should be spilled).
+        """
+        outcome, status = await self._post_with_retry(table, rows)
+        if outcome == SENT:
+            return len(rows), []
+        if outcome == FAILED:
+            return 0, rows
+        if status in ROW_REJECT_STATUSES and len(rows) > 1:
+            # One bad row fails the whole multi-row insert; bisect to find it
+            mid = len(rows) // 2
+            sent_a, failed_a = await self._send_rows(table, rows[:mid])
+            sent_b, failed_b = await self._send_rows(table, rows[mid:])
+            return sent_a + sent_b, failed_a + failed_b
+        self._reject(table, rows, status)
+        return 0, []
+
+    def _spill(self, table, rows):
+        with open(self.spill_path, "a") as f:
+            for row in rows:
+                f.write(json.dumps({"table": table, "row": row}, default=str) + "\n")
+        self.stats["spilled"] += len(rows)
+        SPILLED_ROWS.inc(len(rows))
+
+    def _reject(self, table, rows, status):
+        with open(self.rejected_path, "a") as f:
+            for row in rows:
+                f.write(json.dumps({"table": table, "status": status, "row": row}, default=str) + "\n")
+        self.stats["rejected"] += len(rows)
+        REJECTED_ROWS.inc(len(rows))
+        print(f"⚠️ Supabase refused {len(rows)} {table} row(s) with {status}; moved to {self.rejected_path}")
+
+    def _recover_draining(self):
+        # A drain interrupted by a crash leaves its rows in the .draining file;
+        # put them back in the spill (rows already re-sent may be sent twice)
+        if not os.path.exists(self.draining_path):
+            return
+        with open(self.draining_path) as src, open(self.spill_path, "a") as dst:
+            for line in src:
+                dst.write(line if line.endswith("\n") else line + "\n")
+        os.remove(self.draining_path)
+        print(f"♻️ Recovered an interrupted Supabase spill drain into {self.spill_path}")
+
+    async def _drain_spill(self):
+        # Move the file aside first so new spills during the drain don't get lost
+        self._recover_draining()
+        draining = self.draining_path
+        os.replace(self.spill_path, draining)
+
+        by_table = {}
+        with open(draining) as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                by_table.setdefault(item["table"], []).append(item["row"])
+
+        for table, rows in by_table.items():
+            for i in range(0, len(rows), self.batch_size):
+                sent, failed = await self._send_rows(table, rows[i:i + self.batch_size])
+                self.stats["recovered"] += sent
+                if failed:
+                    self._spill(table, failed + rows[i + self.batch_size:])
+                    break
+
+        os.remove(draining)
+        print(f"✅ Supabase spill drained ({self.stats['recovered']} rows recovered so far).")
+
+    async def close(self):
+        # Flush what is still queued, spilling anything that cannot be sent
+        pending = []
+        while not self.queue.empty():
+            pending.append(self.queue.get_nowait())
+        if pending and self.session is not None and not self.session.closed:
+            await self._send_batch(pending)
+        elif pending:
+            for table, row in pending:
+                self._spill(table, [row])
+
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+_writer = None
+
+def get_writer():
+    global _writer
+    if _writer is None:
+        _writer = SupabaseWriter()
+    return _writer
@@ -0,0 +1,178 @@
+# utils/trade_tape.py
+
+import math
+import time
+from array import array
+from collections import namedtuple
+
+from utils import metrics
+
+BUY = 1
+SELL = -1
+
+TRADE_LAG = metrics.histogram("feed_trade_lag_seconds", "Local receive time minus exchange event time of the newest trade per batch", ["venue"])
+SINCE_LAST_TRADE = metrics.gauge("feed_seconds_since_last_trade", "Seconds since the last live trade batch arrived", ["venue", "instrument"])
+
+# Normalized trade record shared by every venue feed
+Trade = namedtuple("Trade", ["venue", "instrument", "ts", "price", "qty", "side", "trade_id"])
+
+
+def parse_trade_id(value):
+    # Venues send ids as ints or digit strings; anything else (UUIDs) maps to -1
+    if isinstance(value, int):
+        return value
+    return int(value) if value and value.isdigit() else -1
+
+
+class TradeTape:
+    """
+    Preallocated ring buffer of trades for one instrument on one venue.
+
+    Columns live in flat `array` buffers so appending a trade never allocates,
+    and the running CVD is maintained on append so readers stay O(1).
+    Timestamps are exchange event times in seconds.
+    """
+
+    def __init__(self, venue, instrument, capacity=65536):
+        self.venue = venue
+        self.instrument = instrument
+        self.capacity = capacity
+
+        self.ts = array("d", bytes(8 * capacity))
+        self.price = array("d", bytes(8 * capacity))
+        self.qty = array("d", bytes(8 * capacity))
+        self.side = array("b", bytes(capacity))
+        self.trade_id = array("q", bytes(8 * capacity))
+
+        self.head = 0  # next write slot
+        self.count = 0  # trades appended since start
+        self.cvd = 0.0
+        self.last_price = None
+        self.last_ts = 0.0
+        self.last_trade_id = -1
+
+        # Only maintained by extend_sequenced()
+        self.gaps = 0
+        self.missing = 0
+        self.duplicates = 0
+
+        # Local arrival time of the newest live batch
+        self.received_at = 0.0
+        self.lag = TRADE_LAG.labels(venue)
+        SINCE_LAST_TRADE.labels(venue, instrument).set_function(self.seconds_since_last_trade)
+
+    def append(self, ts, price, qty, side, trade_id=-1):
+        i = self.head
+        self.ts[i] = ts
+        self.price[i] = price
+        self.qty[i] = qty
+        self.side[i] = side
+        self.trade_id[i] = trade_id
+
+        i += 1
+        self.head = i if i < self.capacity else 0
+        self.count += 1
+
+        self.cvd += qty if side > 0 else -qty
+        self.last_price = price
+        self.last_ts = ts
+        self.last_trade_id = trade_id
+
+    def extend(self, trades, live=True):
+        # trades: iterable of (ts, price, qty, side, trade_id) from feeds.decoders
+        append = self.append
+        for ts, price, qty, side, trade_id in trades:
+            append(ts, price, qty, side, trade_id)
+        if live:
+            self._received()
+
+    def extend_sequenced(self, trades, live=True):
+        """
+        extend() for venues with contiguous trade ids (Binance aggTrade,
+        Coinbase matches): replays of ids already on the tape are dropped and
+        holes in the id sequence are counted as missing trades.
+
+        Pass live=False for REST backfills so their old trades don't count
+        towards the exchange lag metric.
+        """
+        last = self.last_trade_id
+        for ts, price, qty, side, trade_id in trades:
+            if trade_id <= last:
+                self.duplicates += 1
+                continue
+            if last >= 0 and trade_id != last + 1:
+                self.gaps += 1
+                self.missing += trade_id - last - 1
+            self.append(ts, price, qty, side, trade_id)
+            last = trade_id
+        if live:
+            self._received()
+
+    def _received(self):
+        now = time.time()
+        self.received_at = now
+        self.lag.observe(now - self.last_ts)
+
+    def seconds_since_last_trade(self):
+        return time.time() - self.received_at if self.received_at else math.nan
+
+    def __len__(self):
+        return self.count if self.count < self.capacity else self.capacity
+
+    def _slot(self, i):
+        # i counts back from the newest trade: -1 is the latest
+        n = len(self)
+        if i < -n or i >= 0:
+            raise IndexError("trade tape index out of range")
+        return (self.head + i) % self.capacity
+
+    def get(self, i=-1):
+        s = self._slot(i)
+        return Trade(
+            self.venue,
+            self.instrument,
+            self.ts[s],
+            self.price[s],
+            self.qty[s],
+            self.side[s],
+            self.trade_id[s]
+        )
+
+    def recent(self, n):
+        n = min(n, len(self))
+        return [self.get(i) for i in range(-n, 0)]
+
+    def window(self, seconds, now=None):
+        """
+        Net signed volume, buy volume, sell volume and trade count over the
+        last `seconds`, walking back from the newest trade.
+        """
+        if now is None:
+            now = self.last_ts
+        cutoff = now - seconds
+
+        ts, qty, side = self.ts, self.qty, self.side
+        cap = self.capacity
+        s = self.head
+        buys = sells = 0.0
+        count = 0
+
+        for _ in range(len(self)):
+            s = s - 1 if s > 0 else cap - 1
+            if ts[s] < cutoff:
+                break
+            if side[s] > 0:
+                buys += qty[s]
+            else:
+                sells += qty[s]
+            count += 1
+
+        return {
+            "net": buys - sells,
+            "buy": buys,
+            "sell": sells,
+            "count": count
+        }
+
+    def window_delta(self, seconds, now=None):
+        return self.window(seconds, now)["net"]
@@ -0,0 +1,184 @@
+# utils/ws_supervisor.py
+
+import asyncio
+import json
+import math
+import random
+import time
+
+import websockets
+
+from utils import metrics
+from utils.profiler import get_profiler
+
+FRAMES = metrics.counter("feed_frames_total", "Websocket frames handled", ["stream"])
+HANDLE_SECONDS = metrics.histogram("feed_handle_seconds", "Decode + handle time per websocket frame", ["stream"])
+FRAME_ERRORS = metrics.counter("feed_frame_errors_total", "Websocket frames whose handler raised", ["stream"])
+DISCONNECTS = metrics.counter("feed_disconnects_total", "Websocket sessions that ended", ["stream"])
+CONNECTED = metrics.gauge("feed_connected", "1 while the websocket is connected", ["stream"])
+SINCE_LAST_FRAME = metrics.gauge("feed_seconds_since_last_frame", "Seconds since the last websocket frame", ["stream"])
+
+
+class StreamSupervisor:
+    """
+    Keeps one websocket stream alive for a feed.
+
+    Reconnects with jittered exponential backoff after errors, closes and
+    stalls (no frame for `stale_after` seconds), re-sends subscriptions, and
+    before resuming live frames asks the feed to backfill trades missed while
+    disconnected via `backfill(last_trade_id)`. Sequenced tapes then report
+    whatever is still missing as trades_lost. A frame whose handler raises
+    is dropped and counted in frame_errors; the socket stays open.
+
+    `subscribe` is a list of payloads, or a callable returning one, evaluated
+    on every connect so dynamically added subscriptions survive reconnects.
+    Without a tape, `backfill()` is called with no arguments and the owner
+    decides what to fetch.
+    """
+
+    def __init__(self, name, uri, on_frame, subscribe=None, tape=None, backfill=None,
+                 backoff_base=1.0, backoff_max=60.0, stale_after=60.0):
+        self.name = name
+        self.uri = uri
+        self.on_frame = on_frame
+        self.subscribe = subscribe or []
+        self.ws = None
+        self.tape = tape
+        self.backfill = backfill
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stale_after = stale_after
+        self.recorder = None
+        self._failures = 0
+
+        self.connected = False
+        self.connects = 0
+        self.disconnects = 0
+        self.frames = 0
+        self.frame_errors = 0
+        self.backfilled = 0
+        self.last_frame_at = 0
+        self.last_error = None
+        self.last_recover_seconds = None
+        self.max_recover_seconds = 0.0
+        self._down_since = None
+
+        self._frames_total = FRAMES.labels(name)
+        self._handle_seconds = HANDLE_SECONDS.labels(name)
+        self._frame_errors_total = FRAME_ERRORS.labels(name)
+        self._disconnects_total = DISCONNECTS.labels(name)
+        self.profiler = get_profiler()
+        self._profile_stage = f"handler:{name}"
+        CONNECTED.labels(name).set_function(lambda: 1 if self.connected else 0)
+        SINCE_LAST_FRAME.labels(name).set_function(lambda: time.time() - self.last_frame_at if self.last_frame_at else math.nan)
+
+    async def run(self, recorder=None):
+        self.recorder = recorder
+
+        while True:
+            try:
+                await self._session()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.last_error = repr(e)
+                print(f"[WS] {self.name} disconnected: {e!r}")
+
+            self.connected = False
+            self.ws = None
+            self.disconnects += 1
+            self._disconnects_total.inc()
+            if self._down_since is None:
+                self._down_since = time.monotonic()
+
+            delay = min(self.backoff_max, self.backoff_base * 2 ** self._failures)
+            self._failures += 1
+            await asyncio.sleep(delay * random.uniform(0.5, 1.0))
+
+    async def _session(self):
+        async with websockets.connect(self.uri) as ws:
+            # Expose the socket first: a subscription added while these sends
+            # are in flight is then either in the payloads or sent directly.
+            self.ws = ws
+            payloads = self.subscribe() if callable(self.subscribe) else self.subscribe
+            for payload in payloads:
+                await ws.send(json.dumps(payload))
+
+            self.connected = True
+            self.connects += 1
+            recovering = self._down_since is not None
+            receiving = False
+
+            if recovering and self.backfill:
+                try:
+                    if self.tape is None:
+                        self.backfilled += await self.backfill()
+                    elif self.tape.last_trade_id >= 0:
+                        self.backfilled += await self.backfill(self.tape.last_trade_id)
+                except Exception as e:
+                    print(f"[WS] {self.name} backfill failed: {e!r}")
+
+            while True:
+                try:
+                    msg = await asyncio.wait_for(ws.recv(), timeout=self.stale_after)
+                except asyncio.TimeoutError:
+                    raise ConnectionError(f"no frames for {self.stale_after}s")
+
+                if self.recorder:
+                    self.recorder.record(self.name, msg)
+                started = time.perf_counter()
+                try:
+                    await self.on_frame(msg)
+                except Exception as e:
+                    # One bad frame is dropped, not worth a reconnect + backfill
+                    self._frame_error(e)
+                elapsed = time.perf_counter() - started
+                self._handle_seconds.observe(elapsed)
+                if self.profiler.enabled:
+                    self.profiler.record(self._profile_stage, elapsed)
+                self._frames_total.inc()
+
+                self.frames += 1
+                self.last_frame_at = time.time()
+                if not receiving:
+                    # A session that delivers frames ends the failure streak;
+                    # _session() itself only ever returns by raising
+                    receiving = True
+                    self._failures = 0
+                if recovering:
+                    recovering = False
+                    self.last_recover_seconds = time.monotonic() - self._down_since
+                    self.max_recover_seconds = max(self.max_recover_seconds, self.last_recover_seconds)
+                    self._down_since = None
+
+    def _frame_error(self, error):
+        self.frame_errors += 1
+        self._frame_errors_total.inc()
+        self.last_error = repr(error)
+        # First error and then every 1000th, so a bad stream cannot flood the log
+        if self.frame_errors % 1000 == 1:
+            print(f"[WS] {self.name} frame handler failed ({self.frame_errors} so far): {error!r}")
+
+    async def send(self, payload):
+        # Returns False when not connected; callers rely on `subscribe` to
+        # replay state on the next connect.
+        if self.ws is None:
+            return False
+        await self.ws.send(json.dumps(payload))
+        return True
+
+    def get_stats(self):
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "reconnects": max(0, self.connects - 1),
+            "disconnects": self.disconnects,
+            "frames": self.frames,
+            "frame_errors": self.frame_errors,
+            "last_frame_at": self.last_frame_at,
+            "last_recover_seconds": self.last_recover_seconds,
+            "max_recover_seconds": self.max_recover_seconds,
+            "backfilled": self.backfilled,
+            "trades_lost": self.tape.missing if self.tape is not None else None,
+            "last_error": self.last_error
+        }